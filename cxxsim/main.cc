@@ -1,71 +1,277 @@
+#include <algorithm>
+#include <chrono>
+#include <cstdint>
 #include <fstream>
 #include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
 
+#if __has_include(<cxxrtl/cxxrtl_vcd.h>)
+#include <cxxrtl/cxxrtl_vcd.h>
+#else
 #include <backends/cxxrtl/cxxrtl_vcd.h>
-#include <build/i2c_obs.cc>
+#endif
+#include <i2c_obs.h>
 
 using namespace cxxrtl_design;
 
-void cycle(p_top &top, cxxrtl::vcd_writer &vcd, uint64_t &vcd_time) {
-  assert(!top.p_clk);
-  top.p_clk.set(true);
-  top.step();
-  vcd.sample(vcd_time++);
+// See i2c_obs.scenario.Scenario for the scenario file format; this must
+// agree with it.
+struct step {
+  int line;
+  std::string op;
+  int low, high;
+};
 
-  top.p_clk.set(false);
-  top.step();
-  vcd.sample(vcd_time++);
+struct scenario {
+  std::string name;
+  std::vector<step> steps;
+};
+
+static bool parse_value(const std::string &word, int &low, int &high) {
+  size_t dots = word.find("..");
+  std::string low_s = word.substr(0, dots);
+  std::string high_s = dots == std::string::npos ? low_s : word.substr(dots + 2);
+  for (auto &s : {low_s, high_s})
+    if (s.empty() || s.find_first_not_of("0123456789") != std::string::npos)
+      return false;
+  low = std::stoi(low_s);
+  high = std::stoi(high_s);
+  return low <= high;
 }
 
-int main(int argc, char **argv) {
-  int ret = 0;
-  p_top top;
-  debug_items di;
-  top.debug_info(di);
+static bool load(const std::string &path, std::vector<scenario> &scenarios) {
+  std::ifstream in(path);
+  if (!in) {
+    std::cerr << path << ": can't open" << std::endl;
+    return false;
+  }
+  std::string raw;
+  for (int line = 1; std::getline(in, raw); ++line) {
+    std::istringstream words(raw.substr(0, raw.find('#')));
+    std::string op, value, extra;
+    if (!(words >> op))
+      continue;
+    bool ok = bool(words >> value) && !(words >> extra);
+    step s{line, op, 0, 0};
+    if (ok && op == "scenario") {
+      scenarios.push_back({value, {}});
+      continue;
+    } else if (op == "scl" || op == "sda" || op == "switch" || op == "oe") {
+      ok = ok && (value == "0" || value == "1") && parse_value(value, s.low, s.high);
+    } else if (op == "wait") {
+      ok = ok && value.find("..") == std::string::npos &&
+           parse_value(value, s.low, s.high);
+    } else if (op == "stretch") {
+      ok = ok && parse_value(value, s.low, s.high);
+    } else {
+      ok = false;
+    }
+    if (!ok || scenarios.empty()) {
+      std::cerr << path << ":" << line << ": can't parse '" << raw << "'"
+                << std::endl;
+      return false;
+    }
+    scenarios.back().steps.push_back(s);
+  }
+  return true;
+}
+
+// fnmatch(3), but for '*' and '?' only, so it builds everywhere.
+static bool glob(const char *pattern, const char *name) {
+  if (*pattern == '*')
+    return glob(pattern + 1, name) || (*name && glob(pattern, name + 1));
+  if (!*pattern || !*name)
+    return !*pattern && !*name;
+  return (*pattern == '?' || *pattern == *name) && glob(pattern + 1, name + 1);
+}
+
+// Writes the VCD as the simulation runs instead of holding it all in
+// memory, optionally only for some signals and a window of cycles.
+struct tracer {
+  static const size_t FLUSH_BYTES = 1 << 20;
 
-  bool do_vcd = argc >= 2 && std::string(argv[1]) == "--vcd";
   cxxrtl::vcd_writer vcd;
-  uint64_t vcd_time;
-  if (do_vcd)
-    vcd.add(di);
+  std::ofstream out;
+  std::vector<std::string> patterns;
+  uint64_t from = 0, to = UINT64_MAX;
 
-  top.p_scl__i.set(true);
-  cycle(top, vcd, vcd_time);
+  bool open(const std::string &path, const debug_items &items) {
+    out.open(path);
+    if (!out) {
+      std::cerr << path << ": can't open" << std::endl;
+      return false;
+    }
+    // Named as the Python tests' VCDs are, so the same patterns work.
+    vcd.add(items, [&](const std::string &name, const debug_item &) {
+      if (patterns.empty())
+        return true;
+      std::string dotted = "top." + name;
+      std::replace(dotted.begin(), dotted.end(), ' ', '.');
+      for (auto &pattern : patterns)
+        if (glob(pattern.c_str(), dotted.c_str()))
+          return true;
+      return false;
+    });
+    return true;
+  }
 
-  top.p_switch.set(true);
-  cycle(top, vcd, vcd_time);
+  void sample(uint64_t cycle, uint64_t time) {
+    if (!out.is_open() || cycle < from || cycle > to)
+      return;
+    vcd.sample(time);
+    if (vcd.buffer.size() >= FLUSH_BYTES)
+      flush();
+  }
+
+  void flush() {
+    out << vcd.buffer;
+    vcd.buffer.clear();
+  }
+};
 
-  top.p_switch.set(false);
+struct harness {
+  p_top top;
+  tracer trace;
+  uint64_t cycles = 0;
 
-  const std::vector<int> STRETCHES = {0, 0, 3, 3};
+  void cycle() {
+    assert(!top.p_clk);
+    top.p_clk.set(true);
+    top.step();
+    trace.sample(cycles, 2 * cycles);
 
-  int stretch_ix = 0;
-  for (auto expected : STRETCHES) {
+    top.p_clk.set(false);
+    top.step();
+    trace.sample(cycles, 2 * cycles + 1);
+    cycles += 1;
+  }
+
+  // Scenarios all start from reset with the inputs low, so any number of
+  // them can run in one process.
+  void reset() {
     top.p_scl__i.set(false);
-    cycle(top, vcd, vcd_time);
-    cycle(top, vcd, vcd_time);
-    cycle(top, vcd, vcd_time);
-
-    top.p_scl__i.set(true);
-    int actual = 0;
-    while (top.p_scl__oe) {
-      actual += 1;
-      cycle(top, vcd, vcd_time);
-    }
-    if (actual != expected) {
-      std::cerr << "ix " << stretch_ix << " expected " << expected
-                << " stretched cycles, got " << actual << std::endl;
-      ret = 1;
+    top.p_sda__i.set(false);
+    top.p_switch.set(false);
+    top.p_rst.set(true);
+    cycle();
+    top.p_rst.set(false);
+    top.step();
+  }
+
+  int run(const scenario &sc) {
+    int failures = 0;
+    reset();
+    for (auto &s : sc.steps) {
+      if (s.op == "scl") {
+        top.p_scl__i.set(bool(s.low));
+      } else if (s.op == "sda") {
+        top.p_sda__i.set(bool(s.low));
+      } else if (s.op == "switch") {
+        top.p_switch.set(bool(s.low));
+      } else if (s.op == "wait") {
+        for (int i = 0; i < s.low; ++i)
+          cycle();
+      } else if (s.op == "stretch") {
+        top.step();
+        int actual = 0;
+        while (top.p_scl__oe) {
+          actual += 1;
+          cycle();
+        }
+        if (actual < s.low || actual > s.high) {
+          std::cerr << sc.name << ": line " << s.line << ": expected stretch "
+                    << s.low;
+          if (s.high != s.low)
+            std::cerr << ".." << s.high;
+          std::cerr << ", got " << actual << " stretched cycles" << std::endl;
+          failures += 1;
+        }
+      } else if (s.op == "oe") {
+        top.step();
+        int actual = bool(top.p_scl__oe);
+        if (actual != s.low) {
+          std::cerr << sc.name << ": line " << s.line << ": expected oe "
+                    << s.low << ", got oe " << actual << std::endl;
+          failures += 1;
+        }
+      }
     }
-    cycle(top, vcd, vcd_time);
-    cycle(top, vcd, vcd_time);
-    cycle(top, vcd, vcd_time);
+    return failures;
   }
+};
 
-  if (do_vcd) {
-    std::ofstream of("cxxsim.vcd");
-    of << vcd.buffer;
+static bool parse_window(const std::string &word, uint64_t &from, uint64_t &to) {
+  size_t dots = word.find("..");
+  if (dots == std::string::npos)
+    return false;
+  try {
+    from = dots ? std::stoull(word.substr(0, dots)) : 0;
+    to = dots + 2 < word.size() ? std::stoull(word.substr(dots + 2)) : UINT64_MAX;
+  } catch (const std::exception &) {
+    return false;
   }
+  return from <= to;
+}
+
+static void usage(const char *argv0) {
+  std::cerr << "usage: " << argv0
+            << " [--vcd PATH] [--vcd-signals PATTERN,...] [--vcd-window N..M]"
+               " SCENARIO-FILE..."
+            << std::endl;
+}
+
+int main(int argc, char **argv) {
+  harness h;
+  std::string vcd_path;
+  std::vector<scenario> scenarios;
+  for (int i = 1; i < argc; ++i) {
+    std::string arg = argv[i];
+    bool has_value = i + 1 < argc;
+    if (arg == "--vcd" && has_value) {
+      vcd_path = argv[++i];
+    } else if (arg == "--vcd-signals" && has_value) {
+      std::istringstream patterns(argv[++i]);
+      for (std::string pattern; std::getline(patterns, pattern, ',');)
+        if (!pattern.empty())
+          h.trace.patterns.push_back(pattern);
+    } else if (arg == "--vcd-window" && has_value) {
+      if (!parse_window(argv[++i], h.trace.from, h.trace.to)) {
+        usage(argv[0]);
+        return 2;
+      }
+    } else if (arg.rfind("--", 0) == 0) {
+      usage(argv[0]);
+      return 2;
+    } else if (!load(arg, scenarios)) {
+      return 2;
+    }
+  }
+  if (scenarios.empty()) {
+    usage(argv[0]);
+    return 2;
+  }
+
+  debug_items di;
+  // Through the base class, this overload exists in every Yosys we support.
+  static_cast<cxxrtl::module &>(h.top).debug_info(di, "");
+  if (!vcd_path.empty() && !h.trace.open(vcd_path, di))
+    return 2;
+
+  int failed = 0;
+  auto started = std::chrono::steady_clock::now();
+  for (auto &sc : scenarios)
+    if (h.run(sc))
+      failed += 1;
+  std::chrono::duration<double> elapsed =
+      std::chrono::steady_clock::now() - started;
+  // i2c_obs.cxxsim parses this line.
+  std::cout << scenarios.size() << " scenarios, " << failed << " failed, "
+            << h.cycles << " cycles in " << elapsed.count() << "s" << std::endl;
+
+  if (!vcd_path.empty())
+    h.trace.flush();
 
-  return ret;
+  return failed ? 1 : 0;
 }
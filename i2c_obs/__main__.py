@@ -1,47 +1,37 @@
+import sys
 import warnings
 from argparse import ArgumentParser
+from importlib import import_module
 from os import makedirs
+from typing import Final
 
-from . import build, cxxsim, debugger, formal, test
 from .base import path
 
 warnings.simplefilter("default")
 makedirs(path("build"), exist_ok=True)
 
+# Each command's module, and its help.  Only the module of the command being
+# run is imported: most of them load Amaranth, which the debugger, run from
+# scripts over and over, has no use for.
+COMMANDS: Final[dict[str, tuple[str, str]]] = {
+    "test": (".test", "run the unit tests"),
+    "cxxsim": (".cxxsim", "run the C++ simulator tests"),
+    "bench": (".bench", "measure how fast the simulators run"),
+    "formal": (".formal", "formally verify the design"),
+    "build": (".build", "build the design, and optionally program it"),
+    "debugger": (".debugger", "attach the debugger"),
+}
+
 parser = ArgumentParser(prog="i2c_obs")
 subparsers = parser.add_subparsers(required=True)
 
-
-test.add_main_arguments(
-    subparsers.add_parser(
-        "test",
-        help="run the unit tests",
-    )
-)
-cxxsim.add_main_arguments(
-    subparsers.add_parser(
-        "cxxsim",
-        help="run the C++ simulator tests",
-    )
-)
-formal.add_main_arguments(
-    subparsers.add_parser(
-        "formal",
-        help="formally verify the design",
-    )
-)
-build.add_main_arguments(
-    subparsers.add_parser(
-        "build",
-        help="build the design, and optionally program it",
-    )
-)
-debugger.add_main_arguments(
-    subparsers.add_parser(
-        "debugger",
-        help="attach the debugger",
-    )
-)
+# The top-level parser takes no options besides --help, so the first argument
+# naming a command is the one being run.
+command = next((arg for arg in sys.argv[1:] if arg in COMMANDS), None)
+for name, (module, help) in COMMANDS.items():
+    subparser = subparsers.add_parser(name, help=help)
+    if name == command:
+        import_module(module, __package__).add_main_arguments(subparser)
 
 args = parser.parse_args()
 args.func(args)
@@ -0,0 +1,304 @@
+import json
+import platform as pyplatform
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any, Callable, Final, NamedTuple, Optional
+
+from amaranth import Elaboratable
+from amaranth.hdl.ir import Fragment
+from amaranth.sim import Delay, Settle, Simulator
+
+from . import sim
+from .base import path
+from .platform import Platform
+from .rtl import Top
+from .rtl.common import Debounce, Hz, Timer
+from .rtl.uart import Framer, symbols
+
+if sys.platform != "win32":
+    # POSIX only; peak RSS goes unreported on Windows.
+    import resource
+
+__all__ = ["add_main_arguments", "Result", "counted", "compare"]
+
+BACKENDS: Final[list[str]] = ["pysim", "cxxrtl"]
+
+
+def add_main_arguments(parser: ArgumentParser):
+    parser.set_defaults(func=main)
+    parser.add_argument(
+        "-w",
+        "--workload",
+        action="append",
+        dest="workloads",
+        metavar="PATTERN",
+        help="only run workloads matching this pattern; may be repeated "
+        f"(default: all of {', '.join(_WORKLOADS)})",
+    )
+    parser.add_argument(
+        "-B",
+        "--backend",
+        action="append",
+        dest="backends",
+        choices=BACKENDS,
+        help="only run on this backend; may be repeated (default: both)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=path("build/bench.json"),
+        help="where to write the results as JSON (default: build/bench.json)",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help="compare against results saved earlier, failing on regressions",
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.25,
+        metavar="FRACTION",
+        help="with --baseline, fail if any cycles/s drops by more than this "
+        "(default: 0.25)",
+    )
+
+
+class _Workload(NamedTuple):
+    period: float
+    make: Callable[[], Elaboratable]
+    procedure: Callable[[Any], sim.Procedure]
+
+
+# Long enough for cycles/s to be meaningful, short enough to run often: no
+# more than a few seconds each on pysim.
+TOP_PERIODS: Final[int] = 300
+HOLD_TIME: Final[float] = 2e-2
+UART_REPORTS: Final[int] = 8
+
+
+def _top_session(dut: Top, half_period: int) -> sim.Procedure:
+    # Train on the first periods, then stretch the rest; SCL is low and high
+    # for half_period cycles each.
+    yield dut.scl_i.eq(1)
+    yield dut.switch.eq(1)
+    yield
+    yield dut.switch.eq(0)
+    for _ in range(TOP_PERIODS):
+        yield dut.scl_i.eq(0)
+        for _ in range(half_period):
+            yield
+        yield dut.scl_i.eq(1)
+        yield Settle()
+        while (yield dut.scl_oe):
+            yield
+            yield Settle()
+        for _ in range(half_period):
+            yield
+
+
+def _debounce_hold(dut: Debounce) -> sim.Procedure:
+    for level in [1, 0, 1, 0]:
+        yield dut.i.eq(level)
+        yield Delay(dut.hold_time)
+        yield
+        yield
+        yield Settle()
+        assert (yield dut.o) == level
+
+
+def _timer_hold(dut: Timer) -> sim.Procedure:
+    for _ in range(2):
+        yield dut.i.eq(1)
+        yield Delay(dut.time)
+        yield
+        yield Settle()
+        assert (yield dut.o)
+        yield dut.i.eq(0)
+        yield
+
+
+def _uart_burst(dut: Framer) -> sim.Procedure:
+    kind = symbols.STRETCH_MEASURED
+    payload = symbols.encode(kind, 1_234, 567, 1_235, 0x123456789F00)[2:-1]
+    yield dut.kind.eq(kind)
+    yield dut.payload.eq(int.from_bytes(payload, "little"))
+    sent = 0
+    while sent < UART_REPORTS or not (yield dut.rdy) or (yield dut.uart.busy):
+        ready = sent < UART_REPORTS and (yield dut.rdy)
+        yield dut.wr_en.eq(ready)
+        sent += ready
+        yield
+        yield Settle()
+
+
+def _top(speed: int) -> _Workload:
+    # The boards' clock, so SCL takes as many cycles at each speed as it does
+    # on hardware.
+    period = 1 / 12e6
+    half_period = round(1 / speed / period / 2)
+    return _Workload(
+        period,
+        lambda: Top(platform=Platform["test"], speed=Hz(speed), histogram=True),
+        lambda dut: _top_session(dut, half_period),
+    )
+
+
+_WORKLOADS: Final[dict[str, _Workload]] = {
+    **{f"top-{speed}Hz": _top(speed) for speed in Top.VALID_SPEEDS},
+    "debounce-hold": _Workload(
+        1e-6, lambda: Debounce(hold_time=HOLD_TIME), _debounce_hold
+    ),
+    "timer-hold": _Workload(1e-6, lambda: Timer(time=HOLD_TIME), _timer_hold),
+    "uart-burst": _Workload(1 / 12e6, lambda: Framer(baud=1_000_000), _uart_burst),
+}
+
+
+class Result(NamedTuple):
+    workload: str
+    backend: str
+    cycles: int
+    # Simulation alone; elaborating and compiling are in build_seconds.
+    seconds: float
+    build_seconds: float
+    peak_rss_kb: Optional[int]
+
+    @property
+    def cycles_per_second(self) -> float:
+        return self.cycles / self.seconds if self.seconds else 0.0
+
+
+def counted(
+    procedure: sim.Procedure, period: float, cycles: list[int]
+) -> sim.Procedure:
+    # Counts the clock cycles a procedure asks for, the same on any backend.
+    try:
+        command = next(procedure)
+        while True:
+            match command:
+                case None:
+                    cycles[0] += 1
+                case Delay(interval=interval) if interval is not None:
+                    cycles[0] += round(interval / period)
+                case _:
+                    pass
+            command = procedure.send((yield command))
+    except StopIteration:
+        return
+
+
+def _run(name: str, backend: str) -> Result:
+    workload = _WORKLOADS[name]
+    started = time.perf_counter()
+    with sim.override_clock(workload.period):
+        dut = workload.make()
+        fragment = Fragment.get(dut, Platform["test"])
+    cycles = [0]
+
+    def bench() -> sim.Procedure:
+        yield from counted(workload.procedure(dut), workload.period, cycles)
+
+    if backend == "pysim":
+        simulator = Simulator(fragment)
+        simulator.add_clock(workload.period)
+        simulator.add_sync_process(bench)
+        built = time.perf_counter()
+        simulator.run()
+    else:
+        from .cxxrtl import Model
+
+        model = Model.of(dut, fragment)
+        built = time.perf_counter()
+        with model:
+            model.run(bench(), period=workload.period)
+    finished = time.perf_counter()
+
+    return Result(
+        name,
+        backend,
+        cycles[0],
+        finished - built,
+        built - started,
+        _peak_rss_kb(),
+    )
+
+
+def _peak_rss_kb() -> Optional[int]:
+    if sys.platform == "win32":
+        return None
+    # Kilobytes on Linux, bytes on macOS.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (
+        1024 if sys.platform == "darwin" else 1
+    )
+
+
+def main(args: Namespace):
+    names = [
+        name
+        for name in _WORKLOADS
+        if not args.workloads or any(fnmatch(name, p) for p in args.workloads)
+    ]
+    backends = args.backends or BACKENDS
+
+    # A fresh process for every run, so peak RSS is that run's alone; one at
+    # a time, so they don't compete for cores.
+    results: list[Result] = []
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        for name in names:
+            for backend in backends:
+                result = executor.submit(_run, name, backend).result()
+                results.append(result)
+                rss = (
+                    "n/a"
+                    if result.peak_rss_kb is None
+                    else f"{result.peak_rss_kb / 1024:.1f} MiB"
+                )
+                print(
+                    f"{name:16}  {backend:6}  {result.cycles:>10,} cycles  "
+                    f"{result.seconds:8.3f}s  {result.cycles_per_second:>12,.0f}/s  "
+                    f"{rss:>10}",
+                    flush=True,
+                )
+
+    report = {
+        "python": pyplatform.python_version(),
+        "amaranth": version("amaranth"),
+        "results": [
+            {**r._asdict(), "cycles_per_second": r.cycles_per_second} for r in results
+        ],
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"results written to {args.output}")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        sys.exit(not compare(results, baseline, args.max_regression))
+
+
+def compare(
+    results: list[Result], baseline: dict[str, Any], max_regression: float
+) -> bool:
+    before: dict[tuple[str, str], float] = {
+        (r["workload"], r["backend"]): r["cycles_per_second"]
+        for r in baseline["results"]
+    }
+    ok = True
+    for r in results:
+        was: Optional[float] = before.get((r.workload, r.backend))
+        if not was:
+            continue
+        change = r.cycles_per_second / was - 1
+        regressed = change < -max_regression
+        ok = ok and not regressed
+        print(
+            f"{r.workload:16}  {r.backend:6}  {change:+7.1%} vs baseline"
+            + ("  REGRESSED" if regressed else "")
+        )
+    return ok
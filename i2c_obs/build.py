@@ -1,19 +1,33 @@
 import importlib
 import inspect
+import os
 import re
+import shutil
+import subprocess
+import sys
+import time
+import traceback
 from argparse import ArgumentParser, Namespace
-from typing import Any, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
 
 from amaranth import Elaboratable
+from amaranth._toolchain import tool_env_var
+from amaranth.build.run import LocalBuildProducts
 
+from . import cache
+from .base import path
 from .platform import Platform
+from .report import Report
 from .rtl import Top
+from .rtl.uart import symbols
 
-__all__ = ["add_main_arguments", "build_top"]
+__all__ = ["add_main_arguments", "build_top", "Built", "keep_best"]
 
 
 def add_main_arguments(parser: ArgumentParser):
-    parser.set_defaults(func=main)
+    parser.set_defaults(func=main, parser=parser)
     parser.add_argument(
         "-t",
         "--top",
@@ -22,8 +36,9 @@ def add_main_arguments(parser: ArgumentParser):
     )
     parser.add_argument(
         "target",
-        choices=Platform.build_targets,
-        help="which board to build for",
+        nargs="?",
+        choices=sorted(Platform.build_targets),
+        help="which board to build for; not needed with --matrix",
     )
     parser.add_argument(
         "-s",
@@ -32,6 +47,32 @@ def add_main_arguments(parser: ArgumentParser):
         help="I2C bus speed to build at",
         default=str(Top.DEFAULT_SPEED),
     )
+    parser.add_argument(
+        "-b",
+        "--baud",
+        type=int,
+        choices=symbols.VALID_BAUDS,
+        help=f"UART baud rate (default: {symbols.DEFAULT_BAUD})",
+        default=symbols.DEFAULT_BAUD,
+    )
+    parser.add_argument(
+        "-T",
+        "--telemetry",
+        action="store_true",
+        help="stream per-cycle SCL timing while stretching",
+    )
+    parser.add_argument(
+        "-H",
+        "--histogram",
+        action="store_true",
+        help="bin SCL timing on the FPGA and dump it periodically",
+    )
+    parser.add_argument(
+        "-x",
+        "--transactions",
+        action="store_true",
+        help="decode I²C transactions from SCL and SDA and report them",
+    )
     parser.add_argument(
         "-p",
         "--program",
@@ -44,28 +85,267 @@ def add_main_arguments(parser: ArgumentParser):
         action="store_true",
         help="output debug Verilog",
     )
+    parser.add_argument(
+        "--seeds",
+        type=int,
+        metavar="N",
+        help="place and route the synthesised design with seeds 1 to N at once, "
+        "keeping whichever has the most timing margin",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        metavar="REPORT",
+        help="list what's changed since the build that wrote this " "top.report.json",
+    )
+    parser.add_argument(
+        "--matrix",
+        action="store_true",
+        help="build for every target at every speed concurrently, each into "
+        "build/TARGET-SPEED/, and tabulate utilisation and timing",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="with --matrix or --seeds, run this many builds at once; with "
+        "both, each build's seeds run one at a time (default: one per core)",
+    )
 
 
 def main(args: Namespace):
+    parser: ArgumentParser = args.parser
+    if args.seeds is not None and args.seeds < 1:
+        parser.error("--seeds needs at least one")
+    # Amaranth writes a .bat as well, but only the shell script is split up.
+    if args.seeds is not None and os.name != "posix":
+        parser.error("--seeds runs the build script's steps with sh, so needs POSIX")
+    if args.matrix:
+        if args.program:
+            parser.error("--matrix builds too many designs to --program")
+        sys.exit(not _matrix(args))
+    if args.target is None:
+        parser.error("a target is needed without --matrix")
+
     platform = Platform[args.target]
 
     component = build_top(args, platform)
 
-    platform.build(
-        component,
-        do_program=args.program,
-        debug_verilog=args.verilog,
-        yosys_opts="-g",
+    built = _build_cached(args, platform, component)
+    for stage in built.stages:
+        print(stage)
+    # Where the bitstream and reports have always been.
+    build_dir = path("build")
+    report = keep_best(args, built, build_dir)
+
+    if args.program:
+        platform.toolchain_program(LocalBuildProducts(str(build_dir)), "top")
+
+    print(report)
+    if args.compare is not None:
+        changes = report.compare(Report.load(args.compare))
+        print(f"Changes since {args.compare}:" if changes else "No changes.")
+        for change in changes:
+            print(f"  {change}")
+
+
+def keep_best(args: Namespace, built: "Built", build_dir: Path) -> Report:
+    """
+    Copies the outputs of the seed with the most timing margin to
+    build_dir, and saves its report beside the bitstream along with every
+    seed's timing.
+    """
+    reports = {
+        seed: Report.parse(
+            (outputs / "top.rpt").read_text(),
+            (outputs / "top.tim").read_text(),
+            target=args.target,
+            speed=int(args.speed),
+        )
+        for seed, outputs in built.outputs.items()
+    }
+    seed = max(
+        reports,
+        key=lambda s: m if (m := reports[s].margin) is not None else float("-inf"),
+    )
+    shutil.copytree(built.outputs[seed], build_dir, dirs_exist_ok=True)
+
+    report = reports[seed]
+    if seed is not None:
+        report = report._replace(
+            seed=seed, seeds={s: r.clocks for s, r in reports.items() if s is not None}
+        )
+    report.save(build_dir / "top.report.json")
+    return report
+
+
+class _MatrixResult(NamedTuple):
+    target: str
+    speed: int
+    cached: bool
+    seconds: float
+    # None if the build failed, with why in output.
+    report: Optional[Report]
+    output: str
+
+
+# What the table shows for logic and RAM on each architecture.
+_LOGIC_CELLS = ["ICESTORM_LC", "TRELLIS_COMB"]
+_RAM_CELLS = ["ICESTORM_RAM", "DP16KD"]
+
+
+def _matrix_one(args: Namespace, target: str, speed: int) -> _MatrixResult:
+    # The matrix already runs --jobs builds at once; their seeds take turns.
+    args = Namespace(**{**vars(args), "target": target, "speed": str(speed), "jobs": 1})
+    started = time.perf_counter()
+    platform = Platform[target]
+    try:
+        built = _build_cached(args, platform, build_top(args, platform))
+    except Exception:
+        # One board failing to elaborate or route shouldn't cost the others.
+        seconds = time.perf_counter() - started
+        return _MatrixResult(
+            target, speed, False, seconds, None, traceback.format_exc()
+        )
+    seconds = time.perf_counter() - started
+
+    # Kept apart so the reports of one don't overwrite another's.
+    build_dir = path(f"build/{target}-{speed}")
+    report = keep_best(args, built, build_dir)
+    cached = all(stage.hit for stage in built.stages)
+    return _MatrixResult(target, speed, cached, seconds, report, "")
+
+
+def _matrix(args: Namespace) -> bool:
+    """
+    Builds every target at every speed in a pool of processes, then prints
+    a table of their utilisation and timing.
+    """
+    configs = [
+        (target, speed)
+        for target in sorted(Platform.build_targets)
+        for speed in Top.VALID_SPEEDS
+    ]
+    # The parser doesn't pickle, and the builds have no use for it.
+    job = Namespace(**{k: v for k, v in vars(args).items() if k != "parser"})
+    # A fresh process for every build: Amaranth's platforms keep state between
+    # builds, e.g. a second iCE40 build in one process loses its clock's
+    # global buffer.
+    with ProcessPoolExecutor(max_workers=args.jobs, max_tasks_per_child=1) as executor:
+        results = list(
+            executor.map(_matrix_one, *zip(*((job, t, s) for t, s in configs)))
+        )
+
+    for r in results:
+        if r.report is None:
+            print(f"--- {r.target} at {r.speed}Hz:")
+            print(r.output.rstrip())
+
+    def cells(report: Optional[Report], kinds: list[str]) -> str:
+        for kind in kinds:
+            if report is not None and kind in report.utilisation:
+                used, available = report.utilisation[kind]
+                return f"{used}/{available}"
+        return "-"
+
+    print(
+        f"{'target':12}  {'speed':>8}  {'result':6}  {'logic':>11}  {'RAM':>7}  "
+        f"{'Fmax':>10}  build"
     )
+    for r in results:
+        fmax = r.report and r.report.fmax
+        build = "cached" if r.cached else f"{r.seconds:.1f}s"
+        print(
+            f"{r.target:12}  {r.speed:>8}  {'ok' if r.report else 'FAIL':6}  "
+            f"{cells(r.report, _LOGIC_CELLS):>11}  {cells(r.report, _RAM_CELLS):>7}  "
+            f"{f'{fmax:.2f} MHz' if fmax else '-':>10}  {build}"
+        )
+    return all(r.report is not None for r in results)
 
-    heading = re.compile(r"^\d+\.\d+\. Printing statistics\.$", flags=re.MULTILINE)
-    next_heading = re.compile(r"^\d+\.\d+\. ", flags=re.MULTILINE)
-    _print_file_between("build/top.rpt", heading, next_heading)
 
-    print("Device utilisation:")
-    heading = re.compile(r"^Info: Device utilisation:$", flags=re.MULTILINE)
-    next_heading = re.compile(r"^Info: Placed ", flags=re.MULTILINE)
-    _print_file_between("build/top.tim", heading, next_heading, prefix="Info: ")
+class Built(NamedTuple):
+    """What a build, cached or not, left behind; see keep_best."""
+
+    # Every stage, for showing what was cached.
+    stages: list[cache.Stage]
+    # The bitstream and logs for each seed, or under None without --seeds.
+    outputs: dict[Optional[int], Path]
+
+
+# '"$NEXTPNR_ICE40" --quiet --log top.tim ...', in Amaranth's build script.
+_NEXTPNR = re.compile(r'^"\$NEXTPNR_\w+"')
+
+
+def _build_cached(
+    args: Namespace, platform: Platform, component: Elaboratable
+) -> Built:
+    """
+    Synthesises, places and routes component, unless it's been done before
+    for the same design, options and toolchain.
+    """
+    # The plan holds the RTLIL and the toolchain scripts with every option
+    # filled in, so its digest covers those; the rest is said outright.
+    plan = platform.prepare(
+        component, "top", debug_verilog=args.verilog, yosys_opts="-g"
+    )
+    tools = [
+        cache.tool_id(os.environ.get(tool_env_var(tool), tool))
+        for tool in platform.required_tools
+    ]
+    key = cache.digest(
+        plan.digest().hex(), args.target, str(args.speed), str(args.verilog), *tools
+    )
+
+    if args.seeds is None:
+
+        def produce(out_dir: Path):
+            plan.execute_local(str(out_dir))
+
+        built = cache.stage("fpga-build", key, produce)
+        return Built([built], {None: built.dir})
+
+    # The script sets up the tools and then runs each in turn.  Split it at
+    # nextpnr, to synthesise once and place and route once per seed.
+    script = plan.files[f"{plan.script}.sh"].splitlines()
+    setup = [line for line in script if not line.startswith('"$')]
+    commands = [line for line in script if line.startswith('"$')]
+    pnr_at = next(
+        (i for i, command in enumerate(commands) if _NEXTPNR.match(command)), None
+    )
+    if pnr_at is None:
+        raise AssertionError(f"no nextpnr step to seed in {plan.script}.sh")
+
+    def synthesise(out_dir: Path):
+        plan.execute_local(str(out_dir), run_script=False)
+        _run_script([*setup, *commands[:pnr_at]], out_dir)
+
+    synthesised = cache.stage("fpga-synth", key, synthesise)
+
+    def place_and_route(seed: int) -> cache.Stage:
+        seeded = [
+            _NEXTPNR.sub(rf"\g<0> --seed {seed}", command)
+            for command in commands[pnr_at:]
+        ]
+
+        def produce(out_dir: Path):
+            shutil.copytree(synthesised.dir, out_dir, dirs_exist_ok=True)
+            _run_script([*setup, *seeded], out_dir)
+
+        return cache.stage("fpga-pnr", cache.digest(synthesised.key, *seeded), produce)
+
+    seeds = range(1, args.seeds + 1)
+    # The work is in nextpnr; threads are enough to keep them all busy.
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        routed = list(executor.map(place_and_route, seeds))
+    return Built(
+        [synthesised, *routed],
+        {seed: stage.dir for seed, stage in zip(seeds, routed)},
+    )
+
+
+def _run_script(lines: list[str], cwd: Path):
+    subprocess.run(["sh", "-c", "\n".join(lines)], cwd=cwd, check=True)
 
 
 def build_top(args: Namespace, platform: Platform, **kwargs: Any) -> Elaboratable:
@@ -77,30 +357,10 @@ def build_top(args: Namespace, platform: Platform, **kwargs: Any) -> Elaboratabl
     sig = inspect.signature(klass)
     if "speed" in sig.parameters and "speed" in args:
         kwargs["speed"] = Hz(args.speed)
+    for name in ["baud", "telemetry", "histogram", "transactions"]:
+        if name in sig.parameters and name in args:
+            kwargs[name] = getattr(args, name)
 
     kwargs["platform"] = platform
 
     return klass(**kwargs)
-
-
-def _print_file_between(
-    path: str,
-    start: re.Pattern[str],
-    end: re.Pattern[str],
-    *,
-    prefix: Optional[str] = None,
-):
-    with open(path, "r") as f:
-        for line in f:
-            if start.match(line):
-                break
-        else:
-            return
-
-        for line in f:
-            if end.match(line):
-                return
-            line = line.rstrip()
-            if prefix is not None:
-                line = line.removeprefix(prefix)
-            print(line)
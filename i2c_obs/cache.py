@@ -0,0 +1,101 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from functools import cache
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from .base import path
+
+__all__ = ["digest", "compiler_id", "tool_id", "Stage", "stage"]
+
+
+def digest(*parts: str | bytes) -> str:
+    """A digest of parts, each length-prefixed so they can't run together."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        h.update(f"{len(part)}:".encode())
+        h.update(part)
+    return h.hexdigest()
+
+
+@cache
+def compiler_id(compiler: str = "c++") -> str:
+    return subprocess.run(
+        [compiler, "--version"], capture_output=True, check=True, text=True
+    ).stdout
+
+
+@cache
+def tool_id(tool: str) -> str:
+    """
+    What the tool says its version is, or if it won't say, where it is and
+    when it last changed.
+    """
+    try:
+        result = subprocess.run(
+            [tool, "--version"],
+            capture_output=True,
+            stdin=subprocess.DEVNULL,
+            text=True,
+        )
+    except FileNotFoundError:
+        return f"{tool} not found"
+    if result.returncode == 0 and result.stdout.strip():
+        return result.stdout
+    found = shutil.which(tool) or tool
+    stat = os.stat(found)
+    return f"{found} {stat.st_size} {stat.st_mtime_ns}"
+
+
+class Stage(NamedTuple):
+    name: str
+    key: str
+    dir: Path
+    hit: bool
+    elapsed: float
+
+    def __str__(self):
+        outcome = "hit" if self.hit else "miss"
+        return f"{self.name}: {outcome} {self.key[:12]} ({self.elapsed:.2f}s)"
+
+
+def stage(
+    name: str,
+    key: str,
+    produce: Callable[[Path], None],
+    *,
+    root: Path = path("build/cache"),
+) -> Stage:
+    """
+    Returns the directory holding the outputs of the named stage for key,
+    calling produce to fill it on a miss.
+
+    key should be a digest of everything the outputs depend on.  produce
+    writes into a scratch directory that's moved into place only once it
+    returns, so an interrupted or concurrent build never leaves a partial
+    entry behind.
+    """
+    started = time.perf_counter()
+    out_dir = root / name / key[:16]
+    if out_dir.exists():
+        return Stage(name, key, out_dir, True, time.perf_counter() - started)
+
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    scratch = Path(tempfile.mkdtemp(dir=out_dir.parent))
+    try:
+        produce(scratch)
+        try:
+            os.rename(scratch, out_dir)
+        except OSError:
+            # Someone else got there first; theirs is as good as ours.
+            if not out_dir.exists():
+                raise
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return Stage(name, key, out_dir, False, time.perf_counter() - started)
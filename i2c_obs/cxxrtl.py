@@ -0,0 +1,289 @@
+import ctypes
+import os
+import platform as pyplatform
+import subprocess
+from ctypes import POINTER, c_char_p, c_size_t, c_uint32, c_void_p
+from pathlib import Path
+from typing import Any, Optional, Self, cast
+
+from amaranth import Const, Signal
+from amaranth._toolchain.yosys import YosysBinary, find_yosys
+from amaranth.back import rtlil
+from amaranth.hdl.ast import Assign, Cat, Operator, SignalDict, Slice, Value
+from amaranth.hdl.ir import Fragment
+from amaranth.sim import Delay, Settle
+
+from . import cache
+
+__all__ = ["yosys", "write_cxxrtl", "include_dirs", "Model"]
+
+
+def yosys() -> YosysBinary:
+    if (
+        os.environ.get("VIRTUAL_ENV") == "OSS Cad Suite"
+        and pyplatform.system() == "Windows"
+    ):
+        # NOTE: osscad's yosys-config (used by _SystemYosys.data_dir) on Windows
+        # (a) doesn't execute as-is (bash script, can't popen directly from
+        # native Windows Python), and (b) its answers are wrong anyway (!!!).
+        os.environ["AMARANTH_USE_YOSYS"] = "builtin"
+
+    return cast(YosysBinary, find_yosys(lambda ver: ver >= (0, 10)))
+
+
+def write_cxxrtl(yosys: YosysBinary, cc_out: Path, rtlil_text: str, *, header: bool):
+    if cc_out.is_absolute():
+        try:
+            cc_out = cc_out.relative_to(Path.cwd())
+        except ValueError:
+            raise AssertionError(
+                "cc_out must be relative to cwd for builtin-yosys to write to it"
+            )
+    script = [
+        f"read_rtlil <<rtlil\n{rtlil_text}\nrtlil",
+        f"write_cxxrtl {'-header ' if header else ''}{cc_out}",
+    ]
+    yosys.run(["-q", "-"], "\n".join(script))
+
+
+def include_dirs(yosys: YosysBinary) -> list[Path]:
+    include = cast(Path, yosys.data_dir()) / "include"
+    # Yosys 0.33 moved the runtime under backends/cxxrtl/runtime.
+    return [include, include / "backends" / "cxxrtl" / "runtime"]
+
+
+def _capi_source(yosys: YosysBinary) -> Path:
+    for candidate in [
+        "backends/cxxrtl/runtime/cxxrtl/capi/cxxrtl_capi.cc",
+        "backends/cxxrtl/cxxrtl_capi.cc",
+    ]:
+        source = cast(Path, yosys.data_dir()) / "include" / candidate
+        if source.exists():
+            return source
+    raise AssertionError("can't find the CXXRTL C API in this Yosys")
+
+
+# See cxxrtl_capi.h.
+CXXRTL_OUTLINE = 4
+
+
+class _Object(ctypes.Structure):
+    _fields_ = [
+        ("type", c_uint32),
+        ("flags", c_uint32),
+        ("width", c_size_t),
+        ("lsb_at", c_size_t),
+        ("depth", c_size_t),
+        ("zero_at", c_size_t),
+        ("curr", POINTER(c_uint32)),
+        ("next", POINTER(c_uint32)),
+        ("outline", c_void_p),
+    ]
+
+
+def _load(library: Path) -> ctypes.CDLL:
+    lib = ctypes.CDLL(str(library))
+    lib.cxxrtl_design_create.argtypes = []
+    lib.cxxrtl_design_create.restype = c_void_p
+    lib.cxxrtl_create.argtypes = [c_void_p]
+    lib.cxxrtl_create.restype = c_void_p
+    lib.cxxrtl_destroy.argtypes = [c_void_p]
+    lib.cxxrtl_destroy.restype = None
+    lib.cxxrtl_step.argtypes = [c_void_p]
+    lib.cxxrtl_step.restype = c_size_t
+    lib.cxxrtl_get_parts.argtypes = [c_void_p, c_char_p, POINTER(c_size_t)]
+    lib.cxxrtl_get_parts.restype = POINTER(_Object)
+    lib.cxxrtl_outline_eval.argtypes = [c_void_p]
+    lib.cxxrtl_outline_eval.restype = None
+    return lib
+
+
+def _build(rtlil_text: str, *, optimize: bool) -> Path:
+    binary = yosys()
+    flags = ["-O3" if optimize else "-O0", "-std=c++14", "-shared", "-fPIC"]
+
+    def produce(out_dir: Path):
+        cc_path = out_dir / "design.cc"
+        write_cxxrtl(binary, cc_path, rtlil_text, header=False)
+        subprocess.run(
+            [
+                "c++",
+                *flags,
+                *(f"-I{include}" for include in include_dirs(binary)),
+                cc_path,
+                _capi_source(binary),
+                "-o",
+                out_dir / "model.so",
+            ],
+            check=True,
+        )
+
+    key = cache.digest(rtlil_text, repr(binary.version()), cache.compiler_id(), *flags)
+    return cache.stage("cxxrtl-model", key, produce).dir / "model.so"
+
+
+class Model:
+    """
+    An elaborated design compiled with CXXRTL and driven through its C API.
+
+    Signals of the original design are found by the names the RTLIL backend
+    gave them, so procedures written for the Python simulator can read and
+    drive them unchanged.  Only the sync domain's clock is driven.
+    """
+
+    _lib: ctypes.CDLL
+    _handle: Optional[int]
+    _names: SignalDict
+    _objects: dict[str, list[_Object]]
+    _clk: Signal
+    _dirty: bool
+
+    def __init__(
+        self, fragment: Fragment, *, ports: list[Signal], optimize: bool = True
+    ):
+        prepared = fragment.prepare(ports=ports)
+        rtlil_text, self._names = rtlil.convert_fragment(prepared, "top")
+        self._lib = _load(_build(rtlil_text, optimize=optimize))
+        self._handle = self._lib.cxxrtl_create(self._lib.cxxrtl_design_create())
+        self._objects = {}
+        self._clk = prepared.domains["sync"].clk
+        self._dirty = True
+
+    @classmethod
+    def of(cls, dut: Any, fragment: Fragment, **kwargs: Any) -> Self:
+        ports: list[Signal] = []
+        for _, _, value in dut.signature.flatten(dut):
+            ports.append(Value.cast(value))
+        return cls(fragment, ports=ports, **kwargs)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: Any):
+        self.close()
+
+    def close(self):
+        if self._handle is not None:
+            self._lib.cxxrtl_destroy(self._handle)
+            self._handle = None
+
+    def _parts(self, signal: Signal) -> list[_Object]:
+        hierarchy = self._names.get(signal)
+        assert hierarchy is not None, f"{signal!r} isn't in the design"
+        name = " ".join(hierarchy[1:])
+        parts = self._objects.get(name)
+        if parts is None:
+            count = c_size_t()
+            objects = self._lib.cxxrtl_get_parts(
+                self._handle, name.encode(), ctypes.byref(count)
+            )
+            assert objects, f"CXXRTL has no debug item for {name!r}"
+            parts = self._objects[name] = [objects[ix] for ix in range(count.value)]
+        return parts
+
+    def settle(self):
+        self._lib.cxxrtl_step(self._handle)
+        self._dirty = False
+
+    def get(self, signal: Signal) -> int:
+        if self._dirty:
+            self.settle()
+        value = 0
+        for part in self._parts(signal):
+            if part.type == CXXRTL_OUTLINE:
+                self._lib.cxxrtl_outline_eval(part.outline)
+            chunks = (part.width + 31) // 32
+            for ix in range(chunks):
+                value |= part.curr[ix] << (part.lsb_at + 32 * ix)
+        return value
+
+    def eval(self, value: Value) -> int:
+        """
+        Reads a signal, or a simple unsigned expression over them; the C API
+        can only see signals, so anything more is evaluated here.
+        """
+        match value:
+            case Signal():
+                return self.get(value)
+            case Const():
+                return value.value & ((1 << len(value)) - 1)
+            case Slice():
+                return (self.eval(value.value) >> value.start) & (
+                    (1 << (value.stop - value.start)) - 1
+                )
+            case Cat():
+                result = 0
+                offset = 0
+                for part in value.parts:
+                    result |= self.eval(part) << offset
+                    offset += len(part)
+                return result
+            case Operator(operator="~", operands=[a]):
+                return ~self.eval(a) & ((1 << len(a)) - 1)
+            case Operator(operator="&", operands=[a, b]):
+                return self.eval(a) & self.eval(b)
+            case Operator(operator="|", operands=[a, b]):
+                return self.eval(a) | self.eval(b)
+            case Operator(operator="^", operands=[a, b]):
+                return self.eval(a) ^ self.eval(b)
+            case Operator(operator="==", operands=[a, b]):
+                return int(self.eval(a) == self.eval(b))
+            case Operator(operator="!=", operands=[a, b]):
+                return int(self.eval(a) != self.eval(b))
+            case _:
+                raise TypeError(f"the CXXRTL backend can't evaluate {value!r}")
+
+    def set(self, signal: Signal, value: int):
+        for part in self._parts(signal):
+            # Wires take their next value; inputs are plain values.
+            target = part.next if part.next else part.curr
+            chunk = value >> part.lsb_at
+            for ix in range((part.width + 31) // 32):
+                bits = min(32, part.width - 32 * ix)
+                target[ix] = (chunk >> (32 * ix)) & ((1 << bits) - 1)
+        self._dirty = True
+
+    def tick(self):
+        self.set(self._clk, 1)
+        self.settle()
+        self.set(self._clk, 0)
+        self.settle()
+
+    def run(self, procedure: Any, *, period: float):
+        """
+        Runs a sync process as sim.TestCase would under the Python simulator,
+        with a clock of the given period: None ticks the clock, Delay() ticks
+        it for as long as the delay, Settle() settles, assignments of
+        constants to signals drive them, and yielding a value reads it.
+        Reads always see settled values.
+        """
+        # Like add_sync_process, start after the first clock edge.
+        self.tick()
+        response = None
+        while True:
+            try:
+                command = procedure.send(response)
+            except StopIteration:
+                return
+            response = None
+            match command:
+                case None:
+                    self.tick()
+                case Settle():
+                    self.settle()
+                case Delay(interval=None):
+                    # A bare Delay() settles, like Settle() does.
+                    self.settle()
+                case Delay(interval=float() as interval):
+                    for _ in range(round(interval / period)):
+                        self.tick()
+                case Assign(lhs=Signal() as lhs, rhs=Const() as rhs):
+                    self.set(lhs, rhs.value)
+                case Value():
+                    response = self.eval(command)
+                case _:
+                    raise TypeError(
+                        f"the CXXRTL backend can't run {command!r}; it takes None,"
+                        " Settle(), Delay(), values to read, and constants"
+                        " assigned to signals"
+                    )
@@ -1,21 +1,31 @@
 import os
-import platform as pyplatform
+import re
+import shutil
 import subprocess
+import sys
+import time
 from argparse import ArgumentParser, Namespace
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
 from pathlib import Path
-from typing import cast
+from typing import NamedTuple
 
 from amaranth import Elaboratable, Signal
-from amaranth._toolchain.yosys import YosysBinary, find_yosys
 from amaranth.back import rtlil
 
+from . import cache, cxxrtl
 from .base import path
 from .build import build_top
 from .platform import Platform
+from .platform import cxxsim as CxxsimPlatform
+from .rtl import Top
+from .scenario import Scenario
 
 __all__ = ["add_main_arguments"]
 
+# Ours, the iCEBreaker's and the OrangeCrab's.
+_SWEEP_CLOCKS = [3_000_000, 12_000_000, 48_000_000]
+
 
 class _Optimize(Enum):
     none = "none"
@@ -51,97 +61,287 @@ def add_main_arguments(parser: ArgumentParser):
         help="build with optimizations (default: rtl)",
         default=_Optimize.rtl,
     )
+    parser.add_argument(
+        "-s",
+        "--scenario",
+        type=Path,
+        action="append",
+        dest="scenarios",
+        help="run the scenarios in this file; may be repeated "
+        "(default: cxxsim/scenarios/*.scn)",
+    )
+    parser.add_argument(
+        "--speed",
+        type=int,
+        choices=Top.VALID_SPEEDS,
+        action="append",
+        dest="speeds",
+        help=f"I2C bus speed to build at; may be repeated with --sweep "
+        f"(default: {Top.DEFAULT_SPEED}, or all with --sweep)",
+    )
+    parser.add_argument(
+        "--clock",
+        type=int,
+        action="append",
+        dest="clocks",
+        metavar="HZ",
+        help="system clock frequency to build at; may be repeated with --sweep "
+        f"(default: {CxxsimPlatform.DEFAULT_CLK_FREQUENCY}, or "
+        f"{', '.join(map(str, _SWEEP_CLOCKS))} with --sweep)",
+    )
+    parser.add_argument(
+        "--sweep",
+        action="store_true",
+        help="build and run every speed and clock combination concurrently, "
+        "and tabulate the results",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="with --sweep, run this many configurations at once "
+        "(default: one per core)",
+    )
     parser.add_argument(
         "-v",
         "--vcd",
         action="store_true",
-        help="output a VCD file",
+        help="output a VCD file, written as the simulation runs",
+    )
+    parser.add_argument(
+        "--vcd-signals",
+        metavar="PATTERN,...",
+        help="only trace signals whose dotted names match these patterns, "
+        "e.g. 'top.scl_*,top.framer.*' (default: all)",
+    )
+    parser.add_argument(
+        "--vcd-window",
+        metavar="N..M",
+        help="only trace cycles N to M, counted across all scenarios; either "
+        "end may be left off (default: all)",
     )
 
 
 def main(args: Namespace):
-    if (
-        os.environ.get("VIRTUAL_ENV") == "OSS Cad Suite"
-        and pyplatform.system() == "Windows"
-    ):
-        # NOTE: osscad's yosys-config (used by _SystemYosys.data_dir) on Windows
-        # (a) doesn't execute as-is (bash script, can't popen directly from
-        # native Windows Python), and (b) its answers are wrong anyway (!!!).
-        os.environ["AMARANTH_USE_YOSYS"] = "builtin"
-
-    yosys = cast(YosysBinary, find_yosys(lambda ver: ver >= (0, 10)))
-
-    platform = Platform["cxxsim"]
-    design = build_top(args, platform)
-
-    cxxrtl_cc_path = path("build/i2c_obs.cc")
-    _cxxrtl_convert_with_header(
-        yosys,
-        cxxrtl_cc_path,
-        design,
-        platform,
-        black_boxes={},
-        ports=design.ports(platform),
-    )
-
-    cc_o_paths = {
-        path("cxxsim/main.cc"): "build/main.o",
-    }
-
-    for cc_path, o_path in cc_o_paths.items():
+    if args.sweep:
+        speeds = args.speeds or Top.VALID_SPEEDS
+        clocks = args.clocks or _SWEEP_CLOCKS
+        sys.exit(not _sweep(args, speeds, clocks))
+
+    speeds = args.speeds or [Top.DEFAULT_SPEED]
+    clocks = args.clocks or [CxxsimPlatform.DEFAULT_CLK_FREQUENCY]
+    assert (
+        len(speeds) == 1 and len(clocks) == 1
+    ), "more than one --speed or --clock needs --sweep"
+
+    built = _build(args, speed=speeds[0], clock=clocks[0])
+    print(f"rtlil: {built.rtlil_seconds:.2f}s")
+    for stage in built.stages:
+        print(stage)
+
+    exe_o_path = path("build/cxxsim")
+    shutil.copy2(built.exe, exe_o_path)
+
+    if not args.compile:
+        cmd: list[str | Path] = [exe_o_path]
+        if args.vcd:
+            cmd += ["--vcd", "cxxsim.vcd"]
+            if args.vcd_signals:
+                cmd += ["--vcd-signals", args.vcd_signals]
+            if args.vcd_window:
+                cmd += ["--vcd-window", args.vcd_window]
+        cmd += _scenario_paths(args)
+        subprocess.run(cmd, cwd=path("cxxsim"), check=True)
+
+
+def _scenario_paths(args: Namespace) -> list[Path]:
+    scenario_paths = args.scenarios or sorted(path("cxxsim").glob("scenarios/*.scn"))
+    # The harness's own parser is terse; find mistakes here first.
+    for scenario_path in scenario_paths:
+        Scenario.load(scenario_path)
+    return [p.absolute() for p in scenario_paths]
+
+
+class _Built(NamedTuple):
+    exe: Path
+    rtlil_seconds: float
+    stages: list[cache.Stage]
+
+
+def _build(args: Namespace, *, speed: int, clock: int) -> _Built:
+    yosys = cxxrtl.yosys()
+
+    platform = CxxsimPlatform(clk_frequency=clock)
+    design = build_top(Namespace(**{**vars(args), "speed": speed}), platform)
+
+    started = time.perf_counter()
+    rtlil_text = _rtlil(design, platform, black_boxes={}, ports=design.ports(platform))
+    rtlil_seconds = time.perf_counter() - started
+    stages: list[cache.Stage] = []
+
+    # Each stage is keyed by everything that goes into it, so e.g. editing
+    # main.cc only recompiles main.cc and relinks.
+    flags = ["-O3"] if args.optimize.opt_rtl else []
+    includes = [f"-I{include}" for include in cxxrtl.include_dirs(yosys)]
+    toolchain = [repr(yosys.version()), cache.compiler_id(), *flags]
+
+    def write_design(out_dir: Path):
+        cxxrtl.write_cxxrtl(yosys, out_dir / "i2c_obs.cc", rtlil_text, header=True)
+
+    design_src = cache.stage(
+        "cxxsim-design",
+        cache.digest(rtlil_text, repr(yosys.version())),
+        write_design,
+    )
+    stages.append(design_src)
+
+    def compile_design(out_dir: Path):
+        _compile(flags, includes, design_src.dir / "i2c_obs.cc", out_dir / "i2c_obs.o")
+
+    design_o = cache.stage(
+        "cxxsim-design-o",
+        cache.digest(design_src.key, *toolchain),
+        compile_design,
+    )
+    stages.append(design_o)
+
+    main_cc_path = path("cxxsim/main.cc")
+
+    def compile_main(out_dir: Path):
+        _compile(
+            [*flags, f"-I{design_src.dir}"], includes, main_cc_path, out_dir / "main.o"
+        )
+
+    main_o = cache.stage(
+        "cxxsim-main-o",
+        cache.digest(
+            main_cc_path.read_bytes(),
+            (design_src.dir / "i2c_obs.h").read_bytes(),
+            *toolchain,
+        ),
+        compile_main,
+    )
+    stages.append(main_o)
+
+    def link(out_dir: Path):
         subprocess.run(
             [
                 "c++",
-                *(["-O3"] if args.optimize.opt_rtl else []),
-                "-I" + str(path(".")),
-                "-I" + str(cast(Path, yosys.data_dir()) / "include"),
-                "-c",
-                cc_path,
+                *flags,
+                design_o.dir / "i2c_obs.o",
+                main_o.dir / "main.o",
                 "-o",
-                o_path,
+                out_dir / "cxxsim",
             ],
             check=True,
         )
 
-    exe_o_path = path("build/cxxsim")
+    exe = cache.stage(
+        "cxxsim-link", cache.digest(design_o.key, main_o.key, *toolchain), link
+    )
+    stages.append(exe)
+
+    return _Built(exe.dir / "cxxsim", rtlil_seconds, stages)
+
+
+class _SweepResult(NamedTuple):
+    speed: int
+    clock: int
+    passed: bool
+    cycles: int
+    seconds: float
+    built_in: float
+    cached: bool
+    output: str
+
+
+# The harness's last line, e.g. "3 scenarios, 0 failed, 159 cycles in 0.000042s".
+_SUMMARY = re.compile(r"(\d+) scenarios, (\d+) failed, (\d+) cycles in ([\d.e+-]+)s")
+
+
+def _sweep_one(
+    args: Namespace, speed: int, clock: int, scenario_paths: list[Path]
+) -> _SweepResult:
+    built = _build(args, speed=speed, clock=clock)
+    built_in = built.rtlil_seconds + sum(stage.elapsed for stage in built.stages)
+    cached = all(stage.hit for stage in built.stages)
+    result = subprocess.run(
+        [built.exe, *scenario_paths],
+        cwd=path("cxxsim"),
+        capture_output=True,
+        text=True,
+    )
+    output = result.stdout + result.stderr
+    summary = _SUMMARY.search(result.stdout)
+    if summary is None:
+        return _SweepResult(speed, clock, False, 0, 0.0, built_in, cached, output)
+    return _SweepResult(
+        speed,
+        clock,
+        result.returncode == 0,
+        int(summary[3]),
+        float(summary[4]),
+        built_in,
+        cached,
+        output,
+    )
+
+
+def _sweep(args: Namespace, speeds: list[int], clocks: list[int]) -> bool:
+    """
+    Builds and runs the scenarios against every speed and clock combination
+    in a pool of processes, then prints a table of how each went.
+    """
+    scenario_paths = _scenario_paths(args)
+    configs = [(speed, clock) for speed in speeds for clock in clocks]
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        results = list(
+            executor.map(
+                _sweep_one,
+                *zip(*((args, s, c, scenario_paths) for s, c in configs)),
+            )
+        )
+
+    for r in results:
+        if not r.passed:
+            print(f"--- {_si(r.speed)}Hz at {_si(r.clock)}Hz:")
+            print(r.output.rstrip())
+    print(
+        f"{'speed':>8}  {'clock':>8}  {'result':6}  {'cycles':>10}  "
+        f"{'cycles/s':>9}  build"
+    )
+    for r in results:
+        rate = f"{_si(r.cycles / r.seconds)}" if r.seconds else "-"
+        build = "cached" if r.cached else f"{r.built_in:.1f}s"
+        print(
+            f"{_si(r.speed) + 'Hz':>8}  {_si(r.clock) + 'Hz':>8}  "
+            f"{'pass' if r.passed else 'FAIL':6}  {r.cycles:>10,}  {rate:>9}  {build}"
+        )
+    return all(r.passed for r in results)
+
+
+def _si(value: float) -> str:
+    for factor, prefix in [(1e9, "G"), (1e6, "M"), (1e3, "k")]:
+        if value >= factor:
+            return f"{value / factor:.3g}{prefix}"
+    return f"{value:.3g}"
+
+
+def _compile(flags: list[str], includes: list[str], cc_path: Path, o_path: Path):
     subprocess.run(
-        [
-            "c++",
-            *(["-O3"] if args.optimize.opt_rtl else []),
-            *cc_o_paths.values(),
-            "-o",
-            exe_o_path,
-        ],
+        ["c++", *flags, *includes, "-c", cc_path, "-o", o_path],
         check=True,
     )
 
-    if not args.compile:
-        cmd = [exe_o_path]
-        if args.vcd:
-            cmd += ["--vcd"]
-        subprocess.run(cmd, cwd=path("cxxsim"), check=True)
 
-
-def _cxxrtl_convert_with_header(
-    yosys: YosysBinary,
-    cc_out: Path,
+def _rtlil(
     design: Elaboratable,
     platform: Platform,
     *,
     black_boxes: dict[str, str],
     ports: list[Signal],
-) -> None:
-    if cc_out.is_absolute():
-        try:
-            cc_out = cc_out.relative_to(Path.cwd())
-        except ValueError:
-            raise AssertionError(
-                "cc_out must be relative to cwd for builtin-yosys to write to it"
-            )
+) -> str:
     rtlil_text = rtlil.convert(design, platform=platform, ports=ports)
-    script = []
-    for box_source in black_boxes.values():
-        script.append(f"read_rtlil <<rtlil\n{box_source}\nrtlil")
-    script.append(f"read_rtlil <<rtlil\n{rtlil_text}\nrtlil")
-    script.append(f"write_cxxrtl -header {cc_out}")
-    yosys.run(["-q", "-"], "\n".join(script))
+    # RTLIL modules can simply be concatenated.
+    return "\n".join([*black_boxes.values(), rtlil_text])
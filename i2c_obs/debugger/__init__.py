@@ -0,0 +1,295 @@
+import os
+import sys
+import threading
+import time
+from argparse import ArgumentParser, Namespace
+from contextlib import nullcontext
+from typing import Callable, Optional
+
+from serial import Serial
+
+from ..rtl.uart import symbols
+from .capture import CaptureWriter, read_capture
+from .multi import Monitor
+from .parser import Decoder, Event, SampleEvent, TransactionEvent
+from .telemetry import Telemetry
+from .traffic import Traffic
+
+__all__ = ["add_main_arguments", "synthetic_stream"]
+
+
+def add_main_arguments(parser: ArgumentParser):
+    MAC_ICEBREAKER = "/dev/tty.usbserial-ibEt3maU1"
+
+    parser.set_defaults(func=main)
+    parser.add_argument(
+        "uart",
+        nargs="*",
+        default=[MAC_ICEBREAKER if os.path.exists(MAC_ICEBREAKER) else "/dev/ttyUSB1"],
+        help="UART interface(s)",
+    )
+    parser.add_argument(
+        "-b",
+        "--baud",
+        type=int,
+        help=f"UART baud rate (default: {symbols.DEFAULT_BAUD})",
+        default=symbols.DEFAULT_BAUD,
+    )
+    parser.add_argument(
+        "-m",
+        "--multi",
+        action="store_true",
+        help="monitor every given UART at once, tagging events by port "
+        "(not on Windows)",
+    )
+    parser.add_argument(
+        "-c",
+        "--capture",
+        metavar="FILE",
+        help="append everything received, with host timestamps, to a capture file",
+    )
+    parser.add_argument(
+        "-r",
+        "--replay",
+        metavar="FILE",
+        help="decode a capture file instead of a UART",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="don't print events (useful to time --replay)",
+    )
+    parser.add_argument(
+        "-s",
+        "--stats",
+        action="store_true",
+        help="report ingestion throughput every second",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="compare per-byte and bulk ingestion on a synthetic stream and exit",
+    )
+
+
+class _Throughput:
+    _bytes: int
+    _events: int
+    _started: float
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._bytes = 0
+        self._events = 0
+        self._started = time.perf_counter()
+
+    def add(self, n_bytes: int, n_events: int):
+        self._bytes += n_bytes
+        self._events += n_events
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def __str__(self):
+        elapsed = self.elapsed or 1e-9
+        return (
+            f"{self._bytes:,} bytes, {self._events:,} events in {elapsed:.3f}s "
+            f"({self._bytes / elapsed:,.0f} B/s, {self._events / elapsed:,.0f} events/s)"
+        )
+
+
+class _Output:
+    """
+    Prints events as they're decoded, except for telemetry samples and I2C
+    transactions, which are summarised per port at most once a second instead.
+    """
+
+    _quiet: bool
+    _telemetry: dict[str, Telemetry]
+    _traffic: dict[str, Traffic]
+    _last_summary: float
+
+    def __init__(self, *, quiet: bool):
+        self._quiet = quiet
+        self._telemetry = {}
+        self._traffic = {}
+        self._last_summary = 0.0
+
+    def events(self, events: list[Event], *, now: float, tag: Optional[str] = None):
+        prefix = "*" if tag is None else f"[{tag}] *"
+        for event in events:
+            if isinstance(event, SampleEvent):
+                telemetry = self._telemetry.get(tag or "")
+                if telemetry is None:
+                    telemetry = self._telemetry[tag or ""] = Telemetry()
+                telemetry.add(event, now)
+            elif isinstance(event, TransactionEvent):
+                traffic = self._traffic.get(tag or "")
+                if traffic is None:
+                    traffic = self._traffic[tag or ""] = Traffic()
+                traffic.add(event)
+            elif not self._quiet:
+                print(prefix, event)
+        if now - self._last_summary >= 1.0:
+            self.summarise()
+            self._last_summary = now
+
+    def summarise(self):
+        if self._quiet:
+            return
+        for summaries in [self._telemetry, self._traffic]:
+            for tag, summary in summaries.items():
+                print(f"[{tag}] {summary}" if tag else summary)
+
+
+def main(args: Namespace):
+    if args.benchmark:
+        _benchmark()
+        return
+
+    if args.replay:
+        _main_replay(args)
+        return
+
+    if args.multi:
+        _main_multi(args)
+        return
+
+    if len(args.uart) != 1:
+        sys.exit("monitoring more than one UART needs --multi")
+
+    try:
+        # Block for the first byte only, then take whatever else has arrived in
+        # the same read so a burst is one syscall and one feed.
+        with Serial(args.uart[0], args.baud) as ser, _capture(args) as capture:
+            parser = Decoder()
+            output = _Output(quiet=args.quiet)
+            throughput = _Throughput()
+            while True:
+                data = ser.read(ser.in_waiting or 1)
+                if capture is not None:
+                    capture.write(data)
+                events = parser.feed(data)
+                output.events(events, now=time.monotonic())
+                if args.stats:
+                    throughput.add(len(data), len(events))
+                    if throughput.elapsed >= 1.0:
+                        print("#", throughput, file=sys.stderr)
+                        throughput.reset()
+    except KeyboardInterrupt:
+        pass
+
+
+def _main_multi(args: Namespace):
+    if os.name != "posix":
+        sys.exit("--multi waits on the ports' file descriptors, so needs POSIX")
+    ports = [Serial(uart, args.baud, timeout=0) for uart in args.uart]
+    capture = CaptureWriter(args.capture) if args.capture else None
+    monitor = Monitor(ports, capture=capture)
+    try:
+        output = _Output(quiet=args.quiet)
+        throughput = _Throughput()
+        bytes_read = 0
+        while monitor.open_ports:
+            events = monitor.poll(1.0)
+            now = time.monotonic()
+            for port, event in events:
+                output.events([event], now=now, tag=port)
+            if args.stats:
+                throughput.add(monitor.bytes_read - bytes_read, len(events))
+                bytes_read = monitor.bytes_read
+                if throughput.elapsed >= 1.0:
+                    print("#", throughput, file=sys.stderr)
+                    throughput.reset()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.close()
+        for ser in ports:
+            ser.close()
+        if capture is not None:
+            capture.close()
+
+
+def _main_replay(args: Namespace):
+    decoders: dict[int, Decoder] = {}
+    output = _Output(quiet=args.quiet)
+    throughput = _Throughput()
+    for timestamp_ns, channel, data in read_capture(args.replay):
+        decoder = decoders.get(channel)
+        if decoder is None:
+            decoder = decoders[channel] = Decoder()
+        events = decoder.feed(data)
+        throughput.add(len(data), len(events))
+        # Telemetry rates follow the capture's clock, not how fast we replay.
+        output.events(
+            events, now=timestamp_ns / 1e9, tag=f"#{channel}" if args.multi else None
+        )
+    output.summarise()
+    elapsed = throughput.elapsed or 1e-9
+    size = os.path.getsize(args.replay)
+    reports = sum(decoder.frames for decoder in decoders.values())
+    print(
+        f"# replayed {size / 1e6:,.2f} MB in {elapsed:.3f}s "
+        f"({size / 1e6 / elapsed:,.1f} MB/s, {reports / elapsed:,.0f} reports/s): "
+        f"{throughput}",
+        file=sys.stderr,
+    )
+
+
+def _capture(args: Namespace) -> CaptureWriter | nullcontext[None]:
+    if args.capture:
+        return CaptureWriter(args.capture)
+    return nullcontext()
+
+
+def synthetic_stream(sessions: int) -> bytes:
+    """
+    What an observer sends for sessions complete stretching sessions, each
+    a start, a measurement and a finish; for tests and benchmarks.
+    """
+    session = b"".join(
+        [
+            symbols.encode(symbols.STRETCH_START, 1_000, 12_000_000),
+            symbols.encode(symbols.STRETCH_MEASURED, 1_234, 567, 1_235, 6_036),
+            symbols.encode(symbols.STRETCH_FINISH, 12_006_036),
+        ]
+    )
+    return session * sessions
+
+
+def _benchmark():
+    data = synthetic_stream(50_000)
+
+    def per_byte(read: Callable[[int], bytes], parser: Decoder) -> int:
+        events = 0
+        while b := read(1):
+            events += len(parser.feed(b))
+        return events
+
+    def bulk(read: Callable[[int], bytes], parser: Decoder) -> int:
+        events = 0
+        while b := read(65536):
+            events += len(parser.feed(b))
+        return events
+
+    for name, ingest in [("per-byte", per_byte), ("bulk", bulk)]:
+        # Go through a real pipe so the syscall cost of each read is counted.
+        rfd, wfd = os.pipe()
+
+        def writer():
+            with os.fdopen(wfd, "wb") as f:
+                f.write(data)
+
+        thread = threading.Thread(target=writer)
+        throughput = _Throughput()
+        thread.start()
+        events = ingest(lambda n: os.read(rfd, n), Decoder())
+        throughput.add(len(data), events)
+        thread.join()
+        os.close(rfd)
+        print(f"{name:>8}: {throughput}")
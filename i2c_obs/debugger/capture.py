@@ -0,0 +1,143 @@
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+__all__ = ["CaptureWriter", "read_capture", "CaptureError"]
+
+# A capture is MAGIC followed by records, each one a header then the bytes
+# received in one read:
+#
+#   u64 host timestamp (ns since the epoch), u8 channel, u32 length, data
+#
+# Channels number the UARTs in the order they were given to the debugger.
+# Everything is little-endian and the file is only ever appended to, so a
+# capture cut short mid-record loses at most that record, which a writer
+# reopening it cuts off before appending.
+MAGIC = b"I2COBS\x00\x01"
+_RECORD = struct.Struct("<QBI")
+
+# How much, and for how long, a CaptureWriter holds records back by default.
+FLUSH_BYTES = 64 * 1024
+FLUSH_INTERVAL = 0.5
+
+
+class CaptureError(Exception):
+    pass
+
+
+class CaptureWriter:
+    """
+    Appends records to a capture, creating it if need be.
+
+    A capture cut short mid-record is truncated back to its last complete
+    record on open, so appending carries on from there. Records are buffered
+    and written out once flush_bytes have built up or flush_interval seconds
+    have passed since the last flush, whichever comes first, and on close.
+    """
+
+    _f: BinaryIO
+    _flush_bytes: int
+    _flush_interval: float
+    _unflushed: int
+    _flushed_at: float
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        flush_bytes: int = FLUSH_BYTES,
+        flush_interval: float = FLUSH_INTERVAL,
+    ):
+        self._f = open(path, "a+b", buffering=flush_bytes)
+        try:
+            size = os.fstat(self._f.fileno()).st_size
+            if size == 0:
+                self._f.write(MAGIC)
+                self._f.flush()
+            else:
+                with mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        if bytes(view[: len(MAGIC)]) != MAGIC:
+                            raise CaptureError(f"{path} is not an i2c_obs capture")
+                        end = len(MAGIC)
+                        for _, _, _, end in _records(view):
+                            pass
+                if end < size:
+                    self._f.truncate(end)
+        except BaseException:
+            self._f.close()
+            raise
+        self._flush_bytes = flush_bytes
+        self._flush_interval = flush_interval
+        self._unflushed = 0
+        self._flushed_at = time.monotonic()
+
+    def write(
+        self,
+        data: bytes | bytearray | memoryview,
+        *,
+        channel: int = 0,
+        timestamp_ns: Optional[int] = None,
+    ):
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        self._f.write(_RECORD.pack(timestamp_ns, channel, len(data)))
+        self._f.write(data)
+        self._unflushed += _RECORD.size + len(data)
+        if (
+            self._unflushed >= self._flush_bytes
+            or time.monotonic() - self._flushed_at >= self._flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        self._f.flush()
+        self._unflushed = 0
+        self._flushed_at = time.monotonic()
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *exc: object):
+        self.close()
+
+
+def _records(view: memoryview) -> Iterator[tuple[int, int, int, int]]:
+    # Yields (timestamp_ns, channel, start, end) for every complete record,
+    # where data is view[start:end]; the caller has checked MAGIC.
+    offset = len(MAGIC)
+    while offset + _RECORD.size <= len(view):
+        timestamp_ns, channel, length = _RECORD.unpack_from(view, offset)
+        offset += _RECORD.size
+        if offset + length > len(view):
+            return
+        yield timestamp_ns, channel, offset, offset + length
+        offset += length
+
+
+def read_capture(path: str | Path) -> Iterator[tuple[int, int, memoryview]]:
+    """
+    Yields (timestamp_ns, channel, data) for every complete record.
+
+    The capture is memory-mapped and data is a view into the mapping, so it
+    is only valid until the next record is requested.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise CaptureError(f"{path} is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                if bytes(view[: len(MAGIC)]) != MAGIC:
+                    raise CaptureError(f"{path} is not an i2c_obs capture")
+                for timestamp_ns, channel, start, end in _records(view):
+                    data = view[start:end]
+                    try:
+                        yield timestamp_ns, channel, data
+                    finally:
+                        data.release()
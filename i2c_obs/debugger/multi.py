@@ -0,0 +1,66 @@
+import os
+import selectors
+from typing import Optional
+
+from serial import Serial
+
+from .capture import CaptureWriter
+from .parser import Decoder, Event
+
+__all__ = ["Monitor"]
+
+
+class Monitor:
+    """
+    Decodes several observers at once from a single thread.
+
+    Each port keeps its own Decoder; poll() waits on all of them with one
+    selector and returns whatever events arrived, tagged with the port they
+    came from, in the order their reads completed.  If a capture is given,
+    everything read is appended to it with the port's index as its channel.
+
+    POSIX only: it selects on and reads from each port's file descriptor,
+    which Windows serial handles don't have.
+    """
+
+    _selector: selectors.BaseSelector
+    _capture: Optional[CaptureWriter]
+    _bytes_read: int
+
+    def __init__(self, ports: list[Serial], *, capture: Optional[CaptureWriter] = None):
+        self._selector = selectors.DefaultSelector()
+        self._capture = capture
+        self._bytes_read = 0
+        for channel, ser in enumerate(ports):
+            self._selector.register(
+                ser.fileno(), selectors.EVENT_READ, (ser, channel, Decoder())
+            )
+
+    @property
+    def bytes_read(self) -> int:
+        return self._bytes_read
+
+    @property
+    def open_ports(self) -> int:
+        return len(self._selector.get_map())
+
+    def poll(self, timeout: Optional[float] = None) -> list[tuple[str, Event]]:
+        events: list[tuple[str, Event]] = []
+        for key, _ in self._selector.select(timeout):
+            ser, channel, decoder = key.data
+            try:
+                data = os.read(key.fd, 65536)
+            except OSError:
+                data = b""
+            if not data:
+                # The board went away; keep watching the others.
+                self._selector.unregister(key.fd)
+                continue
+            self._bytes_read += len(data)
+            if self._capture is not None:
+                self._capture.write(data, channel=channel)
+            events += ((ser.port, event) for event in decoder.feed(data))
+        return events
+
+    def close(self):
+        self._selector.close()
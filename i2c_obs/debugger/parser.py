@@ -0,0 +1,454 @@
+import math
+import struct
+from abc import ABC
+from enum import Enum
+from typing import Optional
+
+from ..rtl.uart import symbols
+
+__all__ = [
+    "State",
+    "Event",
+    "TimedEvent",
+    "StartTrainingEvent",
+    "FinishTrainingEvent",
+    "StartStretchingEvent",
+    "FinishStretchingEvent",
+    "SampleEvent",
+    "HistogramEvent",
+    "TransactionEvent",
+    "UnhandledEvent",
+    "Decoder",
+]
+
+
+class State(Enum):
+    IDLE = 0
+    TRAINING = 1
+    STRETCHING = 2
+
+
+class Event(ABC):
+    pass
+
+
+class TimedEvent(Event):
+    """
+    An event the observer timestamped: timestamp is its free-running counter,
+    in system clock cycles, and clock the frequency it last reported, if any.
+    The counter wraps (after about 68 days at 48MHz), taking at back to zero.
+    """
+
+    timestamp: int
+    clock: Optional[int]
+
+    def __init__(self, timestamp: int, clock: Optional[int]):
+        super().__init__()
+        self.timestamp = timestamp
+        self.clock = clock
+
+    @property
+    def at(self) -> Optional[float]:
+        """Seconds since the observer's counter started, if the clock is known."""
+        if self.clock is None:
+            return None
+        return self.timestamp / self.clock
+
+    def _duration(self, cycles: int) -> str:
+        return _duration(cycles, self.clock)
+
+    def _when(self) -> str:
+        at = self.at
+        return f"[@{self.timestamp:,}]" if at is None else f"[{at:.6f}s]"
+
+
+class StartTrainingEvent(TimedEvent):
+    def __str__(self):
+        return f"{self._when()} start link training"
+
+
+class FinishTrainingEvent(TimedEvent):
+    _measurements: list[int]
+    training: Optional[int]
+
+    def __init__(
+        self,
+        measurements: list[int],
+        timestamp: int,
+        clock: Optional[int],
+        training: Optional[int] = None,
+    ):
+        super().__init__(timestamp, clock)
+        self._measurements = measurements
+        self.training = training
+
+    def __str__(self):
+        tLOW_0 = self._measurements[0]
+        tHIGH_0 = self._measurements[1]
+        tLOW_1 = self._measurements[2]
+        tCYCLE = tLOW_0 + tHIGH_0
+
+        lines = [
+            f"{self._when()} finish link training",
+            f"raw measurements: {self._measurements!r}",
+        ]
+        if self.training is not None:
+            lines.append(f"training took {self._duration(self.training)}")
+        if self.clock is None:
+            lines.append(f"tLOW_0+tHIGH_0 = {tCYCLE} cycles")
+        else:
+            clock = self.clock
+            lines += [
+                f"tLOW_0:   1/{clock//tLOW_0:,}s",
+                f"tHIGH_0:  1/{clock//tHIGH_0:,}s",
+                f"tLOW_1:   1/{clock//tLOW_1:,}s",
+                f"tLOW_0+tHIGH_0 = {clock//tCYCLE:,}Hz ({tCYCLE} cycles)",
+            ]
+        lines.append(f"Duty: {tHIGH_0 * 100 / tCYCLE:.1f}%")
+        return "\n".join(lines)
+
+
+class StartStretchingEvent(TimedEvent):
+    def __str__(self):
+        return f"{self._when()} start stretching"
+
+
+class FinishStretchingEvent(TimedEvent):
+    stretching: Optional[int]
+    # Whether it came while still training, so without any stretching.
+    mid_training: bool
+
+    def __init__(
+        self,
+        timestamp: int,
+        clock: Optional[int],
+        stretching: Optional[int] = None,
+        *,
+        mid_training: bool = False,
+    ):
+        super().__init__(timestamp, clock)
+        self.stretching = stretching
+        self.mid_training = mid_training
+
+    def __str__(self):
+        s = f"{self._when()} finish stretching"
+        if self.stretching is not None:
+            s += f" after {self._duration(self.stretching)}"
+        if self.mid_training:
+            s += " before training finished"
+        return s
+
+
+class SampleEvent(Event):
+    t_low: int
+    t_high: int
+    hold: int
+    dropped: int
+
+    def __init__(self, t_low: int, t_high: int, hold: int, dropped: int):
+        super().__init__()
+        self.t_low = t_low
+        self.t_high = t_high
+        self.hold = hold
+        self.dropped = dropped
+
+    def __str__(self):
+        s = f"tLOW {self.t_low} tHIGH {self.t_high} hold {self.hold}"
+        if self.dropped:
+            s += f" ({self.dropped} dropped before)"
+        return s
+
+
+class HistogramEvent(Event):
+    """
+    One dump of the on-FPGA SCL histogram.  bins[channel] maps bin index to
+    count, channel 0 being tLOW and 1 tHIGH; each bin is 2**shift cycles wide.
+    """
+
+    bins: tuple[dict[int, int], dict[int, int]]
+    shift: int
+    missed: int
+
+    def __init__(
+        self, bins: tuple[dict[int, int], dict[int, int]], shift: int, missed: int
+    ):
+        super().__init__()
+        self.bins = bins
+        self.shift = shift
+        self.missed = missed
+
+    def percentile(self, channel: int, p: float) -> Optional[int]:
+        """The bin containing the p'th percentile of the channel, if any."""
+        bins = self.bins[channel]
+        total = sum(bins.values())
+        if not total:
+            return None
+        target = max(1, math.ceil(total * p / 100))
+        seen = 0
+        for ix in sorted(bins):
+            seen += bins[ix]
+            if seen >= target:
+                return ix
+        raise AssertionError("unreachable")
+
+    def _range(self, ix: int) -> str:
+        lo = ix << self.shift
+        if ix == symbols.HISTOGRAM_BINS - 1:
+            return f">={lo}"
+        return f"{lo}-{((ix + 1) << self.shift) - 1}"
+
+    def __str__(self):
+        lines = [f"histogram ({1 << self.shift} cycles/bin, {self.missed} missed)"]
+        for channel, name in enumerate(["tLOW ", "tHIGH"]):
+            n = sum(self.bins[channel].values())
+            if not n:
+                lines.append(f"  {name} no edges")
+                continue
+            summary = " ".join(
+                f"{label} {self._range(ix)}"
+                for label, ix in [
+                    ("p50", self.percentile(channel, 50)),
+                    ("p90", self.percentile(channel, 90)),
+                    ("p99", self.percentile(channel, 99)),
+                    ("max", max(self.bins[channel])),
+                ]
+                if ix is not None
+            )
+            lines.append(f"  {name} n={n:,} {summary}")
+        return "\n".join(lines)
+
+
+class TransactionEvent(Event):
+    """
+    One I2C transaction decoded on the FPGA.  duration and held are in cycles
+    of clock, if it's known.
+    """
+
+    addr_rw: int
+    count: int
+    first: int
+    flags: int
+    duration: int
+    held: int
+    dropped: int
+    clock: Optional[int]
+
+    def __init__(
+        self,
+        addr_rw: int,
+        count: int,
+        first: int,
+        flags: int,
+        duration: int,
+        held: int,
+        dropped: int,
+        *,
+        clock: Optional[int] = None,
+    ):
+        super().__init__()
+        self.addr_rw = addr_rw
+        self.count = count
+        self.first = first
+        self.flags = flags
+        self.duration = duration
+        self.held = held
+        self.dropped = dropped
+        self.clock = clock
+
+    @property
+    def address(self) -> int:
+        return self.addr_rw >> 1
+
+    @property
+    def read(self) -> bool:
+        return bool(self.addr_rw & 1)
+
+    def __str__(self):
+        s = f"{self.address:#04x} {'R' if self.read else 'W'}"
+        if self.flags & symbols.I2C_ADDRESS_NACK:
+            s += " NACK"
+        else:
+            s += f" {self.count} byte{'' if self.count == 1 else 's'}"
+            if self.count:
+                s += f" ({self.first:#04x}{' ...' if self.count > 1 else ''})"
+            if self.flags & symbols.I2C_DATA_NACK:
+                s += " last NACKed"
+        s += f" in {_duration(self.duration, self.clock)}"
+        if self.held:
+            s += (
+                f", held {_duration(self.held, self.clock)}"
+                f" ({self.held * 100 / self.duration:.0f}%)"
+            )
+        if self.flags & symbols.I2C_REPEATED_START:
+            s += ", then repeated START"
+        if self.dropped:
+            s += f" ({self.dropped} dropped before)"
+        return s
+
+
+class UnhandledEvent(Event):
+    _state: State
+    _b: int
+
+    def __init__(self, state: State, b: int):
+        self._state = state
+        self._b = b
+
+    def __str__(self):
+        return f"unhandled data in {self._state}: {self._b!r}"
+
+
+def _duration(cycles: int, clock: Optional[int]) -> str:
+    if clock is None:
+        return f"{cycles:,} cycles"
+    return f"{cycles / clock:.6f}s"
+
+
+# Each field width's struct format.  struct has no 6-byte integer, so those
+# unpack as their low 4 bytes and high 2, and Decoder puts them back together.
+_FORMATS: dict[int, str] = {1: "B", 2: "H", 4: "I", 6: "IH"}
+
+
+class Decoder:
+    """
+    Decodes the framed report stream described in symbols.
+
+    Bytes are buffered until a whole frame has arrived.  A byte that can't
+    start a frame -- an unknown kind, an unexpected length, or a bad checksum
+    over what follows -- is reported as unhandled and skipped, so the decoder
+    resynchronises on the next good frame.
+    """
+
+    # kind -> (payload length, payload struct, where each 6-byte field's
+    # halves start in what the struct unpacks)
+    _LAYOUTS: dict[int, tuple[int, struct.Struct, tuple[int, ...]]] = {
+        kind: (
+            sum(widths),
+            struct.Struct("<" + "".join(_FORMATS[width] for width in widths)),
+            tuple(
+                ix + widths[:ix].count(6)
+                for ix, width in enumerate(widths)
+                if width == 6
+            ),
+        )
+        for kind, widths in symbols.FIELDS.items()
+    }
+
+    _state: State
+    _buf: bytearray
+    _frames: int
+    _bins: tuple[dict[int, int], dict[int, int]]
+    _clock: Optional[int]
+    _started_at: Optional[int]
+    _measured_at: Optional[int]
+
+    def __init__(self):
+        self._state = State.IDLE
+        self._buf = bytearray()
+        self._frames = 0
+        self._bins = ({}, {})
+        self._clock = None
+        self._started_at = None
+        self._measured_at = None
+
+    @property
+    def state(self) -> State:
+        return self._state
+
+    @property
+    def frames(self) -> int:
+        return self._frames
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[Event]:
+        events: list[Event] = []
+        buf = self._buf
+        buf += data
+        layouts = self._LAYOUTS
+        pos = 0
+        end = len(buf)
+        while pos < end:
+            kind = buf[pos]
+            layout = layouts.get(kind)
+            if layout is None:
+                events.append(UnhandledEvent(self._state, kind))
+                pos += 1
+                continue
+            if end - pos < 2:
+                break
+            length, payload, wide = layout
+            frame_end = pos + 2 + length + 1
+            if buf[pos + 1] != length or (
+                frame_end <= end and symbols.checksum(buf[pos:frame_end]) != 0
+            ):
+                events.append(UnhandledEvent(self._state, kind))
+                pos += 1
+                continue
+            if frame_end > end:
+                break
+            values = payload.unpack_from(buf, pos + 2)
+            if wide:
+                values = self._join_wide(values, wide)
+            self._frame(kind, values, events)
+            self._frames += 1
+            pos = frame_end
+        del buf[:pos]
+        return events
+
+    @staticmethod
+    def _join_wide(values: tuple[int, ...], wide: tuple[int, ...]) -> tuple[int, ...]:
+        joined = list(values)
+        # From the last, so the indices before it still hold.
+        for ix in reversed(wide):
+            joined[ix : ix + 2] = [joined[ix] | joined[ix + 1] << 32]
+        return tuple(joined)
+
+    def _frame(self, kind: int, values: tuple[int, ...], events: list[Event]):
+        match kind:
+            case symbols.STRETCH_START:
+                timestamp, self._clock = values
+                self._state = State.TRAINING
+                self._started_at = timestamp
+                self._measured_at = None
+                events.append(StartTrainingEvent(timestamp, self._clock))
+            case symbols.STRETCH_MEASURED:
+                *measurements, timestamp = values
+                training = self._since(self._started_at, timestamp)
+                self._state = State.STRETCHING
+                self._measured_at = timestamp
+                events.append(
+                    FinishTrainingEvent(measurements, timestamp, self._clock, training)
+                )
+                events.append(StartStretchingEvent(timestamp, self._clock))
+            case symbols.STRETCH_SAMPLE:
+                events.append(SampleEvent(*values))
+            case symbols.STRETCH_FINISH:
+                (timestamp,) = values
+                mid_training = self._state == State.TRAINING
+                stretching = self._since(self._measured_at, timestamp)
+                self._state = State.IDLE
+                self._started_at = None
+                self._measured_at = None
+                events.append(
+                    FinishStretchingEvent(
+                        timestamp, self._clock, stretching, mid_training=mid_training
+                    )
+                )
+            case symbols.HISTOGRAM_BIN:
+                channel, ix, count = values
+                if channel > 1:
+                    events.append(UnhandledEvent(self._state, kind))
+                    return
+                self._bins[channel][ix] = count
+            case symbols.HISTOGRAM_END:
+                bins, self._bins = self._bins, ({}, {})
+                events.append(HistogramEvent(bins, *values))
+            case symbols.I2C_TXN:
+                events.append(TransactionEvent(*values, clock=self._clock))
+            case _:
+                raise AssertionError(f"unhandled frame kind {kind:#x}")
+
+    @staticmethod
+    def _since(then: Optional[int], now: int) -> Optional[int]:
+        if then is None:
+            return None
+        return (now - then) % (1 << (symbols.TIMESTAMP_BYTES * 8))
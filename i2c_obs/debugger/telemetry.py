@@ -0,0 +1,77 @@
+from collections import deque
+
+from .parser import SampleEvent
+
+__all__ = ["Telemetry"]
+
+
+class Telemetry:
+    """
+    Rolling summary of streamed timing samples.
+
+    Keeps the samples that arrived in the last window seconds (by whatever
+    clock the caller passes in), and renders their rate, drop count and a
+    histogram of each timing.
+    """
+
+    BINS = 8
+    BAR_WIDTH = 40
+
+    _window: float
+    _samples: deque[tuple[float, SampleEvent]]
+    _dropped: int
+
+    def __init__(self, window: float = 5.0):
+        self._window = window
+        self._samples = deque()
+        self._dropped = 0
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def add(self, sample: SampleEvent, now: float):
+        self._samples.append((now, sample))
+        self._dropped += sample.dropped
+        while self._samples and self._samples[0][0] < now - self._window:
+            self._samples.popleft()
+
+    def rate(self) -> float:
+        if len(self._samples) < 2:
+            return 0.0
+        span = self._samples[-1][0] - self._samples[0][0]
+        return (len(self._samples) - 1) / span if span > 0 else 0.0
+
+    def __str__(self):
+        samples = [sample for _, sample in self._samples]
+        lines = [
+            f"telemetry: {self.rate():,.1f} samples/s over the last "
+            f"{self._window:g}s, {self._dropped:,} dropped in total"
+        ]
+        for name, values in [
+            ("tLOW", [s.t_low for s in samples]),
+            ("tHIGH", [s.t_high for s in samples]),
+            ("hold", [s.hold for s in samples]),
+        ]:
+            lines.append(f"  {name} (cycles):")
+            lines += _histogram(values, self.BINS, self.BAR_WIDTH)
+        return "\n".join(lines)
+
+
+def _histogram(values: list[int], bins: int, width: int) -> list[str]:
+    if not values:
+        return ["    (no samples)"]
+    lo, hi = min(values), max(values)
+    size = max(1, -(-(hi - lo + 1) // bins))
+    counts = [0] * bins
+    for value in values:
+        counts[(value - lo) // size] += 1
+    peak = max(counts)
+    lines: list[str] = []
+    for ix, count in enumerate(counts):
+        start = lo + ix * size
+        if start > hi:
+            break
+        bar = "#" * (count * width // peak) if peak else ""
+        lines.append(f"    {start:>6}-{start + size - 1:<6} {count:>8,} {bar}")
+    return lines
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+
+from . import synthetic_stream
+from .capture import CaptureError, CaptureWriter, read_capture
+from .parser import Decoder
+
+
+class TestCapture(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".cap")
+        os.close(fd)
+        os.unlink(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def test_round_trip(self):
+        stream = synthetic_stream(5)
+        chunks = [stream[i : i + 11] for i in range(0, len(stream), 11)]
+
+        with CaptureWriter(self.path) as capture:
+            for ix, chunk in enumerate(chunks[:3]):
+                capture.write(chunk, timestamp_ns=ix)
+        # Appending to an existing capture carries on where it left off.
+        with CaptureWriter(self.path) as capture:
+            for ix, chunk in enumerate(chunks[3:], start=3):
+                capture.write(chunk, channel=ix % 2, timestamp_ns=ix)
+
+        records = [
+            (timestamp_ns, channel, bytes(data))
+            for timestamp_ns, channel, data in read_capture(self.path)
+        ]
+        self.assertEqual(
+            records,
+            [(ix, ix % 2 if ix >= 3 else 0, chunk) for ix, chunk in enumerate(chunks)],
+        )
+
+        decoder = Decoder()
+        replayed = [
+            str(event)
+            for _, _, data in read_capture(self.path)
+            for event in decoder.feed(data)
+        ]
+        self.assertEqual(replayed, [str(event) for event in Decoder().feed(stream)])
+
+    def test_truncated(self):
+        with CaptureWriter(self.path) as capture:
+            capture.write(b"\xff\x01", timestamp_ns=1)
+            capture.write(b"\xfd\xfd\xfe", timestamp_ns=2)
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+
+        records = [(ts, bytes(data)) for ts, _, data in read_capture(self.path)]
+        self.assertEqual(records, [(1, b"\xff\x01")])
+
+    def test_not_a_capture(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a capture")
+        with self.assertRaises(CaptureError):
+            list(read_capture(self.path))
+        with self.assertRaises(CaptureError):
+            CaptureWriter(self.path)
+
+    def test_append_after_truncated(self):
+        with CaptureWriter(self.path) as capture:
+            capture.write(b"\xff\x01", timestamp_ns=1)
+            capture.write(b"\xfd\xfd\xfe", timestamp_ns=2)
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+
+        # The partial record is cut, not left to swallow the next one's header.
+        with CaptureWriter(self.path) as capture:
+            capture.write(b"\xfe", timestamp_ns=3)
+        records = [(ts, bytes(data)) for ts, _, data in read_capture(self.path)]
+        self.assertEqual(records, [(1, b"\xff\x01"), (3, b"\xfe")])
+
+    def test_buffered(self):
+        record = 13 + 4
+        with CaptureWriter(self.path, flush_bytes=3 * record) as capture:
+            for ix in range(2):
+                capture.write(b"\x00" * 4, timestamp_ns=ix)
+            self.assertEqual(list(read_capture(self.path)), [])
+            capture.write(b"\x00" * 4, timestamp_ns=2)
+            self.assertEqual(len(list(read_capture(self.path))), 3)
+            capture.write(b"\x00" * 4, timestamp_ns=3)
+        self.assertEqual(len(list(read_capture(self.path))), 4)
+
+        with CaptureWriter(self.path, flush_interval=0) as capture:
+            capture.write(b"\x00", timestamp_ns=4)
+            self.assertEqual(len(list(read_capture(self.path))), 5)
@@ -0,0 +1,65 @@
+import os
+import time
+import unittest
+
+from serial import Serial
+
+from . import synthetic_stream
+from .multi import Monitor
+from .parser import Decoder, Event
+
+N_PORTS = 32
+
+
+class TestMonitor(unittest.TestCase):
+    def setUp(self):
+        self.masters: list[int] = []
+        self.ports: list[Serial] = []
+        for _ in range(N_PORTS):
+            master, slave = os.openpty()
+            self.masters.append(master)
+            self.ports.append(Serial(os.ttyname(slave), timeout=0))
+            os.close(slave)
+
+    def tearDown(self):
+        for ser in self.ports:
+            ser.close()
+        for master in self.masters:
+            os.close(master)
+
+    def test_interleaved(self):
+        # Every port gets a different number of sessions, written in slices
+        # round-robin so the streams genuinely interleave.
+        streams = [synthetic_stream(ix % 3 + 1) for ix in range(N_PORTS)]
+        expected: dict[str, list[str]] = {}
+        actual: dict[str, list[str]] = {}
+        for ser, stream in zip(self.ports, streams):
+            assert ser.port is not None, "every port was opened by name"
+            expected[ser.port] = [str(e) for e in Decoder().feed(stream)]
+            actual[ser.port] = []
+
+        monitor = Monitor(self.ports)
+        offsets = [0] * N_PORTS
+        try:
+            while any(o < len(s) for o, s in zip(offsets, streams)):
+                for ix, (master, stream) in enumerate(zip(self.masters, streams)):
+                    os.write(master, stream[offsets[ix] : offsets[ix] + 7])
+                    offsets[ix] += 7
+                self._collect(monitor, actual, 0)
+
+            deadline = time.monotonic() + 5
+            while monitor.bytes_read < sum(len(s) for s in streams):
+                self.assertLess(
+                    time.monotonic(), deadline, "timed out waiting for data"
+                )
+                self._collect(monitor, actual, 0.1)
+        finally:
+            monitor.close()
+
+        self.assertEqual(actual, expected)
+        self.assertEqual(monitor.bytes_read, sum(len(s) for s in streams))
+
+    def _collect(self, monitor: Monitor, into: dict[str, list[str]], timeout: float):
+        events: list[tuple[str, Event]] = monitor.poll(timeout)
+        for port, event in events:
+            into[port].append(str(event))
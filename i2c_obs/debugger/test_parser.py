@@ -0,0 +1,152 @@
+import random
+import unittest
+
+from ..rtl.uart import symbols
+from . import synthetic_stream
+from .parser import (
+    Decoder,
+    FinishStretchingEvent,
+    FinishTrainingEvent,
+    HistogramEvent,
+    StartTrainingEvent,
+    State,
+    UnhandledEvent,
+)
+
+
+class TestDecoder(unittest.TestCase):
+    def test_session(self):
+        decoder = Decoder()
+        events = decoder.feed(synthetic_stream(1))
+        self.assertEqual(
+            [type(event).__name__ for event in events],
+            [
+                "StartTrainingEvent",
+                "FinishTrainingEvent",
+                "StartStretchingEvent",
+                "FinishStretchingEvent",
+            ],
+        )
+        self.assertIn("raw measurements: [1234, 567, 1235]", str(events[1]))
+        self.assertEqual(decoder.frames, 3)
+        self.assertEqual(decoder.state, State.IDLE)
+
+    def test_timestamps(self):
+        events = Decoder().feed(synthetic_stream(1))
+        start, measured, _, finish = events
+        assert isinstance(start, StartTrainingEvent)
+        assert isinstance(measured, FinishTrainingEvent)
+        assert isinstance(finish, FinishStretchingEvent)
+        self.assertEqual(start.clock, 12_000_000)
+        assert start.at is not None
+        self.assertAlmostEqual(start.at, 1_000 / 12e6)
+        self.assertEqual(measured.training, 5_036)
+        self.assertEqual(finish.stretching, 12_000_000)
+        self.assertIn("6,662Hz (1801 cycles)", str(measured))
+        self.assertIn("after 1.000000s", str(finish))
+
+    def test_timestamps_wrap(self):
+        wrap = 1 << (symbols.TIMESTAMP_BYTES * 8)
+        stream = b"".join(
+            [
+                symbols.encode(symbols.STRETCH_START, wrap - 10, 1_000_000),
+                symbols.encode(symbols.STRETCH_MEASURED, 1, 2, 3, 20),
+            ]
+        )
+        measured = Decoder().feed(stream)[1]
+        assert isinstance(measured, FinishTrainingEvent)
+        self.assertEqual(measured.training, 30)
+
+    def test_timestamps_joined_late(self):
+        # Without a STRETCH_START there's no clock and nothing to measure from.
+        events = Decoder().feed(symbols.encode(symbols.STRETCH_FINISH, 1_234))
+        (finish,) = events
+        assert isinstance(finish, FinishStretchingEvent)
+        self.assertIsNone(finish.at)
+        self.assertIsNone(finish.stretching)
+        self.assertEqual(str(finish), "[@1,234] finish stretching")
+
+    def test_finish_mid_training(self):
+        stream = b"".join(
+            [
+                symbols.encode(symbols.STRETCH_START, 1_000, 12_000_000),
+                symbols.encode(symbols.STRETCH_FINISH, 2_000),
+            ]
+        )
+        _, finish = Decoder().feed(stream)
+        assert isinstance(finish, FinishStretchingEvent)
+        self.assertTrue(finish.mid_training)
+        self.assertIsNone(finish.stretching)
+        self.assertTrue(
+            str(finish).endswith("finish stretching before training finished")
+        )
+
+    def test_bytes_per_report(self):
+        # The nibble encoding took up to 4 bytes per measurement plus a final
+        # marker: 13 bytes for a training report, before timestamps.
+        report = symbols.encode(symbols.STRETCH_MEASURED, 0xFFF, 0xFFF, 0xFFF, 0)
+        self.assertEqual(len(report) - symbols.TIMESTAMP_BYTES, 9)
+
+    def test_chunked(self):
+        stream = synthetic_stream(20)
+        expected = [str(event) for event in Decoder().feed(stream)]
+
+        rng = random.Random(0x12C)
+        for _ in range(50):
+            decoder = Decoder()
+            actual: list[str] = []
+            offset = 0
+            while offset < len(stream):
+                size = rng.randrange(1, 12)
+                chunk = memoryview(stream)[offset : offset + size]
+                actual += [str(event) for event in decoder.feed(chunk)]
+                offset += size
+            self.assertEqual(actual, expected)
+
+    def test_resynchronise(self):
+        good = symbols.encode(symbols.STRETCH_MEASURED, 1, 2, 3, 4)
+        corrupt = bytearray(good)
+        corrupt[4] ^= 0x10
+        stream = (
+            b"\x12" + bytes(corrupt) + good + symbols.encode(symbols.STRETCH_FINISH, 5)
+        )
+
+        events = Decoder().feed(stream)
+        unhandled = [e for e in events if isinstance(e, UnhandledEvent)]
+        self.assertEqual(
+            [str(e) for e in unhandled],
+            [str(UnhandledEvent(State.IDLE, b)) for b in [0x12, *corrupt]],
+            "corrupt frame skipped",
+        )
+        self.assertEqual(
+            [type(e).__name__ for e in events[len(unhandled) :]],
+            ["FinishTrainingEvent", "StartStretchingEvent", "FinishStretchingEvent"],
+        )
+
+    def test_histogram(self):
+        stream = b"".join(
+            [
+                symbols.encode(symbols.HISTOGRAM_BIN, 0, 3, 90),
+                symbols.encode(symbols.HISTOGRAM_BIN, 0, 4, 9),
+                symbols.encode(symbols.HISTOGRAM_BIN, 0, 10, 1),
+                symbols.encode(symbols.HISTOGRAM_BIN, 1, 63, 5),
+                symbols.encode(symbols.HISTOGRAM_END, 2, 7),
+                symbols.encode(symbols.HISTOGRAM_END, 2, 0),
+            ]
+        )
+        decoder = Decoder()
+        events = decoder.feed(stream)
+        self.assertEqual(len(events), 2)
+        dump, empty = events
+        assert isinstance(dump, HistogramEvent)
+        assert isinstance(empty, HistogramEvent)
+        self.assertEqual(dump.bins, ({3: 90, 4: 9, 10: 1}, {63: 5}))
+        self.assertEqual((dump.shift, dump.missed), (2, 7))
+        self.assertEqual(dump.percentile(0, 50), 3)
+        self.assertEqual(dump.percentile(0, 90), 3)
+        self.assertEqual(dump.percentile(0, 99), 4)
+        self.assertEqual(dump.percentile(0, 100), 10)
+        self.assertIn("p99 16-19", str(dump))
+        self.assertIn("max >=252", str(dump))
+        self.assertEqual(empty.bins, ({}, {}))
+        self.assertIsNone(empty.percentile(1, 50))
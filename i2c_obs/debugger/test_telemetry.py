@@ -0,0 +1,21 @@
+import unittest
+
+from .parser import SampleEvent
+from .telemetry import Telemetry
+
+
+class TestTelemetry(unittest.TestCase):
+    def test_rolling(self):
+        telemetry = Telemetry(window=1.0)
+        for ix in range(30):
+            telemetry.add(SampleEvent(100 + ix % 3, 50, 40, ix % 10 == 0), ix * 0.1)
+
+        # Only the last second's worth (11 samples, 10 intervals) counts.
+        self.assertAlmostEqual(telemetry.rate(), 10.0)
+        self.assertEqual(telemetry.dropped, 3)
+
+        summary = str(telemetry)
+        self.assertIn("10.0 samples/s", summary)
+        self.assertIn("3 dropped", summary)
+        self.assertIn("   100-100", summary)
+        self.assertIn("    50-50", summary)
@@ -0,0 +1,53 @@
+import unittest
+
+from ..rtl.uart import symbols
+from .parser import Decoder, TransactionEvent
+from .traffic import Traffic
+
+
+class TestTraffic(unittest.TestCase):
+    def test_per_address(self):
+        stream = b"".join(
+            [
+                symbols.encode(symbols.STRETCH_START, 0, 1_000_000),
+                symbols.encode(symbols.I2C_TXN, 0x50 << 1, 2, 0x12, 0, 300, 100, 0),
+                symbols.encode(
+                    symbols.I2C_TXN,
+                    0x50 << 1 | 1,
+                    1,
+                    0xA5,
+                    symbols.I2C_DATA_NACK,
+                    100,
+                    0,
+                    2,
+                ),
+                symbols.encode(
+                    symbols.I2C_TXN, 0x11 << 1, 0, 0, symbols.I2C_ADDRESS_NACK, 50, 0, 0
+                ),
+            ]
+        )
+        events = Decoder().feed(stream)[1:]
+        self.assertEqual(
+            str(events[0]),
+            "0x50 W 2 bytes (0x12 ...) in 0.000300s, held 0.000100s (33%)",
+        )
+        self.assertEqual(
+            str(events[1]),
+            "0x50 R 1 byte (0xa5) last NACKed in 0.000100s (2 dropped before)",
+        )
+        self.assertEqual(str(events[2]), "0x11 W NACK in 0.000050s")
+
+        traffic = Traffic()
+        for event in events:
+            assert isinstance(event, TransactionEvent)
+            traffic.add(event)
+        self.assertEqual(traffic.transactions, 3)
+        self.assertEqual(traffic.dropped, 2)
+        self.assertEqual(
+            str(traffic).splitlines(),
+            [
+                "i2c: 3 transactions, 2 dropped in total",
+                "  0x11: 1 W 0 R 1 NACK, 0 bytes, held 0.0%",
+                "  0x50: 1 W 1 R 0 NACK, 3 bytes, held 25.0%",
+            ],
+        )
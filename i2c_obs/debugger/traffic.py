@@ -0,0 +1,72 @@
+from ..rtl.uart import symbols
+from .parser import TransactionEvent
+
+__all__ = ["Traffic"]
+
+
+class _Address:
+    reads: int
+    writes: int
+    nacks: int
+    data: int
+    duration: int
+    held: int
+
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+        self.nacks = 0
+        self.data = 0
+        self.duration = 0
+        self.held = 0
+
+
+class Traffic:
+    """
+    Running per-address summary of decoded I2C transactions: how many reads
+    and writes, how many were NACKed, how many data bytes they carried, and
+    how much of their time was spent with SCL held by us.
+    """
+
+    _addresses: dict[int, _Address]
+    _dropped: int
+
+    def __init__(self):
+        self._addresses = {}
+        self._dropped = 0
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    @property
+    def transactions(self) -> int:
+        return sum(a.reads + a.writes for a in self._addresses.values())
+
+    def add(self, txn: TransactionEvent):
+        address = self._addresses.get(txn.address)
+        if address is None:
+            address = self._addresses[txn.address] = _Address()
+        if txn.read:
+            address.reads += 1
+        else:
+            address.writes += 1
+        if txn.flags & symbols.I2C_ADDRESS_NACK:
+            address.nacks += 1
+        address.data += txn.count
+        address.duration += txn.duration
+        address.held += txn.held
+        self._dropped += txn.dropped
+
+    def __str__(self):
+        lines = [
+            f"i2c: {self.transactions:,} transactions, "
+            f"{self._dropped:,} dropped in total"
+        ]
+        for addr, a in sorted(self._addresses.items()):
+            held = a.held * 100 / a.duration if a.duration else 0.0
+            lines.append(
+                f"  {addr:#04x}: {a.writes:,} W {a.reads:,} R {a.nacks:,} NACK, "
+                f"{a.data:,} bytes, held {held:.1f}%"
+            )
+        return "\n".join(lines)
@@ -1,58 +1,87 @@
 from abc import ABCMeta
-from typing import Any, ClassVar, Self, Type
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, ClassVar, Final, Optional, Self, Type
 
-from amaranth.build import Platform as AmaranthPlatform
-from amaranth_boards.icebreaker import ICEBreakerPlatform
-from amaranth_boards.orangecrab_r0_2 import OrangeCrabR0_2_85FPlatform
+if TYPE_CHECKING:
+    from amaranth import Signal
+
+    from .rtl.common.counter import Counting
 
 __all__ = ["Platform"]
 
+# Boards we build for, by name, and the amaranth_boards platform each is.
+# They're only imported when first asked for, since that pulls in Amaranth's
+# whole build system.
+BOARDS: Final[dict[str, str]] = {
+    "icebreaker": "amaranth_boards.icebreaker:ICEBreakerPlatform",
+    "orangecrab": "amaranth_boards.orangecrab_r0_2:OrangeCrabR0_2_85FPlatform",
+}
+
 
 class PlatformRegistry(ABCMeta):
     _registry: ClassVar[dict[str, Type[Self]]] = {}
-    _build_targets: ClassVar[set[str]] = set()
 
     def __new__(mcls, name: str, bases: tuple[type, ...], *args: Any, **kwargs: Any):
         cls = super().__new__(mcls, name, bases, *args, **kwargs)
         if bases:
             mcls._registry[cls.__name__] = cls
-            if issubclass(cls, AmaranthPlatform) and cls is not AmaranthPlatform:
-                mcls._build_targets.add(cls.__name__)
         return cls
 
     def __getitem__(cls, key: str) -> "Platform":
-        return cls._registry[key]()
+        return cls.resolve(key)()
+
+    def resolve(cls, key: str) -> Type["Platform"]:
+        if key not in cls._registry and key in BOARDS:
+            module, board = BOARDS[key].split(":")
+            base = getattr(import_module(module), board)
+            type(cls)(key, (base, Platform), {"__module__": __name__})
+        return cls._registry[key]
 
     @property
     def build_targets(cls) -> set[str]:
-        return cls._build_targets
+        return set(BOARDS)
 
 
 class Platform(metaclass=PlatformRegistry):
     simulation = False
 
+    # On simulation platforms, every Counter elaborated since the list was
+    # last reset, with the signal holding its count; see
+    # sim.TestCase.fast_forward.
+    counters: list[tuple["Signal", "Counting"]]
 
-class icebreaker(ICEBreakerPlatform, Platform):
-    pass
 
+class cxxsim(Platform):
+    simulation = True
 
-class orangecrab(OrangeCrabR0_2_85FPlatform, Platform):
-    pass
+    DEFAULT_CLK_FREQUENCY: ClassVar[int] = 3_000_000
 
+    _clk_frequency: int
 
-class cxxsim(Platform):
-    simulation = True
+    def __init__(self, *, clk_frequency: Optional[int] = None):
+        self._clk_frequency = clk_frequency or self.DEFAULT_CLK_FREQUENCY
+        self.counters = []
 
     @property
     def default_clk_frequency(self):
-        return 3_000_000
+        return self._clk_frequency
 
 
 class test(Platform):
     simulation = True
 
+    def __init__(self):
+        self.counters = []
+
     @property
     def default_clk_frequency(self):
         from .sim import clock
 
         return int(1 / clock())
+
+
+def __getattr__(name: str):
+    # So the boards can still be imported from here by name, e.g. to match on.
+    if name in BOARDS:
+        return Platform.resolve(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
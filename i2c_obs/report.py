@@ -0,0 +1,183 @@
+import json
+import re
+from pathlib import Path
+from typing import Any, NamedTuple, Optional, Self
+
+__all__ = ["Utilisation", "Clock", "Report"]
+
+
+class Utilisation(NamedTuple):
+    used: int
+    available: int
+
+
+class Clock(NamedTuple):
+    # Both in MHz.
+    fmax: float
+    target: float
+
+    @property
+    def margin(self) -> float:
+        """How much faster than it has to this clock could run, as a fraction."""
+        return self.fmax / self.target - 1
+
+
+# "2.50. Printing statistics."
+_STATS_HEADING = re.compile(r"^\d+\.\d+\. Printing statistics\.$", re.MULTILINE)
+_NEXT_HEADING = re.compile(r"^\d+\.\d+\. ", re.MULTILINE)
+# Older Yosys: "   Number of cells:   2345" then "     SB_LUT4   890".  Newer:
+# "     2345 cells" then "      890   SB_LUT4".
+_STAT_OLD = re.compile(r"^\s+Number of ([a-z ]+):\s+(\d+)$")
+_CELL_OLD = re.compile(r"^\s+(\$?[\w$]+)\s+(\d+)$")
+_STAT_NEW = re.compile(r"^\s+(\d+)\s+([a-z ]+)$")
+_CELL_NEW = re.compile(r"^\s+(\d+)\s+(\$?[\w$]+)$")
+# "Info: \t         ICESTORM_LC:   804/ 5280    15%"
+_UTILISATION = re.compile(r"^Info:\s+(\w+):\s+(\d+)/\s*(\d+)\s+\d+%$", re.MULTILINE)
+# "Info: Max frequency for clock 'clk$glb_clk': 72.35 MHz (PASS at 12.00 MHz)"
+_FMAX = re.compile(
+    r"^Info: Max frequency for clock '([^']+)': ([\d.]+) MHz "
+    r"\((?:PASS|FAIL) at ([\d.]+) MHz\)",
+    re.MULTILINE,
+)
+
+
+class Report(NamedTuple):
+    """
+    What a build came to: Yosys's statistics for the synthesised design,
+    nextpnr's device utilisation and each clock's Fmax after routing.
+    """
+
+    target: str
+    speed: int
+    # Yosys's counts, e.g. "cells" and "wire bits", and cells by type.
+    stats: dict[str, int]
+    cells: dict[str, int]
+    utilisation: dict[str, Utilisation]
+    clocks: dict[str, Clock]
+    # With a seed sweep, the seed these came from, and every seed's timing.
+    seed: Optional[int] = None
+    seeds: Optional[dict[int, dict[str, Clock]]] = None
+
+    @classmethod
+    def parse(cls, rpt: str, tim: str, *, target: str, speed: int) -> Self:
+        """Reads a report from Yosys's log (top.rpt) and nextpnr's (top.tim)."""
+        stats: dict[str, int] = {}
+        cells: dict[str, int] = {}
+        headings = list(_STATS_HEADING.finditer(rpt))
+        if headings:
+            section = rpt[headings[-1].end() :]
+            if end := _NEXT_HEADING.search(section):
+                section = section[: end.start()]
+            # The top module's block, the first; any later ones are its
+            # submodules or the hierarchy's totals.
+            block = section.split("===")[2] if section.count("===") >= 2 else ""
+            for line in block.splitlines():
+                if match := _STAT_OLD.match(line):
+                    stats[match[1]] = int(match[2])
+                elif match := _STAT_NEW.match(line):
+                    stats[match[2]] = int(match[1])
+                elif match := _CELL_OLD.match(line):
+                    cells[match[1]] = int(match[2])
+                elif match := _CELL_NEW.match(line):
+                    cells[match[2]] = int(match[1])
+
+        utilisation = {
+            cell: Utilisation(int(used), int(available))
+            for cell, used, available in _UTILISATION.findall(tim)
+        }
+        # Reported after placement and again after routing; the last one
+        # counts.
+        clocks = {
+            clock: Clock(float(fmax), float(wanted))
+            for clock, fmax, wanted in _FMAX.findall(tim)
+        }
+        return cls(target, speed, stats, cells, utilisation, clocks)
+
+    @classmethod
+    def load(cls, file: Path) -> Self:
+        data: dict[str, Any] = json.loads(file.read_text())
+        return cls(
+            data["target"],
+            data["speed"],
+            data["stats"],
+            data["cells"],
+            {k: Utilisation(**v) for k, v in data["utilisation"].items()},
+            {k: Clock(**v) for k, v in data["clocks"].items()},
+            data.get("seed"),
+            data.get("seeds")
+            and {
+                int(seed): {k: Clock(**v) for k, v in clocks.items()}
+                for seed, clocks in data["seeds"].items()
+            },
+        )
+
+    def save(self, file: Path):
+        data = {
+            **self._asdict(),
+            "utilisation": {k: v._asdict() for k, v in self.utilisation.items()},
+            "clocks": {k: v._asdict() for k, v in self.clocks.items()},
+            "seeds": self.seeds
+            and {
+                seed: {k: v._asdict() for k, v in clocks.items()}
+                for seed, clocks in self.seeds.items()
+            },
+        }
+        file.write_text(json.dumps(data, indent=2) + "\n")
+
+    @property
+    def fmax(self) -> Optional[float]:
+        """The slowest clock's Fmax, in MHz."""
+        return min((c.fmax for c in self.clocks.values()), default=None)
+
+    @property
+    def margin(self) -> Optional[float]:
+        """The tightest clock's margin; see Clock.margin."""
+        return min((c.margin for c in self.clocks.values()), default=None)
+
+    def compare(self, baseline: "Report") -> list[str]:
+        """One line for everything that's changed since baseline."""
+        changes: list[str] = []
+
+        def change(
+            name: str, was: Optional[float], now: Optional[float], unit: str = ""
+        ):
+            if was == now:
+                return
+            if was is None or now is None:
+                changes.append(f"{name}: {was} -> {now}")
+                return
+            relative = f" ({now / was - 1:+.1%})" if was else ""
+            changes.append(f"{name}: {was:g}{unit} -> {now:g}{unit}{relative}")
+
+        for name in sorted(baseline.stats.keys() | self.stats.keys()):
+            change(name, baseline.stats.get(name), self.stats.get(name))
+        for name in sorted(baseline.cells.keys() | self.cells.keys()):
+            change(name, baseline.cells.get(name), self.cells.get(name))
+        for name in sorted(baseline.utilisation.keys() | self.utilisation.keys()):
+            was, now = baseline.utilisation.get(name), self.utilisation.get(name)
+            change(f"{name} used", was and was.used, now and now.used)
+        for name in sorted(baseline.clocks.keys() | self.clocks.keys()):
+            before, after = baseline.clocks.get(name), self.clocks.get(name)
+            change(f"Fmax {name}", before and before.fmax, after and after.fmax, " MHz")
+        return changes
+
+    def __str__(self):
+        lines = [f"{self.target} at {self.speed}Hz:"]
+        lines += [f"  {name}: {count}" for name, count in self.stats.items()]
+        lines += [f"    {cell}: {count}" for cell, count in self.cells.items()]
+        lines.append("Device utilisation:")
+        lines += [
+            f"  {cell}: {u.used}/{u.available} ({u.used / u.available:.0%})"
+            for cell, u in self.utilisation.items()
+            if u.available
+        ]
+        lines += [
+            f"Fmax for {name}: {c.fmax:.2f} MHz (target {c.target:.2f} MHz, "
+            f"{c.margin:+.0%})"
+            for name, c in self.clocks.items()
+        ]
+        for seed, clocks in (self.seeds or {}).items():
+            fmax = min((c.fmax for c in clocks.values()), default=0.0)
+            kept = "  (kept)" if seed == self.seed else ""
+            lines.append(f"  seed {seed}: {fmax:.2f} MHz{kept}")
+        return "\n".join(lines)
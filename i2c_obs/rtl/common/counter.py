@@ -1,11 +1,21 @@
-from typing import Optional, cast
+from typing import NamedTuple, Optional, cast
 
 from amaranth import Elaboratable, Module, Signal
 from amaranth.lib.wiring import Component, In, Out
 
 from ...platform import Platform
 
-__all__ = ["Counter"]
+__all__ = ["Counter", "Counting"]
+
+
+class Counting(NamedTuple):
+    """What sim.TestCase.fast_forward needs to know to skip a Counter ahead."""
+
+    en: Signal
+    half: Signal
+    full: Signal
+    half_at: int
+    full_at: int
 
 
 class Counter(Component):
@@ -59,4 +69,10 @@ class Counter(Component):
         with m.Else():
             m.d.sync += clk_counter.eq(0)
 
+        if platform.simulation:
+            counting = Counting(
+                self.en, self.half, self.full, half_clock_tgt, full_clock_tgt
+            )
+            platform.counters.append((clk_counter, counting))
+
         return m
@@ -1,4 +1,4 @@
-from amaranth.sim import Delay, Settle
+from amaranth.sim import Settle
 
 from ... import sim
 from .timer import Timer
@@ -16,7 +16,7 @@ class TestTimer(sim.TestCase):
         yield
         assert not (yield d.o)
 
-        yield Delay(d.time)
+        yield from self.fast_forward(d.time)
         yield
         assert (yield d.o)
 
@@ -0,0 +1,200 @@
+from typing import Final, Optional, cast
+
+from amaranth import Cat, Const, Elaboratable, Memory, Module, Signal
+from amaranth.lib.wiring import Component, In, Out
+
+from ..platform import Platform
+from .common import Counter, Hz
+from .uart import Framer, symbols
+
+__all__ = ["Histogram"]
+
+
+class Histogram(Component):
+    """
+    Bins SCL tLOW and tHIGH into block RAM at line rate.
+
+    Every edge on scl_i closes a phase; its length in cycles is binned into
+    channel 0 (low) or 1 (high).  Bins are a power of two cycles wide, chosen
+    so BINS bins cover twice a period at the configured bus speed, and the
+    last bin also takes everything longer.
+
+    The bins are dumped, and cleared, every interval seconds or when dump is
+    strobed: one HISTOGRAM_BIN report per non-zero bin offered on kind and
+    payload while valid is high, each taken by strobing ack, then a final
+    HISTOGRAM_END.  There are two banks of bins, so edges go on being binned
+    into one while the other is dumped; a dump asked for while one is still
+    going starts when it finishes.  Bins saturate at count_width bits, and
+    edges that land in a full bin are counted and reported in HISTOGRAM_END.
+    """
+
+    BINS: Final[int] = symbols.HISTOGRAM_BINS
+    DEFAULT_INTERVAL: Final[float] = 1.0
+    SIM_INTERVAL: Final[float] = 1e-2
+
+    scl_i: In(1)
+    dump: In(1)
+
+    kind: Out(8)
+    payload: Out(symbols.MAX_PAYLOAD * 8)
+    valid: Out(1)
+    ack: In(1)
+
+    _speed: Hz
+    _interval: float
+    _count_width: int
+
+    def __init__(
+        self,
+        *,
+        speed: Hz = Hz(400_000),
+        interval: Optional[float] = None,
+        count_width: int = 8 * symbols.FIELDS[symbols.HISTOGRAM_BIN][-1],
+    ):
+        super().__init__()
+        assert (
+            0 < count_width <= 8 * symbols.FIELDS[symbols.HISTOGRAM_BIN][-1]
+        ), f"{count_width}-bit counts don't fit HISTOGRAM_BIN"
+        self._speed = speed
+        self._interval = interval or 0
+        self._count_width = count_width
+
+    @staticmethod
+    def bin_shift(freq: int, speed: Hz) -> int:
+        span = 2 * int(freq // speed.value)
+        shift = 0
+        while span >> shift >= Histogram.BINS:
+            shift += 1
+        return shift
+
+    def elaborate(self, platform: Platform) -> Elaboratable:
+        self._interval = self._interval or (
+            self.SIM_INTERVAL if platform.simulation else self.DEFAULT_INTERVAL
+        )
+
+        m = Module()
+
+        freq = cast(int, platform.default_clk_frequency)
+        shift = self.bin_shift(freq, self._speed)
+
+        m.submodules.interval = interval = Counter(time=self._interval)
+        m.d.comb += interval.en.eq(1)
+
+        # Addressed by Cat(bin, channel, bank); edges are binned into bank and
+        # the other one is dumped.  Two banks of 16-bit bins still fit a
+        # single iCE40 block RAM.
+        bins = Memory(width=self._count_width, depth=4 * self.BINS)
+        m.submodules.rd = rd = bins.read_port(transparent=False)
+        m.submodules.wr = wr = bins.write_port()
+        bank = Signal()
+
+        scl_last = Signal()
+        m.d.sync += scl_last.eq(self.scl_i)
+        edge = self.scl_i != scl_last
+
+        # Cycles since the last edge; saturates in the overflow bin.
+        length = Signal(range(self.BINS << shift))
+        seen_edge = Signal()
+        with m.If(edge):
+            m.d.sync += [
+                length.eq(1),
+                seen_edge.eq(1),
+            ]
+        with m.Elif(~length.all()):
+            m.d.sync += length.eq(length + 1)
+
+        # Read-modify-write in two cycles.  Consecutive phases land in
+        # different channels, so an update never reads a bin still being
+        # written by the one before it.  Binning takes the ports whenever it
+        # needs them; the dump below waits its turn.
+        binning = Signal()
+        m.d.comb += binning.eq(edge & seen_edge)
+        update_addr = Signal.like(rd.addr)
+        updating = Signal()
+        full = Signal()
+        m.d.sync += updating.eq(binning)
+        m.d.comb += full.eq(updating & rd.data.all())
+
+        missed = Signal(16)
+        with m.If(full & ~missed.all()):
+            m.d.sync += missed.eq(missed + 1)
+
+        ix = Signal(range(2 * self.BINS))
+        count = Signal(self._count_width)
+        dump_pending = Signal()
+        with m.If(self.dump | interval.full):
+            m.d.sync += dump_pending.eq(1)
+
+        with m.FSM():
+            with m.State("BINNING"):
+                with m.If(dump_pending & ~binning & ~updating):
+                    m.d.sync += [
+                        bank.eq(~bank),
+                        ix.eq(0),
+                        dump_pending.eq(0),
+                    ]
+                    m.next = "DUMP: READ"
+
+            with m.State("DUMP: READ"):
+                m.d.comb += rd.addr.eq(Cat(ix, ~bank))
+                with m.If(~binning):
+                    m.next = "DUMP: LATCH"
+
+            with m.State("DUMP: LATCH"):
+                m.d.sync += count.eq(rd.data)
+                m.next = "DUMP: CLEAR"
+
+            with m.State("DUMP: CLEAR"):
+                with m.If(~updating):
+                    m.d.comb += [
+                        wr.addr.eq(Cat(ix, ~bank)),
+                        wr.data.eq(0),
+                        wr.en.eq(1),
+                    ]
+                    m.next = "DUMP: OFFER"
+
+            with m.State("DUMP: OFFER"):
+                with m.If(count != 0):
+                    m.d.comb += [
+                        self.kind.eq(symbols.HISTOGRAM_BIN),
+                        self.payload.eq(
+                            Framer.pack(
+                                symbols.HISTOGRAM_BIN,
+                                ix[-1],
+                                ix[:-1],
+                                count,
+                            )
+                        ),
+                        self.valid.eq(1),
+                    ]
+                with m.If((count == 0) | self.ack):
+                    m.d.sync += ix.eq(ix + 1)
+                    with m.If(ix == 2 * self.BINS - 1):
+                        m.next = "DUMP: END"
+                    with m.Else():
+                        m.next = "DUMP: READ"
+
+            with m.State("DUMP: END"):
+                m.d.comb += [
+                    self.kind.eq(symbols.HISTOGRAM_END),
+                    self.payload.eq(
+                        Framer.pack(symbols.HISTOGRAM_END, Const(shift, 8), missed)
+                    ),
+                    self.valid.eq(1),
+                ]
+                with m.If(self.ack):
+                    # An edge missed on this very cycle goes in the next report.
+                    m.d.sync += missed.eq(full)
+                    m.next = "BINNING"
+
+        with m.If(binning):
+            m.d.comb += rd.addr.eq(Cat(length[shift:], scl_last, bank))
+            m.d.sync += update_addr.eq(rd.addr)
+        with m.If(updating & ~full):
+            m.d.comb += [
+                wr.addr.eq(update_addr),
+                wr.data.eq(rd.data + 1),
+                wr.en.eq(1),
+            ]
+
+        return m
@@ -0,0 +1,138 @@
+import random
+from collections import Counter
+
+from amaranth.sim import Settle
+
+from .. import sim
+from .common import Hz
+from .histogram import Histogram
+from .uart import symbols
+
+
+def _fields(kind: int, payload: int) -> list[int]:
+    values: list[int] = []
+    for width in symbols.FIELDS[kind]:
+        values.append(payload & ((1 << (width * 8)) - 1))
+        payload >>= width * 8
+    return values
+
+
+def _expected(phases: list[tuple[int, int]], shift: int) -> Counter[tuple[int, int]]:
+    # Every phase closed by a following edge is binned; the last one isn't
+    # closed yet.
+    return Counter(
+        (level, min(length >> shift, Histogram.BINS - 1))
+        for level, length in phases[:-1]
+    )
+
+
+class TestHistogram(sim.TestCase):
+    def _drive(self, dut: Histogram, phases: list[tuple[int, int]]) -> sim.Procedure:
+        for level, length in phases:
+            yield dut.scl_i.eq(level)
+            for _ in range(length):
+                yield
+
+    def _dump(
+        self, dut: Histogram, *, strobe: bool = True
+    ) -> sim.Generator[tuple[Counter[tuple[int, int]], list[int]]]:
+        # Takes one whole dump, returning the counts and HISTOGRAM_END's fields.
+        if strobe:
+            yield dut.dump.eq(1)
+            yield
+            yield dut.dump.eq(0)
+
+        dumped: Counter[tuple[int, int]] = Counter()
+        while True:
+            yield Settle()
+            if not (yield dut.valid):
+                yield
+                continue
+            kind = yield dut.kind
+            values = _fields(kind, (yield dut.payload))
+            yield dut.ack.eq(1)
+            yield
+            yield dut.ack.eq(0)
+            if kind == symbols.HISTOGRAM_END:
+                return dumped, values
+            self.assertEqual(kind, symbols.HISTOGRAM_BIN)
+            channel, ix, count = values
+            dumped[channel, ix] += count
+
+    @sim.i2c_speeds
+    def test_sim_histogram(self, dut: Histogram, speed: Hz) -> sim.Procedure:
+        freq = int(1 / sim.clock())
+        period = freq // speed.value
+        shift = Histogram.bin_shift(freq, speed)
+        rng = random.Random(speed.value)
+
+        # A jittery ~60% duty bus, starting with SCL idle high.
+        phases: list[tuple[int, int]] = [(1, 10)]
+        for _ in range(30):
+            low = period * 6 // 10 + rng.randint(-1, 1)
+            phases.append((0, low))
+            phases.append((1, period - low + rng.randint(-1, 1)))
+        yield from self._drive(dut, phases)
+
+        dumped, end = yield from self._dump(dut)
+        self.assertEqual(end, [shift, 0])
+        self.assertEqual(dumped, _expected(phases, shift))
+
+        # The dump cleared the bins.
+        dumped, end = yield from self._dump(dut)
+        self.assertEqual(end, [shift, 0])
+        self.assertEqual(dumped, Counter())
+
+    def test_sim_histogram_interval(self, dut: Histogram) -> sim.Procedure:
+        shift = Histogram.bin_shift(int(1 / sim.clock()), Hz(400_000))
+        phases = [(1, 10), (0, 20), (1, 10), (0, 20), (1, 1)]
+        yield from self._drive(dut, phases)
+
+        # Nobody asks; the interval comes round and it dumps anyway.
+        yield from self.fast_forward(Histogram.SIM_INTERVAL)
+        dumped, end = yield from self._dump(dut, strobe=False)
+        self.assertEqual(end, [shift, 0])
+        self.assertEqual(dumped, _expected(phases, shift))
+
+    def test_sim_histogram_during_dump(self, dut: Histogram) -> sim.Procedure:
+        shift = Histogram.bin_shift(int(1 / sim.clock()), Hz(400_000))
+        before = [(1, 10), (0, 20), (1, 10), (0, 1)]
+        yield from self._drive(dut, before)
+
+        # Start a dump, and leave it waiting on its first report while the
+        # bus carries on.
+        yield dut.dump.eq(1)
+        yield
+        yield dut.dump.eq(0)
+        while not (yield dut.valid):
+            yield
+            yield Settle()
+        during = [(0, 20), (1, 12), (0, 25), (1, 12), (0, 1)]
+        yield from self._drive(dut, during)
+
+        dumped, end = yield from self._dump(dut, strobe=False)
+        self.assertEqual(end, [shift, 0])
+        self.assertEqual(dumped, _expected(before, shift))
+        # Offering the first report took long enough that the phase spanning
+        # it overflowed.
+        during[0] = (0, Histogram.BINS << shift)
+        dumped, end = yield from self._dump(dut)
+        self.assertEqual(end, [shift, 0])
+        self.assertEqual(dumped, _expected(during, shift))
+
+    @sim.args(count_width=2)
+    def test_sim_histogram_missed(self, dut: Histogram) -> sim.Procedure:
+        shift = Histogram.bin_shift(int(1 / sim.clock()), Hz(400_000))
+        phases = [(1, 10)] + [(0, 20), (1, 10)] * 5 + [(0, 1)]
+        yield from self._drive(dut, phases)
+
+        # Bins hold 3 at most; the 6 high and 5 low phases overflow by 3 and 2.
+        dumped, end = yield from self._dump(dut)
+        self.assertEqual(end, [shift, 3 + 2])
+        self.assertEqual(
+            dumped, {k: min(v, 3) for k, v in _expected(phases, shift).items()}
+        )
+
+        # Each report counts what was missed since the one before.
+        dumped, end = yield from self._dump(dut)
+        self.assertEqual(end, [shift, 0])
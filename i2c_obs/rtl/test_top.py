@@ -1,39 +1,137 @@
 from amaranth.sim import Settle
 
 from .. import sim
+from ..base import path
+from ..debugger.parser import (
+    Decoder,
+    FinishStretchingEvent,
+    FinishTrainingEvent,
+    SampleEvent,
+    StartTrainingEvent,
+)
+from ..scenario import Scenario, scenarios
 from . import Top
 
 
 class TestTop(sim.TestCase):
     SIM_CLOCK = 1e-6
 
-    def test_sim_top(self, dut: Top) -> sim.Procedure:
-        yield dut.scl_i.eq(1)
+    @scenarios(path("cxxsim/scenarios/top.scn"))
+    def test_sim_top(self, dut: Top, scenario: Scenario) -> sim.Procedure:
+        failures = yield from scenario.run(dut)
+        self.assertEqual(failures, [])
+
+    def _cycle(self, dut: Top) -> sim.Procedure:
         yield
+        yield Settle()
+        assert dut.framer is not None
+        if (yield dut.framer.uart.wr_en):
+            self._reported.append((yield dut.framer.uart.wr_data))
 
+    def _period(self, dut: Top, *, low: int, high: int) -> sim.Generator[int]:
+        # The controller holds SCL low for low cycles, then releases it and
+        # waits for it to actually rise before counting high cycles.
+        yield dut.scl_i.eq(0)
+        for _ in range(low):
+            yield from self._cycle(dut)
+        yield dut.scl_i.eq(1)
+        stretched = 0
+        while (yield dut.scl_oe):
+            stretched += 1
+            yield from self._cycle(dut)
+        for _ in range(high):
+            yield from self._cycle(dut)
+        return stretched
+
+    def _start(self, dut: Top) -> sim.Procedure:
+        self._reported = bytearray()
+        yield dut.scl_i.eq(1)
         yield dut.switch.eq(1)
-        yield
+        yield from self._cycle(dut)
+        yield dut.switch.eq(0)
+
+    def _samples(self) -> list[SampleEvent]:
+        events = Decoder().feed(bytes(self._reported))
+        return [e for e in events if isinstance(e, SampleEvent)]
+
+    @sim.args(telemetry=True, baud=1_000_000)
+    def test_sim_telemetry(self, dut: Top) -> sim.Procedure:
+        yield from self._start(dut)
 
+        # Two periods train, then we stretch; each period is sampled at the
+        # falling edge that ends it, so the last one here isn't.
+        for _ in range(2):
+            yield from self._period(dut, low=3, high=3)
+        stretches: list[int] = []
+        for _ in range(4):
+            stretches.append((yield from self._period(dut, low=3, high=5)))
+        for _ in range(500):
+            yield from self._cycle(dut)
+
+        samples = self._samples()
+        self.assertEqual(len(samples), 3)
+        for sample, stretched in zip(samples, stretches):
+            self.assertGreater(stretched, 0)
+            self.assertEqual(sample.t_low + sample.t_high, 3 + stretched + 5)
+            self.assertEqual(sample.hold, samples[0].hold)
+            self.assertEqual(sample.dropped, 0)
+
+    @sim.args(telemetry=True, telemetry_depth=2, baud=1_000_000)
+    def test_sim_telemetry_drops(self, dut: Top) -> sim.Procedure:
+        yield from self._start(dut)
+
+        # Far more periods than the buffer holds or the link can carry, then a
+        # pause, then two more so a late sample carries the final drop count.
+        for _ in range(22):
+            yield from self._period(dut, low=3, high=3)
+        for _ in range(500):
+            yield from self._cycle(dut)
+        for _ in range(2):
+            yield from self._period(dut, low=3, high=3)
+        for _ in range(500):
+            yield from self._cycle(dut)
+
+        samples = self._samples()
+        self.assertGreater(sum(s.dropped for s in samples), 0)
+        self.assertEqual(len(samples) + sum(s.dropped for s in samples), 24 - 3)
+
+    @sim.args(telemetry=True, telemetry_depth=2, baud=1_000_000)
+    def test_sim_telemetry_drops_attributed(self, dut: Top) -> sim.Procedure:
+        yield from self._start(dut)
+
+        # Each period a cycle longer high than the last, so every sample says
+        # which period it was; enough of them to overflow the buffer.
+        for i in range(14):
+            yield from self._period(dut, low=3, high=3 + i)
+        for _ in range(800):
+            yield from self._cycle(dut)
+
+        samples = self._samples()
+        self.assertGreater(sum(s.dropped for s in samples), 0)
+        # A sample's count is of the periods dropped since the one before it.
+        self.assertEqual(samples[0].dropped, 0)
+        for before, sample in zip(samples, samples[1:]):
+            self.assertEqual(sample.dropped, sample.t_high - before.t_high - 1)
+
+    @sim.args(baud=1_000_000)
+    def test_sim_timestamps(self, dut: Top) -> sim.Procedure:
+        yield from self._start(dut)
+        for _ in range(5):
+            yield from self._period(dut, low=3, high=3)
+        yield dut.switch.eq(1)
+        yield from self._cycle(dut)
         yield dut.switch.eq(0)
+        for _ in range(500):
+            yield from self._cycle(dut)
 
-        STRETCHES = [0, 0, 3, 3]
-        for ix, expected in enumerate(STRETCHES):
-            yield dut.scl_i.eq(0)
-            yield
-            yield
-            yield
-
-            yield dut.scl_i.eq(1)
-            actual = 0
-            while (yield dut.scl_oe):
-                actual += 1
-                yield
-                yield Settle()
-            self.assertEqual(
-                actual,
-                expected,
-                f"ix {ix} expected {expected} stretched cycles, got {actual}",
-            )
-            yield
-            yield
-            yield
+        start, measured, _, finish = Decoder().feed(bytes(self._reported))
+        assert isinstance(start, StartTrainingEvent)
+        assert isinstance(measured, FinishTrainingEvent)
+        assert isinstance(finish, FinishStretchingEvent)
+        self.assertEqual(start.clock, round(1 / sim.clock()))
+        self.assertGreater(start.timestamp, 0)
+        # Low, high, low: training ends a cycle after the third edge.
+        self.assertEqual(measured.training, 3 + 3 + 3 + 1)
+        self.assertGreater(finish.timestamp, measured.timestamp)
+        assert finish.stretching is not None and finish.at is not None
+        self.assertAlmostEqual(finish.at - measured.at, finish.stretching * sim.clock())
@@ -0,0 +1,139 @@
+from amaranth.sim import Settle
+
+from .. import sim
+from ..debugger.parser import Decoder, TransactionEvent
+from .transactions import Transactions
+from .uart import symbols
+
+# Cycles per quarter bit on the simulated bus.
+Q = 4
+
+
+class TestTransactions(sim.TestCase):
+    def _wait(self, dut: Transactions, cycles: int = Q) -> sim.Procedure:
+        for _ in range(cycles):
+            yield
+
+    def _start(self, dut: Transactions) -> sim.Procedure:
+        # Also a repeated START, when SCL is low.
+        yield dut.sda_i.eq(1)
+        yield from self._wait(dut)
+        yield dut.scl_i.eq(1)
+        yield from self._wait(dut)
+        yield dut.sda_i.eq(0)
+        yield from self._wait(dut)
+        yield dut.scl_i.eq(0)
+        yield from self._wait(dut)
+
+    def _stop(self, dut: Transactions) -> sim.Procedure:
+        yield dut.sda_i.eq(0)
+        yield from self._wait(dut)
+        yield dut.scl_i.eq(1)
+        yield from self._wait(dut)
+        yield dut.sda_i.eq(1)
+        yield from self._wait(dut)
+
+    def _bit(self, dut: Transactions, bit: int, *, held: int = 0) -> sim.Procedure:
+        yield dut.sda_i.eq(bit)
+        yield from self._wait(dut)
+        yield dut.hold.eq(1)
+        yield from self._wait(dut, held)
+        yield dut.hold.eq(0)
+        yield dut.scl_i.eq(1)
+        yield from self._wait(dut, 2 * Q)
+        yield dut.scl_i.eq(0)
+        yield from self._wait(dut)
+
+    def _byte(
+        self, dut: Transactions, value: int, *, ack: bool = True, held: int = 0
+    ) -> sim.Procedure:
+        for ix in reversed(range(8)):
+            yield from self._bit(dut, (value >> ix) & 1, held=held if ix == 7 else 0)
+        yield from self._bit(dut, 0 if ack else 1)
+
+    def _drain(self, dut: Transactions) -> sim.Generator[list[TransactionEvent]]:
+        reports = bytearray()
+        while True:
+            yield Settle()
+            if not (yield dut.valid):
+                break
+            kind = yield dut.kind
+            self.assertEqual(kind, symbols.I2C_TXN)
+            payload = yield dut.payload
+            values: list[int] = []
+            for width in symbols.FIELDS[kind]:
+                values.append(payload & ((1 << (width * 8)) - 1))
+                payload >>= width * 8
+            reports += symbols.encode(kind, *values)
+            yield dut.ack.eq(1)
+            yield
+            yield dut.ack.eq(0)
+            yield
+        events = Decoder().feed(bytes(reports))
+        assert all(isinstance(e, TransactionEvent) for e in events)
+        return events  # pyright: ignore[reportGeneralTypeIssues]
+
+    def test_sim_transactions(self, dut: Transactions) -> sim.Procedure:
+        yield dut.scl_i.eq(1)
+        yield dut.sda_i.eq(1)
+        yield from self._wait(dut)
+
+        # Write two bytes to 0x50, the first stretched.
+        yield from self._start(dut)
+        yield from self._byte(dut, 0x50 << 1)
+        yield from self._byte(dut, 0x12, held=20)
+        yield from self._byte(dut, 0x34)
+        yield from self._stop(dut)
+
+        # Set a register on 0x3C, then a repeated START to read one byte back,
+        # NACKing it to finish.
+        yield from self._start(dut)
+        yield from self._byte(dut, 0x3C << 1)
+        yield from self._byte(dut, 0x07)
+        yield from self._start(dut)
+        yield from self._byte(dut, 0x3C << 1 | 1)
+        yield from self._byte(dut, 0xA5, ack=False)
+        yield from self._stop(dut)
+
+        # Nobody's home at 0x11.
+        yield from self._start(dut)
+        yield from self._byte(dut, 0x11 << 1, ack=False)
+        yield from self._stop(dut)
+
+        events = yield from self._drain(dut)
+        self.assertEqual(
+            [(e.address, e.read, e.count, e.first, e.flags) for e in events],
+            [
+                (0x50, False, 2, 0x12, 0),
+                (0x3C, False, 1, 0x07, symbols.I2C_REPEATED_START),
+                (0x3C, True, 1, 0xA5, symbols.I2C_DATA_NACK),
+                (0x11, False, 0, 0, symbols.I2C_ADDRESS_NACK),
+            ],
+        )
+        self.assertEqual([e.held for e in events], [20, 0, 0, 0])
+        # Half a bit after the START, 27 bits, the hold, then half a bit until
+        # the STOP.
+        self.assertAlmostEqual(events[0].duration, 27 * 4 * Q + 4 * Q + 20, delta=1)
+        self.assertEqual([e.dropped for e in events], [0, 0, 0, 0])
+
+    @sim.args(depth=2)
+    def test_sim_transactions_dropped(self, dut: Transactions) -> sim.Procedure:
+        yield dut.scl_i.eq(1)
+        yield dut.sda_i.eq(1)
+        yield from self._wait(dut)
+
+        for address in range(5):
+            yield from self._start(dut)
+            yield from self._byte(dut, address << 1)
+            yield from self._stop(dut)
+
+        events = yield from self._drain(dut)
+        self.assertEqual([e.address for e in events], [0, 1])
+        self.assertEqual([e.dropped for e in events], [0, 0])
+
+        # The drops are reported with the next transaction queued after them.
+        yield from self._start(dut)
+        yield from self._byte(dut, 5 << 1)
+        yield from self._stop(dut)
+        events = yield from self._drain(dut)
+        self.assertEqual([(e.address, e.dropped) for e in events], [(5, 3)])
@@ -0,0 +1,428 @@
+from typing import Final, Optional, cast
+
+from amaranth import Array, Cat, Elaboratable, Module, Mux, Signal
+from amaranth.build import Attrs
+from amaranth.build import Platform as AmaranthPlatform
+from amaranth.hdl.ast import Assert, Display
+from amaranth.lib.cdc import FFSynchronizer
+from amaranth.lib.fifo import SyncFIFO
+from amaranth.lib.wiring import Component, In, Out
+from amaranth_boards.resources import I2CResource
+
+from ..platform import Platform
+from .common import ButtonWithHold, Hz
+from .histogram import Histogram
+from .transactions import Transactions
+from .uart import Framer, symbols
+
+__all__ = ["Top"]
+
+
+class Top(Component):
+    VALID_SPEEDS: Final[list[int]] = [
+        100_000,
+        400_000,
+        1_000_000,
+    ]
+    DEFAULT_SPEED: Final[int] = 400_000
+    # Per-cycle timing samples buffered for the UART while streaming telemetry.
+    TELEMETRY_DEPTH: Final[int] = 256
+
+    switch: In(1)
+    led: Out(1)
+    scl_oe: Out(1)
+    scl_o: Out(1)
+    scl_i: In(1)
+    sda_i: In(1)
+
+    _speed: Hz
+    _baud: Optional[int]
+    _telemetry: bool
+    _telemetry_depth: int
+    _histogram: bool
+    _transactions: bool
+    _framer: Optional[Framer]
+
+    def __init__(
+        self,
+        *,
+        platform: Platform,
+        speed: Hz = Hz(400_000),
+        baud: Optional[int] = None,
+        telemetry: bool = False,
+        telemetry_depth: Optional[int] = None,
+        histogram: bool = False,
+        transactions: bool = False,
+    ):
+        super().__init__()
+        self._speed = speed
+        self._baud = baud
+        self._telemetry = telemetry
+        self._telemetry_depth = telemetry_depth or self.TELEMETRY_DEPTH
+        self._histogram = histogram
+        self._transactions = transactions
+        self._framer = None
+
+    @property
+    def framer(self) -> Optional[Framer]:
+        return self._framer
+
+    def ports(self, platform: Platform) -> list[Signal]:
+        return [getattr(self, name) for name in self.signature.members.keys()]
+
+    def elaborate(self, platform: Platform) -> Elaboratable:
+        m = Module()
+
+        freq = cast(int, platform.default_clk_frequency)
+
+        m.submodules.button = ButtonWithHold()
+        m.d.comb += m.submodules.button.i.eq(self.switch)
+        button_up = m.submodules.button.up
+
+        plat_uart = None
+
+        # Boards are matched by name so that elaborating for one doesn't
+        # import the others; see platform.BOARDS.
+        match type(platform).__name__:
+            case "icebreaker":
+                board = cast(AmaranthPlatform, platform)
+                m.d.comb += [
+                    self.switch.eq(board.request("button").i),
+                    board.request("led").o.eq(self.led),
+                ]
+                board.add_resources(
+                    [
+                        I2CResource(
+                            0,
+                            scl="1",
+                            sda="2",
+                            conn=("pmod", 0),
+                            attrs=Attrs(IO_STANDARD="SB_LVCMOS"),
+                        )
+                    ]
+                )
+                i2c = board.request("i2c")
+
+                if False:
+                    m.submodules += FFSynchronizer(i2c.scl.i, self.scl_i)
+                else:
+                    m.d.comb += self.scl_i.eq(i2c.scl.i)
+
+                m.d.comb += [
+                    i2c.scl.oe.eq(self.scl_oe),
+                    i2c.scl.o.eq(self.scl_o),
+                    self.sda_i.eq(i2c.sda.i),
+                ]
+
+                plat_uart = board.request("uart")
+
+            case "orangecrab":
+                board = cast(AmaranthPlatform, platform)
+                m.d.comb += [
+                    self.switch.eq(board.request("button").i),
+                    board.request("led").o.eq(self.led),
+                ]
+                board.add_resources(
+                    [
+                        I2CResource(
+                            0,
+                            scl="scl",
+                            sda="sda",
+                            conn=("io", 0),
+                            attrs=Attrs(IO_TYPE="LVCMOS33"),
+                        )
+                    ]
+                )
+                i2c = board.request("i2c")
+                m.d.comb += [
+                    i2c.scl.oe.eq(self.scl_oe),
+                    i2c.scl.o.eq(self.scl_o),
+                    self.scl_i.eq(i2c.scl.i),
+                    self.sda_i.eq(i2c.sda.i),
+                ]
+
+                with m.If(m.submodules.button.held):
+                    m.d.sync += cast(Signal, board.request("program").o).eq(1)
+
+            case _:
+                button_up = self.switch
+
+        self._framer = framer = Framer(plat_uart, baud=self._baud)
+        m.submodules.framer = framer
+
+        m.d.comb += [
+            self.scl_o.eq(0),
+            self.scl_oe.eq(0),
+        ]
+
+        scl_last = Signal()
+        m.d.sync += scl_last.eq(self.scl_i)
+
+        counter_max = int(freq // 10_000)
+        # We wait for sum of 2 measurements.
+        timer_count = Signal(range(counter_max * 2 + 1))
+
+        # Measurement starts at 1 in the cycle we see SCL drop, and is
+        # incremented every cycle thereafter as long as SCL is stable;
+        # repeat for 3 consecutive measurements (i.e. low-high-low).
+        #
+        #       |      |      |      |      |      |      |      |      |      |
+        # ___   |      |      |     _|______|______|___   |      |      |     _|
+        #    \  |      |      |    / |      |      |   \  |      |      |    / |
+        #     \_|______|______|___/  |      |      |    \_|______|______|___/  |
+        #       |      |      |      |      |      |      |      |      |      |
+        #        a1     a2     a3     b1     b2     b3     c1     c2     c3
+        N_MEASUREMENTS = 3
+        measurements = Array(
+            [Signal(range(counter_max + 1)) for _ in range(N_MEASUREMENTS)]
+        )
+        measure_ix = Signal(range(N_MEASUREMENTS))
+
+        # Free-running; 48 bits wrap after about 68 days at 48MHz (271 at
+        # 12MHz).  The debugger takes intervals modulo the counter's width, so
+        # they survive one wrap, but absolute times restart from zero.
+        now = Signal(symbols.TIMESTAMP_BYTES * 8)
+        m.d.sync += now.eq(now + 1)
+
+        # Reports waiting for the framer, sent in the order they're raised,
+        # each with the time it was raised.
+        start_pending = Signal()
+        start_at = Signal.like(now)
+        measured_pending = Signal()
+        measured_at = Signal.like(now)
+        finish_pending = Signal()
+        finish_at = Signal.like(now)
+
+        with m.FSM() as fsm:
+            m.d.comb += self.led.eq(~fsm.ongoing("IDLE"))
+
+            with m.State("IDLE"):
+                with m.If(button_up):
+                    m.d.sync += [
+                        start_pending.eq(1),
+                        start_at.eq(now),
+                    ]
+                    m.next = "TRAINING: WAIT"
+
+            with m.State("TRAINING: WAIT"):
+                # Falling edge.
+                with m.If(scl_last & ~self.scl_i):
+                    m.d.sync += [
+                        measure_ix.eq(0),
+                        *(m.eq(1) for m in measurements),
+                    ]
+                    m.next = "TRAINING: COUNT"
+                with m.If(button_up):
+                    m.next = "FISH"
+
+            with m.State("TRAINING: COUNT"):
+                with m.If(self.scl_i == scl_last):
+                    m.d.sync += measurements[measure_ix].eq(
+                        measurements[measure_ix] + 1
+                    )
+                with m.Else():
+                    if platform.simulation:
+                        m.d.comb += Assert(
+                            Mux(measure_ix[0] == 0, self.scl_i, ~self.scl_i)
+                        )
+                        # XXX This does things I truly do not anticipate in cxxsim.
+                        m.d.sync += Display(
+                            "measurement #{0:d} count: {1:d}",
+                            measure_ix,
+                            measurements[measure_ix],
+                        )
+                    with m.If(measure_ix == N_MEASUREMENTS - 1):
+                        m.d.sync += [
+                            measured_pending.eq(1),
+                            measured_at.eq(now),
+                        ]
+                        m.next = "STRETCH: WAIT"
+                    with m.Else():
+                        m.d.sync += measure_ix.eq(measure_ix + 1)
+                with m.If(button_up):
+                    m.next = "FISH"
+
+            with m.State("STRETCH: WAIT"):
+                # Stretching counting starts when we detect SCL go low: we
+                # register the number of additional cycles to be held after this
+                # one, which will equal zero on the cycle we need to relax.
+                #
+                #       |      |      |      |      |      |      |
+                # ___   |      |      |      |      |      |     _|
+                #    \  |      |      |      |      |      |    / |
+                #     \_|______|______|______|______|______|___/  |
+                #       |      |      |      |      |      |      |
+                #        =4     =3     =2     =1     =0     0
+                #
+                # The initial value is therefore the desired tLOW cycle count
+                # minus two.
+                #
+                # I'm choosing the sum of measurements[0]+[1] as the desired cycle count:
+                # this lets SCL rise at exactly the time it'd normally next fall.
+                with m.If(scl_last & ~self.scl_i):
+                    m.d.sync += timer_count.eq(sum(measurements[:2]) - 2)
+                    m.next = "LOW: HOLD"
+                with m.If(button_up):
+                    m.next = "FISH"
+
+            with m.State("LOW: HOLD"):
+                m.d.comb += self.scl_oe.eq(1)
+                m.d.sync += timer_count.eq(timer_count - 1)
+                with m.If(timer_count == 0):
+                    m.next = "LOW: FINISHED HOLD"
+                with m.If(button_up):
+                    m.next = "FISH"
+
+            with m.State("LOW: FINISHED HOLD"):
+                with m.If(self.scl_i):
+                    m.next = "STRETCH: WAIT"
+                with m.If(button_up):
+                    m.next = "FISH"
+
+            with m.State("FISH"):
+                m.d.sync += [
+                    finish_pending.eq(1),
+                    finish_at.eq(now),
+                ]
+                m.next = "IDLE"
+
+        # Each optional report source, if built, for the framer to drain.
+        telemetry: Optional[SyncFIFO] = None
+        histogram: Optional[Histogram] = None
+        transactions: Optional[Transactions] = None
+
+        if self._telemetry:
+            # While stretching, time every SCL period: tLOW from the falling
+            # edge until SCL is seen high again (so including our hold), tHIGH
+            # from then until the next falling edge, and how long we held.
+            # A period is complete, and sampled, at the falling edge that
+            # starts the next one.  All saturate rather than wrap.
+            t_low = Signal(16)
+            t_high = Signal(16)
+            t_hold = Signal(16)
+            sampling = Signal()
+
+            # Samples that found the buffer full, counted in the next one
+            # queued.
+            dropped = Signal(16)
+            sample_now = Signal()
+
+            m.submodules.telemetry = telemetry = SyncFIFO(
+                width=len(t_low) + len(t_high) + len(t_hold) + len(dropped),
+                depth=self._telemetry_depth,
+            )
+
+            def saturating_inc(counter: Signal):
+                with m.If(~counter.all()):
+                    m.d.sync += counter.eq(counter + 1)
+
+            with m.If(fsm.ongoing("LOW: HOLD")):
+                saturating_inc(t_low)
+                saturating_inc(t_hold)
+            with m.If(fsm.ongoing("LOW: FINISHED HOLD")):
+                saturating_inc(t_low)
+            with m.If(fsm.ongoing("STRETCH: WAIT")):
+                saturating_inc(t_high)
+                with m.If(scl_last & ~self.scl_i):
+                    m.d.comb += sample_now.eq(sampling)
+                    m.d.sync += [
+                        t_low.eq(1),
+                        t_high.eq(0),
+                        t_hold.eq(0),
+                        sampling.eq(1),
+                    ]
+            with m.If(
+                ~fsm.ongoing("STRETCH: WAIT")
+                & ~fsm.ongoing("LOW: HOLD")
+                & ~fsm.ongoing("LOW: FINISHED HOLD")
+            ):
+                m.d.sync += sampling.eq(0)
+
+            m.d.comb += [
+                telemetry.w_data.eq(Cat(t_low, t_high, t_hold, dropped)),
+                telemetry.w_en.eq(sample_now),
+            ]
+            with m.If(sample_now):
+                with m.If(telemetry.w_rdy):
+                    m.d.sync += dropped.eq(0)
+                with m.Else():
+                    saturating_inc(dropped)
+
+        if self._histogram:
+            # Dumps every interval, and whenever a stretching session ends.
+            m.submodules.histogram = histogram = Histogram(speed=self._speed)
+            m.d.comb += [
+                histogram.scl_i.eq(self.scl_i),
+                histogram.dump.eq(fsm.ongoing("FISH")),
+            ]
+
+        if self._transactions:
+            m.submodules.transactions = transactions = Transactions()
+            m.d.comb += [
+                transactions.scl_i.eq(self.scl_i),
+                transactions.sda_i.eq(self.sda_i),
+                transactions.hold.eq(self.scl_oe),
+            ]
+
+        with m.If(framer.rdy):
+            with m.If(start_pending):
+                m.d.comb += [
+                    framer.kind.eq(symbols.STRETCH_START),
+                    framer.payload.eq(
+                        Framer.pack(symbols.STRETCH_START, start_at, int(freq))
+                    ),
+                    framer.wr_en.eq(1),
+                ]
+                m.d.sync += start_pending.eq(0)
+            with m.Elif(measured_pending):
+                m.d.comb += [
+                    framer.kind.eq(symbols.STRETCH_MEASURED),
+                    framer.payload.eq(
+                        Framer.pack(
+                            symbols.STRETCH_MEASURED, *measurements, measured_at
+                        )
+                    ),
+                    framer.wr_en.eq(1),
+                ]
+                m.d.sync += measured_pending.eq(0)
+            if telemetry is not None:
+                with m.Elif(telemetry.r_rdy):
+                    m.d.comb += [
+                        framer.kind.eq(symbols.STRETCH_SAMPLE),
+                        framer.payload.eq(
+                            Framer.pack(
+                                symbols.STRETCH_SAMPLE,
+                                telemetry.r_data[:16],
+                                telemetry.r_data[16:32],
+                                telemetry.r_data[32:48],
+                                telemetry.r_data[48:],
+                            )
+                        ),
+                        framer.wr_en.eq(1),
+                        telemetry.r_en.eq(1),
+                    ]
+            if transactions is not None:
+                with m.Elif(transactions.valid):
+                    m.d.comb += [
+                        framer.kind.eq(transactions.kind),
+                        framer.payload.eq(transactions.payload),
+                        framer.wr_en.eq(1),
+                        transactions.ack.eq(1),
+                    ]
+            with m.Elif(finish_pending):
+                m.d.comb += [
+                    framer.kind.eq(symbols.STRETCH_FINISH),
+                    framer.payload.eq(Framer.pack(symbols.STRETCH_FINISH, finish_at)),
+                    framer.wr_en.eq(1),
+                ]
+                m.d.sync += finish_pending.eq(0)
+            if histogram is not None:
+                with m.Elif(histogram.valid):
+                    m.d.comb += [
+                        framer.kind.eq(histogram.kind),
+                        framer.payload.eq(histogram.payload),
+                        framer.wr_en.eq(1),
+                        histogram.ack.eq(1),
+                    ]
+
+        return m
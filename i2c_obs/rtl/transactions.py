@@ -0,0 +1,155 @@
+from typing import Final, Optional
+
+from amaranth import Cat, Const, Elaboratable, Module, Signal
+from amaranth.lib.fifo import SyncFIFO
+from amaranth.lib.wiring import Component, In, Out
+
+from ..platform import Platform
+from .uart import Framer, symbols
+
+__all__ = ["Transactions"]
+
+
+class Transactions(Component):
+    """
+    Decodes I2C transactions from SCL and SDA.
+
+    A transaction runs from a START to the STOP or repeated START that closes
+    it.  Bits are sampled as SCL rises, most significant first, and every
+    ninth is the ACK.  The first byte is the address; the rest are data.
+
+    Each transaction is queued as an I2C_TXN report, offered on kind and
+    payload while valid is high and taken by strobing ack.  If the queue is
+    full the transaction is dropped, and counted in the next one queued.  hold
+    should be high while we're stretching SCL; it's counted against the
+    transaction it falls in.
+    """
+
+    DEFAULT_DEPTH: Final[int] = 16
+
+    scl_i: In(1)
+    sda_i: In(1)
+    hold: In(1)
+
+    kind: Out(8)
+    payload: Out(symbols.MAX_PAYLOAD * 8)
+    valid: Out(1)
+    ack: In(1)
+
+    _depth: int
+
+    def __init__(self, *, depth: Optional[int] = None):
+        super().__init__()
+        self._depth = depth or self.DEFAULT_DEPTH
+
+    def elaborate(self, platform: Platform) -> Elaboratable:
+        m = Module()
+
+        # The bus idles high.
+        scl_last = Signal(reset=1)
+        sda_last = Signal(reset=1)
+        m.d.sync += [
+            scl_last.eq(self.scl_i),
+            sda_last.eq(self.sda_i),
+        ]
+        scl_high = scl_last & self.scl_i
+        start = scl_high & sda_last & ~self.sda_i
+        stop = scl_high & ~sda_last & self.sda_i
+        rise = ~scl_last & self.scl_i
+
+        active = Signal()
+        addressed = Signal()
+        shift = Signal(8)
+        bit = Signal(range(9))
+
+        addr_rw = Signal(8)
+        count = Signal(8)
+        first = Signal(8)
+        address_nack = Signal()
+        data_nack = Signal()
+        duration = Signal(32)
+        held = Signal(32)
+
+        def saturating_inc(counter: Signal):
+            with m.If(~counter.all()):
+                m.d.sync += counter.eq(counter + 1)
+
+        # Transactions dropped since the last one queued, which carries them.
+        dropped = Signal(16)
+
+        flags = Cat(address_nack, data_nack, start, Const(0, 5))
+        record = Cat(addr_rw, count, first, flags, duration, held, dropped)
+        m.submodules.fifo = fifo = SyncFIFO(width=len(record), depth=self._depth)
+
+        close = active & (start | stop)
+        m.d.comb += [
+            fifo.w_data.eq(record),
+            fifo.w_en.eq(close),
+        ]
+
+        with m.If(active):
+            saturating_inc(duration)
+            with m.If(self.hold):
+                saturating_inc(held)
+
+            with m.If(rise):
+                with m.If(bit == 8):
+                    m.d.sync += bit.eq(0)
+                    with m.If(~addressed):
+                        m.d.sync += [
+                            addr_rw.eq(shift),
+                            address_nack.eq(self.sda_i),
+                            addressed.eq(1),
+                        ]
+                    with m.Else():
+                        with m.If(count == 0):
+                            m.d.sync += first.eq(shift)
+                        saturating_inc(count)
+                        m.d.sync += data_nack.eq(self.sda_i)
+                with m.Else():
+                    m.d.sync += [
+                        shift.eq(Cat(self.sda_i, shift[:-1])),
+                        bit.eq(bit + 1),
+                    ]
+
+        with m.If(start):
+            m.d.sync += [
+                active.eq(1),
+                addressed.eq(0),
+                bit.eq(0),
+                addr_rw.eq(0),
+                count.eq(0),
+                first.eq(0),
+                address_nack.eq(0),
+                data_nack.eq(0),
+                duration.eq(1),
+                held.eq(0),
+            ]
+        with m.Elif(stop):
+            m.d.sync += active.eq(0)
+
+        with m.If(close):
+            with m.If(fifo.w_rdy):
+                m.d.sync += dropped.eq(0)
+            with m.Else():
+                saturating_inc(dropped)
+
+        m.d.comb += [
+            self.kind.eq(symbols.I2C_TXN),
+            self.payload.eq(
+                Framer.pack(
+                    symbols.I2C_TXN,
+                    fifo.r_data[:8],
+                    fifo.r_data[8:16],
+                    fifo.r_data[16:24],
+                    fifo.r_data[24:32],
+                    fifo.r_data[32:64],
+                    fifo.r_data[64:96],
+                    fifo.r_data[96:],
+                )
+            ),
+            self.valid.eq(fifo.r_rdy),
+            fifo.r_en.eq(self.ack),
+        ]
+
+        return m
@@ -1,60 +1,23 @@
-from typing import cast
+from typing import TYPE_CHECKING
 
-from amaranth import Elaboratable, Module
-from amaranth.lib.fifo import SyncFIFO
-from amaranth.lib.io import Pin
-from amaranth.lib.wiring import Component, Out
-from amaranth_stdio.serial import AsyncSerialTX
+from . import symbols
 
-from ...platform import Platform
+if TYPE_CHECKING:
+    from .framer import Framer
+    from .uart import UART
 
-__all__ = ["UART"]
+__all__ = ["UART", "Framer", "symbols"]
 
 
-class UART(Component):
-    wr_data: Out(8)
-    wr_en: Out(1)
+def __getattr__(name: str):
+    # symbols is plain Python and the debugger needs nothing else from here;
+    # the gateware is imported on first use.
+    if name == "Framer":
+        from .framer import Framer
 
-    _plat_uart: Pin
-    _baud: int
-    _fifo: SyncFIFO
+        return Framer
+    if name == "UART":
+        from .uart import UART
 
-    def __init__(self, plat_uart: Pin, *, baud: int = 9600):
-        self._plat_uart = plat_uart
-        self._baud = baud
-        super().__init__()
-        self._fifo = SyncFIFO(width=8, depth=16)
-
-    def elaborate(self, platform: Platform) -> Elaboratable:
-        m = Module()
-
-        freq = cast(int, platform.default_clk_frequency)
-
-        m.submodules.fifo = self._fifo
-        m.d.comb += [
-            self._fifo.w_data.eq(self.wr_data),
-            self._fifo.w_en.eq(self.wr_en),
-        ]
-
-        m.submodules.astx = astx = AsyncSerialTX(
-            divisor=int(freq // self._baud), pins=self._plat_uart
-        )
-        m.d.sync += [
-            astx.ack.eq(0),
-            self._fifo.r_en.eq(0),
-        ]
-
-        with m.FSM():
-            with m.State("IDLE"):
-                with m.If(astx.rdy & self._fifo.r_rdy):
-                    m.d.sync += [
-                        astx.data.eq(self._fifo.r_data),
-                        astx.ack.eq(1),
-                        self._fifo.r_en.eq(1),
-                    ]
-                    m.next = "START"
-
-            with m.State("START"):
-                m.next = "IDLE"
-
-        return m
+        return UART
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,118 @@
+from typing import Optional
+
+from amaranth import Cat, Const, Elaboratable, Module, Signal, Value
+from amaranth.lib.io import Pin
+from amaranth.lib.wiring import Component, In, Out
+
+from ...platform import Platform
+from . import symbols
+from .uart import UART
+
+__all__ = ["Framer"]
+
+
+class Framer(Component):
+    """
+    Sends reports over the UART, framed as described in symbols.
+
+    While rdy is high, strobe wr_en with kind set and the payload packed by
+    Framer.pack; the frame is then written to the UART a byte at a time,
+    waiting whenever its FIFO is full.
+    """
+
+    kind: Out(8)
+    payload: Out(symbols.MAX_PAYLOAD * 8)
+    wr_en: Out(1)
+
+    rdy: In(1)
+
+    _uart: UART
+
+    def __init__(self, plat_uart: Optional[Pin] = None, *, baud: Optional[int] = None):
+        super().__init__()
+        self._uart = UART(plat_uart, baud=baud)
+
+    @property
+    def uart(self) -> UART:
+        return self._uart
+
+    @staticmethod
+    def pack(kind: int, *values: Value) -> Value:
+        widths = symbols.FIELDS[kind]
+        assert len(values) == len(widths), f"{kind:#x} has {len(widths)} fields"
+        fields: list[Value] = []
+        for value, width in zip(values, widths):
+            value = Value.cast(value)
+            assert len(value) <= width * 8, f"{value!r} doesn't fit in {width} bytes"
+            fields.append(value)
+            if len(value) < width * 8:
+                fields.append(Const(0, width * 8 - len(value)))
+        return Cat(*fields)
+
+    def elaborate(self, platform: Platform) -> Elaboratable:
+        m = Module()
+
+        m.submodules.uart = uart = self._uart
+
+        kind = Signal.like(self.kind)
+        payload = Signal.like(self.payload)
+        remaining = Signal(range(symbols.MAX_PAYLOAD + 1))
+        check = Signal(8)
+
+        length = Signal.like(remaining)
+        with m.Switch(self.kind):
+            for k, widths in symbols.FIELDS.items():
+                with m.Case(k):
+                    m.d.comb += length.eq(sum(widths))
+
+        def write(data: Value):
+            m.d.comb += [
+                uart.wr_data.eq(data),
+                uart.wr_en.eq(1),
+            ]
+            m.d.sync += check.eq(check ^ data)
+
+        with m.FSM():
+            with m.State("IDLE"):
+                m.d.comb += self.rdy.eq(1)
+                with m.If(self.wr_en):
+                    m.d.sync += [
+                        kind.eq(self.kind),
+                        payload.eq(self.payload),
+                        remaining.eq(length),
+                        check.eq(0),
+                    ]
+                    m.next = "KIND"
+
+            with m.State("KIND"):
+                with m.If(uart.wr_rdy):
+                    write(kind)
+                    m.next = "LENGTH"
+
+            with m.State("LENGTH"):
+                with m.If(uart.wr_rdy):
+                    write(remaining)
+                    with m.If(remaining == 0):
+                        m.next = "CHECKSUM"
+                    with m.Else():
+                        m.next = "PAYLOAD"
+
+            with m.State("PAYLOAD"):
+                with m.If(uart.wr_rdy):
+                    write(payload[:8])
+                    m.d.sync += [
+                        payload.eq(payload >> 8),
+                        remaining.eq(remaining - 1),
+                    ]
+                    with m.If(remaining == 1):
+                        m.next = "CHECKSUM"
+
+            with m.State("CHECKSUM"):
+                with m.If(uart.wr_rdy):
+                    m.d.comb += [
+                        uart.wr_data.eq(check),
+                        uart.wr_en.eq(1),
+                    ]
+                    m.next = "IDLE"
+
+        return m
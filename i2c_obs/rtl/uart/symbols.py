@@ -1,3 +1,85 @@
-STRETCH_START = 0xFF
-STRETCH_FINISH = 0xFE
-STRETCH_MEASURED = 0xFD
+from functools import reduce
+from operator import xor
+from typing import Iterable
+
+# Everything the observer reports is framed as
+#
+#   kind, length, payload..., checksum
+#
+# where kind is one of the values below, length is the number of payload
+# bytes, the payload is the kind's fields packed little-endian with the
+# widths (in bytes) given in FIELDS, and checksum is the XOR of every
+# preceding byte in the frame.  Kinds live at the top of the byte range so a
+# decoder that loses its place can resynchronise on the next one.
+#
+# Session reports carry a timestamp: the value of a free-running counter of
+# TIMESTAMP_BYTES bytes, in system clock cycles, latched as the event happens.
+# STRETCH_START also carries the system clock frequency in Hz, so the decoder
+# can turn cycles into time.  The counter wraps, after about 68 days at 48MHz;
+# the decoder takes the time between reports modulo its width.
+STRETCH_START = 0xF0
+# tLOW_0, tHIGH_0, tLOW_1 in cycles, as measured during training, then the
+# timestamp.
+STRETCH_MEASURED = 0xF1
+STRETCH_FINISH = 0xF2
+# With telemetry, one per SCL period while stretching: tLOW, tHIGH and our
+# hold in cycles, then how many samples were dropped since the last one.
+STRETCH_SAMPLE = 0xF3
+# With the histogram, a dump is one of these per non-zero bin: channel (0 for
+# tLOW, 1 for tHIGH), bin index, count.  The last bin also counts everything
+# longer.
+HISTOGRAM_BIN = 0xF4
+HISTOGRAM_BINS = 64
+# ... then this, closing the dump: log2 of the bin width in cycles, and how
+# many edges went unbinned while dumping.
+HISTOGRAM_END = 0xF5
+# With transaction decoding, one per I2C transaction, closed by a STOP or a
+# repeated START: the address byte (address << 1 | R/W), how many data bytes
+# followed it (saturating), the first of them, I2C_* flags, the
+# transaction's length and how long we held SCL during it in cycles, then how
+# many transactions were dropped since the last one.
+I2C_TXN = 0xF6
+I2C_ADDRESS_NACK = 0x01
+I2C_DATA_NACK = 0x02
+I2C_REPEATED_START = 0x04
+
+TIMESTAMP_BYTES = 6
+
+FIELDS: dict[int, tuple[int, ...]] = {
+    STRETCH_START: (TIMESTAMP_BYTES, 4),
+    STRETCH_MEASURED: (2, 2, 2, TIMESTAMP_BYTES),
+    STRETCH_FINISH: (TIMESTAMP_BYTES,),
+    STRETCH_SAMPLE: (2, 2, 2, 2),
+    HISTOGRAM_BIN: (1, 1, 2),
+    HISTOGRAM_END: (1, 2),
+    I2C_TXN: (1, 1, 1, 1, 4, 4, 2),
+}
+
+# Bytes of framing around each payload: kind, length and checksum.
+OVERHEAD = 3
+MAX_PAYLOAD = max(sum(widths) for widths in FIELDS.values())
+
+
+def checksum(data: Iterable[int]) -> int:
+    return reduce(xor, data, 0)
+
+
+def encode(kind: int, *values: int) -> bytes:
+    widths = FIELDS[kind]
+    assert len(values) == len(widths), f"{kind:#x} has {len(widths)} fields"
+    frame = bytearray([kind, sum(widths)])
+    for value, width in zip(values, widths):
+        frame += value.to_bytes(width, "little")
+    frame.append(checksum(frame))
+    return bytes(frame)
+
+
+# Link rates both ends agree on.  The iCEBreaker's FTDI handles all of these;
+# 1M and 3M divide its 12MHz clock exactly.
+VALID_BAUDS = [
+    9600,
+    115_200,
+    1_000_000,
+    3_000_000,
+]
+DEFAULT_BAUD = 1_000_000
@@ -0,0 +1,48 @@
+from amaranth.sim import Settle
+
+from ... import sim
+from . import Framer, symbols
+
+REPORTS = [
+    (symbols.STRETCH_START, 0x123456789ABC, 12_000_000),
+    (symbols.STRETCH_MEASURED, 1_234, 567, 1_235, 0x123456789F00),
+    (symbols.STRETCH_MEASURED, 0xFFF, 0x001, 0x100, 0xFFFFFFFFFFFF),
+    (symbols.STRETCH_FINISH, 0),
+]
+
+
+class TestFramer(sim.TestCase):
+    SIM_CLOCK = 1 / 12e6
+
+    @sim.args(baud=1_000_000)
+    @sim.args(baud=3_000_000)
+    def test_sim_framer(self, framer: Framer, baud: int) -> sim.Procedure:
+        uart = framer.uart
+        pending = list(REPORTS)
+        written = bytearray()
+        cycles = 0
+
+        # Offer each report as soon as the framer is ready for it, and record
+        # every byte it hands to the UART until the line goes quiet.
+        while pending or not (yield framer.rdy) or (yield uart.busy):
+            if pending and (yield framer.rdy):
+                kind, *values = pending.pop(0)
+                payload = symbols.encode(kind, *values)[2:-1]
+                yield framer.kind.eq(kind)
+                yield framer.payload.eq(int.from_bytes(payload, "little"))
+                yield framer.wr_en.eq(1)
+            else:
+                yield framer.wr_en.eq(0)
+            yield
+            yield Settle()
+            cycles += 1
+            if (yield uart.wr_en):
+                written.append((yield uart.wr_data))
+
+        expected = b"".join(symbols.encode(*report) for report in REPORTS)
+        self.assertEqual(bytes(written), expected)
+
+        # Back-to-back reports should keep the link saturated.
+        reports_per_second = len(REPORTS) / (cycles * sim.clock())
+        line_rate = baud / 10 / (len(expected) / len(REPORTS))
+        self.assertGreater(reports_per_second, line_rate * 0.95)
@@ -0,0 +1,50 @@
+from amaranth.sim import Settle
+
+from ... import sim
+from . import UART, symbols
+
+# A whole stretching session's worth of reports.
+REPORT = [
+    *symbols.encode(symbols.STRETCH_START, 0x1000, 12_000_000),
+    *symbols.encode(symbols.STRETCH_MEASURED, 0x4B4, 0x4B4, 0x4B4, 0x3000),
+    *symbols.encode(symbols.STRETCH_FINISH, 0x123000),
+]
+
+
+class TestUART(sim.TestCase):
+    SIM_CLOCK = 1 / 12e6
+
+    @sim.args(baud=9600)
+    @sim.args(baud=115_200)
+    @sim.args(baud=1_000_000)
+    @sim.args(baud=3_000_000)
+    def test_sim_report_throughput(self, uart: UART, baud: int) -> sim.Procedure:
+        # Queue a whole session's reports as fast as the UART takes them, as the
+        # framer does, and check the link drains them at the line rate: 10
+        # bits per byte, no gaps between bytes.
+        cycles = 0
+        for b in REPORT:
+            yield uart.wr_data.eq(b)
+            yield uart.wr_en.eq(1)
+            yield Settle()
+            while not (yield uart.wr_rdy):
+                cycles += 1
+                yield
+                yield Settle()
+            cycles += 1
+            yield
+        yield uart.wr_en.eq(0)
+        yield
+
+        cycles += 1
+        while (yield uart.busy):
+            cycles += 1
+            yield
+
+        bits_per_second = len(REPORT) * 10 / (cycles * sim.clock())
+        self.assertGreater(
+            bits_per_second,
+            baud * 0.95,
+            f"{len(REPORT)} bytes took {cycles} cycles at {baud} baud",
+        )
+        self.assertLess(bits_per_second, baud * (1 + UART.MAX_BAUD_ERROR))
@@ -0,0 +1,75 @@
+from typing import Final, Optional, cast
+
+from amaranth import Elaboratable, Module
+from amaranth.lib.fifo import SyncFIFO
+from amaranth.lib.io import Pin
+from amaranth.lib.wiring import Component, In, Out
+from amaranth_stdio.serial import AsyncSerialTX
+
+from ...platform import Platform
+from . import symbols
+
+__all__ = ["UART"]
+
+
+class UART(Component):
+    DEFAULT_BAUD: Final[int] = symbols.DEFAULT_BAUD
+    SIM_BAUD: Final[int] = 9600
+    # Tolerable difference between the requested and the achieved baud rate.
+    MAX_BAUD_ERROR: Final[float] = 0.02
+
+    wr_data: Out(8)
+    wr_en: Out(1)
+
+    wr_rdy: In(1)
+    busy: In(1)
+
+    _plat_uart: Optional[Pin]
+    _baud: int
+    _fifo: SyncFIFO
+
+    def __init__(self, plat_uart: Optional[Pin] = None, *, baud: Optional[int] = None):
+        self._plat_uart = plat_uart
+        self._baud = baud or 0
+        super().__init__()
+        self._fifo = SyncFIFO(width=8, depth=16)
+
+    @property
+    def baud(self) -> int:
+        return self._baud
+
+    def elaborate(self, platform: Platform) -> Elaboratable:
+        self._baud = self._baud or (
+            self.SIM_BAUD if platform.simulation else self.DEFAULT_BAUD
+        )
+
+        m = Module()
+
+        freq = cast(int, platform.default_clk_frequency)
+        divisor = round(freq / self._baud)
+        assert divisor >= 1, f"cannot run UART at {self._baud} baud with {freq}Hz clock"
+        error = abs(freq / divisor - self._baud) / self._baud
+        assert error <= self.MAX_BAUD_ERROR, (
+            f"cannot run UART at {self._baud} baud with {freq}Hz clock; "
+            f"divisor {divisor} is off by {error:.1%}"
+        )
+
+        m.submodules.fifo = self._fifo
+        m.d.comb += [
+            self._fifo.w_data.eq(self.wr_data),
+            self._fifo.w_en.eq(self.wr_en),
+            self.wr_rdy.eq(self._fifo.w_rdy),
+        ]
+
+        m.submodules.astx = astx = AsyncSerialTX(divisor=divisor, pins=self._plat_uart)
+
+        # Hand bytes over in the same cycle the transmitter becomes ready, so
+        # a queued burst goes out back-to-back at the full line rate.
+        m.d.comb += [
+            astx.data.eq(self._fifo.r_data),
+            astx.ack.eq(self._fifo.r_rdy),
+            self._fifo.r_en.eq(astx.rdy),
+            self.busy.eq(self._fifo.r_rdy | ~astx.rdy),
+        ]
+
+        return m
@@ -0,0 +1,153 @@
+from pathlib import Path
+from typing import Callable, Final, NamedTuple, NoReturn
+
+from amaranth.sim import Settle
+
+from . import sim
+from .rtl import Top
+
+__all__ = ["ScenarioError", "Step", "Scenario", "scenarios"]
+
+
+class ScenarioError(Exception):
+    pass
+
+
+class Step(NamedTuple):
+    line: int
+    op: str
+    # For "stretch", the fewest and most cycles expected; otherwise both are
+    # the one value.
+    low: int
+    high: int
+
+    def __str__(self):
+        value = str(self.low) if self.low == self.high else f"{self.low}..{self.high}"
+        return f"{self.op} {value}"
+
+
+class Scenario:
+    """
+    Stimulus for Top and the SCL stretching we expect in response, read from
+    a scenario file.  The same files drive the Python tests and the cxxsim
+    harness (cxxsim/main.cc), which must agree on what they mean.
+
+    A file holds any number of scenarios, one command per line; "#" starts
+    a comment.
+
+        scenario NAME   start a scenario; the design is reset
+        scl 0|1         drive scl_i
+        sda 0|1         drive sda_i
+        switch 0|1      drive switch
+        wait N          run N cycles
+        stretch N       run cycles while scl_oe is high, expecting N of them
+        stretch N..M    ... expecting N to M of them, inclusive
+        oe 0|1          expect scl_oe to be this now
+
+    Inputs are all low at the start of each scenario.
+    """
+
+    INPUTS: Final[dict[str, str]] = {
+        "scl": "scl_i",
+        "sda": "sda_i",
+        "switch": "switch",
+    }
+
+    name: str
+    steps: list[Step]
+
+    def __init__(self, name: str, steps: list[Step]):
+        self.name = name
+        self.steps = steps
+
+    def __repr__(self):
+        # Also names the sim tests generated for each scenario.
+        return f"<{self.name}>"
+
+    @classmethod
+    def parse(cls, text: str, *, source: str = "<scenario>") -> list["Scenario"]:
+        scenarios: list[Scenario] = []
+        for line, raw in enumerate(text.splitlines(), start=1):
+            words = raw.split("#", 1)[0].split()
+            if not words:
+                continue
+
+            def fail(message: str) -> NoReturn:
+                raise ScenarioError(f"{source}:{line}: {message}")
+
+            match words:
+                case ["scenario", name]:
+                    if any(s.name == name for s in scenarios):
+                        fail(f"scenario {name!r} is already defined")
+                    scenarios.append(cls(name, []))
+                    continue
+                case [op, value] if op in cls.INPUTS or op == "oe":
+                    if value not in ("0", "1"):
+                        fail(f"{op} takes 0 or 1, not {value!r}")
+                    low = high = int(value)
+                case ["wait", value] if value.isdigit():
+                    low = high = int(value)
+                case ["stretch", value]:
+                    low_s, _, high_s = value.partition("..")
+                    high_s = high_s or low_s
+                    if not (low_s.isdigit() and high_s.isdigit()):
+                        fail(f"stretch takes N or N..M, not {value!r}")
+                    low, high = int(low_s), int(high_s)
+                    if low > high:
+                        fail(f"stretch range {value!r} is empty")
+                case _:
+                    fail(f"can't parse {raw.strip()!r}")
+            if not scenarios:
+                fail("expected a scenario before any steps")
+            scenarios[-1].steps.append(Step(line, words[0], low, high))
+        return scenarios
+
+    @classmethod
+    def load(cls, file: Path) -> list["Scenario"]:
+        return cls.parse(file.read_text(), source=str(file))
+
+    def run(self, dut: Top) -> sim.Generator[list[str]]:
+        """
+        Runs the scenario against a freshly reset dut, returning a message
+        for every expectation that wasn't met.
+        """
+        failures: list[str] = []
+        for step in self.steps:
+            match step.op:
+                case "wait":
+                    for _ in range(step.low):
+                        yield
+                case "stretch":
+                    yield Settle()
+                    actual = 0
+                    while (yield dut.scl_oe):
+                        actual += 1
+                        yield
+                        yield Settle()
+                    if not step.low <= actual <= step.high:
+                        failures.append(
+                            f"{self.name}: line {step.line}: expected {step}, "
+                            f"got {actual} stretched cycles"
+                        )
+                case "oe":
+                    yield Settle()
+                    actual = yield dut.scl_oe
+                    if actual != step.low:
+                        failures.append(
+                            f"{self.name}: line {step.line}: expected {step}, "
+                            f"got oe {actual}"
+                        )
+                case op:
+                    yield getattr(dut, self.INPUTS[op]).eq(step.low)
+        return failures
+
+
+def scenarios(file: Path):
+    """Runs a sim test once for each scenario in file, passed as scenario."""
+
+    def wrapper(sim_test: Callable[..., sim.Procedure]) -> Callable[..., sim.Procedure]:
+        for scenario in Scenario.load(file):
+            sim.args(scenario=scenario)(sim_test)
+        return sim_test
+
+    return wrapper
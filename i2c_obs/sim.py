@@ -1,19 +1,24 @@
 import inspect
 import os
 import re
+import sys
+import time
 import typing
 import unittest
 from contextlib import contextmanager
-from typing import Any, Callable, Iterator, Optional, Self, Tuple
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, Callable, Iterator, NamedTuple, Optional, TextIO, Tuple
 
-from amaranth import Elaboratable, Signal
-from amaranth.hdl.ast import Operator, Statement
-from amaranth.hdl.ir import Fragment
+from amaranth import Elaboratable, Signal, Value
+from amaranth.hdl.ast import SignalDict, Statement
+from amaranth.hdl.ir import Fragment, Instance
 from amaranth.lib.fifo import SyncFIFO
 from amaranth.sim import Delay, Settle, Simulator
 
 from .base import path
 from .platform import Platform
+from .rtl.common.counter import Counting
 
 __all__ = [
     "clock",
@@ -26,6 +31,17 @@ __all__ = [
 ]
 
 _active_clock = 1 / 12e6
+_build_dir = path("build")
+
+VCD_MODES = ["never", "failure", "always"]
+_vcd_mode = os.getenv("I2C_OBS_VCD", "failure")
+_vcd_signals = [p for p in os.getenv("I2C_OBS_VCD_SIGNALS", "").split(",") if p]
+_elaboration_cache = os.getenv("I2C_OBS_ELABORATION_CACHE", "1") != "0"
+
+BACKENDS = ["pysim", "cxxrtl"]
+# cxxrtl compiles each design to native code and drives it through the C API;
+# see i2c_obs.cxxrtl.  It needs Yosys and a C++ compiler, and writes no VCDs.
+_backend = os.getenv("I2C_OBS_BACKEND", "pysim")
 
 
 def clock() -> float:
@@ -47,7 +63,107 @@ def override_clock(new_clock: Optional[float]) -> Iterator[None]:
         _active_clock = old_sim_clock
 
 
-ValueLike = Signal | Delay | Settle | Statement | Operator | None
+def vcd() -> tuple[str, list[str]]:
+    """The VCD mode and signal patterns; see set_vcd."""
+    return _vcd_mode, _vcd_signals
+
+
+def set_vcd(mode: str, signals: list[str]):
+    """
+    When tests write VCDs: "never", on "failure" (by re-running the failed
+    test with tracing on), or "always".  If signals is non-empty, VCDs keep
+    only the signals whose dotted names match one of its fnmatch patterns.
+    """
+    global _vcd_mode, _vcd_signals
+    assert mode in VCD_MODES, f"VCD mode must be one of {VCD_MODES}"
+    _vcd_mode = mode
+    _vcd_signals = signals
+
+
+class _VCDFilter:
+    """
+    A file for Amaranth's VCD writer, which traces every signal in the design,
+    passing on to file only the signals whose dotted names match one of
+    patterns and the changes to them.
+    """
+
+    _file: TextIO
+    _patterns: list[str]
+    _keep: set[str]
+    _scope: list[str]
+    _in_header: bool
+    _partial: str
+
+    def __init__(self, file: TextIO, patterns: list[str]):
+        self._file = file
+        self._patterns = patterns
+        self._keep = set()
+        self._scope = []
+        self._in_header = True
+        self._partial = ""
+
+    def write(self, text: str) -> int:
+        *lines, self._partial = (self._partial + text).split("\n")
+        self._file.writelines(line + "\n" for line in lines if self._wanted(line))
+        return len(text)
+
+    def _wanted(self, line: str) -> bool:
+        words = line.split()
+        if self._in_header:
+            match words:
+                case ["$scope", _, name, "$end"]:
+                    self._scope.append(name)
+                case ["$upscope", "$end"]:
+                    self._scope.pop()
+                case ["$var", _, _, ident, name, *_]:
+                    # Everything's under the testbench's "bench" scope.
+                    dotted = ".".join([*self._scope[1:], name])
+                    if not any(fnmatch(dotted, p) for p in self._patterns):
+                        return False
+                    self._keep.add(ident)
+                case ["$enddefinitions", "$end"]:
+                    self._in_header = False
+                case [("$comment" | "$date" | "$timescale" | "$version"), *_] | []:
+                    pass
+                case _:
+                    raise AssertionError(f"unexpected VCD header line {line!r}")
+            return True
+        if not words or words[0].startswith(("#", "$")):
+            return True
+        if len(words) == 1:
+            return words[0][1:] in self._keep
+        return words[1] in self._keep
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self.write("\n" if self._partial else "")
+        self._file.close()
+
+
+def backend() -> str:
+    return _backend
+
+
+def set_backend(backend: str):
+    global _backend
+    assert backend in BACKENDS, f"backend must be one of {BACKENDS}"
+    _backend = backend
+
+
+def build_dir() -> Path:
+    return _build_dir
+
+
+def set_build_dir(new_build_dir: Path):
+    """Where VCDs are written; parallel test workers each get their own."""
+    global _build_dir
+    new_build_dir.mkdir(parents=True, exist_ok=True)
+    _build_dir = new_build_dir
+
+
+ValueLike = Value | Delay | Settle | Statement | None
 
 T = typing.TypeVar("T")
 Generator = typing.Generator[ValueLike, bool | int, T]
@@ -58,7 +174,194 @@ Kwargs = dict[str, Any]
 SimArgs = Tuple[Args, Kwargs]
 
 
+class ElaborationStats(NamedTuple):
+    designs: int
+    hits: int
+    # Seconds spent elaborating each distinct design once, and the seconds
+    # that elaborating it again for every other test would have taken.
+    spent: float
+    saved: float
+
+
+class _Elaborated(NamedTuple):
+    dut: Elaboratable
+    fragment: Fragment
+    # Its Counters, by the signal holding each one's count.
+    counters: SignalDict
+    seconds: float
+
+
+_elaborated: dict[tuple[Any, ...], _Elaborated] = {}
+_elaboration_hits = 0
+_elaboration_saved = 0.0
+
+
+def _source_stamp() -> tuple[tuple[str, int], ...]:
+    # A design can depend on any of our modules, so a change to any of them
+    # on disk invalidates every cached design.
+    stamp: list[tuple[str, int]] = []
+    for name, module in list(sys.modules.items()):
+        file = getattr(module, "__file__", None)
+        if (name == "i2c_obs" or name.startswith("i2c_obs.")) and file:
+            try:
+                stamp.append((file, os.stat(file).st_mtime_ns))
+            except OSError:
+                pass
+    return tuple(sorted(stamp))
+
+
+def _elaborate_new(
+    dutc: Callable[..., Elaboratable],
+    dutc_args: Args,
+    dutc_kwargs: Kwargs,
+    platform: Platform,
+) -> _Elaborated:
+    started = time.perf_counter()
+    # The platform lives as long as the test class; only this design's
+    # Counters are wanted.
+    platform.counters = []
+    dut = dutc(*dutc_args, **dutc_kwargs)
+    fragment = Fragment.get(dut, platform)
+    counters = SignalDict(platform.counters)
+    platform.counters = []
+    return _Elaborated(dut, fragment, counters, time.perf_counter() - started)
+
+
+def _elaborate(
+    dutc: Callable[..., Elaboratable],
+    dutc_args: Args,
+    dutc_kwargs: Kwargs,
+    platform: Platform,
+) -> _Elaborated:
+    """
+    Constructs and elaborates the design, or reuses the one made for an
+    earlier test with the same class, arguments, clock and platform.
+    """
+    global _elaboration_hits, _elaboration_saved
+
+    if not _elaboration_cache:
+        return _elaborate_new(dutc, dutc_args, dutc_kwargs, platform)
+
+    # The platform is keyed by its type alone: each test class has its own
+    # instance, and its repr is only its address.
+    key = (
+        dutc,
+        repr(dutc_args),
+        repr(sorted((k, v) for k, v in dutc_kwargs.items() if k != "platform")),
+        clock(),
+        type(platform).__name__,
+        _source_stamp(),
+    )
+    elaborated = _elaborated.get(key)
+    if elaborated is None:
+        elaborated = _elaborate_new(dutc, dutc_args, dutc_kwargs, platform)
+        _elaborated[key] = elaborated
+    else:
+        _elaboration_hits += 1
+        _elaboration_saved += elaborated.seconds
+    return elaborated
+
+
+def elaboration_cached() -> bool:
+    """Whether tests share elaborated designs; I2C_OBS_ELABORATION_CACHE=0 stops it."""
+    return _elaboration_cache
+
+
+def elaboration_stats() -> ElaborationStats:
+    return ElaborationStats(
+        len(_elaborated),
+        _elaboration_hits,
+        sum(e.seconds for e in _elaborated.values()),
+        _elaboration_saved,
+    )
+
+
+def _sync_state(fragment: Fragment) -> list[Value]:
+    if isinstance(fragment, Instance) and fragment.type == "$mem_v2":
+        # A memory's words only change through its write ports, and CXXRTL
+        # doesn't expose them as signals, so the ports stand in for them.
+        return [
+            fragment.named_ports[port][0]
+            for port in ["RD_DATA", "WR_EN", "WR_ADDR", "WR_DATA"]
+        ]
+    signals: list[Value] = list(fragment.drivers.get("sync", []))
+    for subfragment, _ in fragment.subfragments:
+        signals += _sync_state(subfragment)
+    return signals
+
+
 class TestCase(unittest.TestCase):
+    # Consecutive cycles the design must sit unchanged, but for its Counters,
+    # before fast_forward skips ahead.
+    FAST_FORWARD_STEADY_CYCLES: int = 3
+
+    _sim_fragment: Fragment
+    _sim_counters: SignalDict
+
+    def fast_forward(self, interval: float) -> Procedure:
+        """
+        Runs the design for as many cycles as yielding Delay(interval) would,
+        but skips ahead through stretches where nothing happens except
+        Counters counting.
+
+        A stretch like that starts once FAST_FORWARD_STEADY_CYCLES cycles
+        have passed with no change to any sync state other than the
+        Counters' counts, and no change to their en, half and full.  The rest
+        of the design then sees the same thing every cycle, and does the same
+        nothing, until some Counter reaches half or full.  So the counts are
+        advanced straight to the first of those, and simulation continues
+        from there.  This relies on the inputs staying put meanwhile, which
+        they do: the procedure that called this drives them.
+
+        The counts are written directly, bypassing the Counters' own logic;
+        only Counters, whose next count depends on nothing but en, full and
+        the count, are skipped this way.
+        """
+        cycles = round(interval / clock())
+        counters: list[tuple[Signal, Counting]] = []
+        watched: list[Value] = []
+        for signal in _sync_state(self._sim_fragment):
+            if isinstance(signal, Signal) and signal in self._sim_counters:
+                counting = self._sim_counters[signal]
+                counters.append((signal, counting))
+                watched += [counting.en, counting.half, counting.full]
+            else:
+                watched.append(signal)
+
+        before: Optional[list[int]] = None
+        steady = 0
+        while cycles > 0:
+            yield Settle()
+            now: list[int] = []
+            for signal in watched:
+                now.append((yield signal))
+            steady = steady + 1 if now == before else 0
+            before = now
+
+            jump = cycles if steady >= self.FAST_FORWARD_STEADY_CYCLES else 0
+            counts: list[tuple[Signal, int]] = []
+            for signal, counting in counters:
+                if not jump:
+                    break
+                if not (yield counting.en) or (yield counting.full):
+                    continue
+                count = yield signal
+                # Up to, not including, the cycle half or full is seen; never
+                # past full, where the Counter wraps to zero.
+                target = (
+                    counting.half_at if count < counting.half_at else counting.full_at
+                )
+                jump = max(0, min(jump, target - count))
+                counts.append((signal, count))
+            if counts and jump > 0:
+                for signal, count in counts:
+                    yield signal.eq(count + jump)
+                cycles -= jump
+                continue
+
+            yield
+            cycles -= 1
+
     def __init_subclass__(cls) -> None:
         super().__init_subclass__()
 
@@ -70,7 +373,7 @@ class TestCase(unittest.TestCase):
     def _wrap_test(
         cls,
         name: str,
-        sim_test: Callable[[Self, Elaboratable], Procedure],
+        sim_test: Callable[..., Procedure],
     ) -> None:
         sig = inspect.signature(sim_test)
         assert len(sig.parameters) >= 2
@@ -111,32 +414,68 @@ class TestCase(unittest.TestCase):
 
             @override_clock(getattr(cls, "SIM_CLOCK", None))
             def wrapper(self: TestCase, target: str, sim_args: SimArgs):
-                dutc_args, dutc_kwargs = sim_args
-                dut = dutc(*dutc_args, **dutc_kwargs)
+                dutc_args, all_kwargs = sim_args
+                # Arguments the DUT doesn't take are for the test alone.
+                dutc_kwargs = {
+                    k: v for k, v in all_kwargs.items() if k in dutc_sig.parameters
+                }
+                for k in all_kwargs.keys() - dutc_kwargs.keys():
+                    assert k in sig.parameters, f"neither DUT nor test takes {k!r}"
+                elaborated = _elaborate(dutc, dutc_args, dutc_kwargs, platform)
+                dut, fragment = elaborated.dut, elaborated.fragment
+                self._sim_fragment = fragment
+                self._sim_counters = elaborated.counters
 
                 def bench() -> Procedure:
                     sim_test_kwargs = {}
                     sim_test_sig = inspect.signature(sim_test)
-                    for arg_name, arg_value in dutc_kwargs.items():
+                    for arg_name, arg_value in all_kwargs.items():
                         if arg_name in sim_test_sig.parameters:
                             sim_test_kwargs[arg_name] = arg_value
                     yield from sim_test(self, dut, **sim_test_kwargs)
 
-                sim = Simulator(Fragment.get(dut, platform))
-                sim.add_clock(clock())
-                sim.add_sync_process(bench)
-
-                vcd_path = path(f"build/{cls.__name__}.{target}.vcd")
-                sim_exc = None
-                with sim.write_vcd(str(vcd_path)):
-                    try:
+                def simulate(vcd_path: Optional[Path]):
+                    sim = Simulator(fragment)
+                    sim.add_clock(clock())
+                    sim.add_sync_process(bench)
+                    if vcd_path is None:
+                        sim.run()
+                        return
+                    vcd_file = open(vcd_path, "w")
+                    if _vcd_signals:
+                        vcd_file = _VCDFilter(vcd_file, _vcd_signals)
+                    with sim.write_vcd(vcd_file):
                         sim.run()
-                    except AssertionError as exc:
-                        sim_exc = exc
 
-                if sim_exc is not None:
+                if _backend == "cxxrtl":
+                    from .cxxrtl import Model
+
+                    with Model.of(dut, fragment) as model:
+                        model.run(bench(), period=clock())
+                    return
+
+                vcd_path = _build_dir / f"{cls.__name__}.{target}.vcd"
+                if _vcd_mode == "always":
+                    try:
+                        simulate(vcd_path)
+                    except AssertionError:
+                        print("\nFailing VCD at: ", vcd_path)
+                        raise
+                    return
+
+                try:
+                    simulate(None)
+                except AssertionError:
+                    if _vcd_mode == "never":
+                        raise
+                    # Simulation is deterministic, so a second run with
+                    # tracing fails the same way.
+                    try:
+                        simulate(vcd_path)
+                    except AssertionError:
+                        pass
                     print("\nFailing VCD at: ", vcd_path)
-                    raise sim_exc
+                    raise
 
             def proxy(
                 self: TestCase,
@@ -1,7 +1,19 @@
+import io
+import multiprocessing
+import os
 import sys
+import time
+import unittest
 from argparse import ArgumentParser, Namespace
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from multiprocessing.sharedctypes import Synchronized
 from pathlib import Path
-from unittest import TestLoader, TextTestRunner
+from typing import Iterator, NamedTuple
+from unittest import TestLoader, TestSuite, TextTestRunner
+
+from . import sim
+from .base import path
 
 __all__ = ["add_main_arguments"]
 
@@ -13,12 +25,198 @@ def add_main_arguments(parser: ArgumentParser):
         nargs="?",
         help="run tests from a specific subpackage",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="run tests across this many worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sim.BACKENDS,
+        default=os.getenv("I2C_OBS_BACKEND", "pysim"),
+        help="simulate with Amaranth's Python simulator or a CXXRTL-compiled "
+        "model (default: $I2C_OBS_BACKEND or pysim)",
+    )
+    parser.add_argument(
+        "--vcd",
+        choices=sim.VCD_MODES,
+        default=os.getenv("I2C_OBS_VCD", "failure"),
+        help="when to write VCDs; on failure, the test is re-run with tracing "
+        "(default: $I2C_OBS_VCD or failure)",
+    )
+    parser.add_argument(
+        "--vcd-signals",
+        metavar="PATTERN,...",
+        default=os.getenv("I2C_OBS_VCD_SIGNALS", ""),
+        help="only trace signals whose dotted names match these patterns, "
+        "e.g. 'top.scl_*,top.framer.*' (default: $I2C_OBS_VCD_SIGNALS or all)",
+    )
 
 
 def main(args: Namespace):
+    vcd_signals = [p for p in args.vcd_signals.split(",") if p]
+    sim.set_backend(args.backend)
+    sim.set_vcd(args.vcd, vcd_signals)
+
     package = "i2c_obs"
     if args.subpkg:
         package += f".{args.subpkg}"
     suite = TestLoader().discover(package, top_level_dir=Path(__file__).parent.parent)
+    if args.jobs > 1:
+        sys.exit(
+            not _run_parallel(suite, args.jobs, args.backend, args.vcd, vcd_signals)
+        )
     result = TextTestRunner(verbosity=2).run(suite)
+    _report_elaboration(sim.elaboration_stats())
     sys.exit(not result.wasSuccessful())
+
+
+def _report_elaboration(stats: sim.ElaborationStats):
+    print(
+        f"elaboration cache: {stats.designs} designs elaborated in "
+        f"{stats.spent:.2f}s, {stats.hits} reuses saved {stats.saved:.2f}s",
+        file=sys.stderr,
+    )
+
+
+class _Outcome(NamedTuple):
+    """What a worker reports back about one test; tests don't pickle."""
+
+    output: str
+    failures: list[tuple[str, str]]
+    errors: list[tuple[str, str]]
+    skipped: int
+    expected_failures: int
+    unexpected_successes: int
+    elaboration: sim.ElaborationStats
+
+
+def _tests(suite: TestSuite) -> Iterator[unittest.TestCase]:
+    for test in suite:
+        if isinstance(test, TestSuite):
+            yield from _tests(test)
+        else:
+            assert isinstance(test, unittest.TestCase)
+            yield test
+
+
+def _init_worker(
+    counter: "Synchronized[int]", backend: str, vcd: str, vcd_signals: list[str]
+):
+    # Spawned workers (the default off Linux) start from a fresh import, so
+    # everything main() set up is passed in again.
+    with counter.get_lock():
+        counter.value += 1
+        worker = counter.value
+    sim.set_build_dir(path(f"build/test-{worker}"))
+    sim.set_backend(backend)
+    sim.set_vcd(vcd, vcd_signals)
+
+
+def _run(test: unittest.TestCase | str) -> _Outcome:
+    runnable: unittest.TestCase | TestSuite = (
+        TestLoader().loadTestsFromName(test) if isinstance(test, str) else test
+    )
+    before = sim.elaboration_stats()
+    stream = io.StringIO()
+    runner = TextTestRunner(stream, verbosity=2)
+    result = unittest.TextTestResult(
+        runner.stream, runner.descriptions, runner.verbosity
+    )
+    # The sim prints where failing VCDs went; keep it with the test's line.
+    with redirect_stdout(stream):
+        runnable(result)
+    after = sim.elaboration_stats()
+    return _Outcome(
+        stream.getvalue(),
+        [(result.getDescription(t), tb) for t, tb in result.failures],
+        [(result.getDescription(t), tb) for t, tb in result.errors],
+        len(result.skipped),
+        len(result.expectedFailures),
+        len(result.unexpectedSuccesses),
+        sim.ElaborationStats(
+            after.designs - before.designs,
+            after.hits - before.hits,
+            after.spent - before.spent,
+            after.saved - before.saved,
+        ),
+    )
+
+
+def _run_parallel(
+    suite: TestSuite, jobs: int, backend: str, vcd: str, vcd_signals: list[str]
+) -> bool:
+    """
+    Runs each test in suite in a pool of jobs workers, each simulating with
+    backend and writing VCDs as set_vcd(vcd, vcd_signals) says to its own
+    build directory, and reports the results in suite order as TextTestRunner
+    would.
+    """
+    started = time.perf_counter()
+    tests = list(_tests(suite))
+
+    # Modules that failed to import show up as placeholder tests that can't
+    # be loaded again by name; run those here.
+    names: list[unittest.TestCase | str] = [
+        test if test.id().startswith("unittest.") else test.id() for test in tests
+    ]
+    remote = [name for name in names if isinstance(name, str)]
+
+    outcomes: list[_Outcome] = []
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(multiprocessing.Value("i", 0), backend, vcd, vcd_signals),
+    ) as executor:
+        pending = executor.map(_run, remote)
+        for name in names:
+            outcome = next(pending) if isinstance(name, str) else _run(name)
+            sys.stderr.write(outcome.output)
+            sys.stderr.flush()
+            outcomes.append(outcome)
+
+    elapsed = time.perf_counter() - started
+    failures = [f for o in outcomes for f in o.failures]
+    errors = [e for o in outcomes for e in o.errors]
+    for flavour, problems in [("ERROR", errors), ("FAIL", failures)]:
+        for description, tb in problems:
+            print("=" * 70, file=sys.stderr)
+            print(f"{flavour}: {description}", file=sys.stderr)
+            print("-" * 70, file=sys.stderr)
+            print(tb, file=sys.stderr)
+    print("-" * 70, file=sys.stderr)
+    print(
+        f"Ran {len(tests)} test{'' if len(tests) == 1 else 's'} "
+        f"in {elapsed:.3f}s across {jobs} workers",
+        file=sys.stderr,
+    )
+    print(file=sys.stderr)
+
+    details = [
+        f"{name}={count}"
+        for name, count in [
+            ("failures", len(failures)),
+            ("errors", len(errors)),
+            ("skipped", sum(o.skipped for o in outcomes)),
+            ("expected failures", sum(o.expected_failures for o in outcomes)),
+            ("unexpected successes", sum(o.unexpected_successes for o in outcomes)),
+        ]
+        if count
+    ]
+    successful = not (
+        failures or errors or any(o.unexpected_successes for o in outcomes)
+    )
+    status = "OK" if successful else "FAILED"
+    print(status + (f" ({', '.join(details)})" if details else ""), file=sys.stderr)
+    elaboration = [o.elaboration for o in outcomes]
+    _report_elaboration(
+        sim.ElaborationStats(
+            sum(e.designs for e in elaboration),
+            sum(e.hits for e in elaboration),
+            sum(e.spent for e in elaboration),
+            sum(e.saved for e in elaboration),
+        )
+    )
+    return successful
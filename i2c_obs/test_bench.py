@@ -0,0 +1,76 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from amaranth.sim import Delay, Settle
+
+from . import bench, sim
+
+
+def _result(workload: str, backend: str, cycles_per_second: int) -> bench.Result:
+    return bench.Result(workload, backend, cycles_per_second, 1.0, 0.5, None)
+
+
+class TestBench(unittest.TestCase):
+    def test_counted(self):
+        def procedure() -> sim.Procedure:
+            yield
+            yield Settle()
+            yield Delay(5e-6)
+            yield
+            yield Delay()
+
+        cycles = [0]
+        counted = bench.counted(procedure(), 1e-6, cycles)
+        commands = list(counted)
+        self.assertEqual(len(commands), 5)
+        # Bare yields and delays count; settling and zero-length delays don't.
+        self.assertEqual(cycles, [1 + 5 + 1])
+
+    def test_counted_responses(self):
+        received: list[int] = []
+
+        def procedure() -> sim.Procedure:
+            received.append((yield))
+            received.append((yield))
+
+        counted = bench.counted(procedure(), 1e-6, [0])
+        next(counted)
+        counted.send(3)
+        with self.assertRaises(StopIteration):
+            counted.send(4)
+        self.assertEqual(received, [3, 4])
+
+    def test_compare(self):
+        baseline = {
+            "results": [
+                {"workload": w, "backend": b, "cycles_per_second": 1_000}
+                for w in ["top", "uart"]
+                for b in ["pysim", "cxxrtl"]
+            ]
+        }
+
+        def compare(results: list[bench.Result]) -> tuple[bool, str]:
+            out = io.StringIO()
+            with redirect_stdout(out):
+                ok = bench.compare(results, baseline, 0.25)
+            return ok, out.getvalue()
+
+        ok, out = compare(
+            [_result("top", "pysim", 800), _result("uart", "cxxrtl", 2_000)]
+        )
+        self.assertTrue(ok)
+        self.assertNotIn("REGRESSED", out)
+        self.assertIn("-20.0% vs baseline", out)
+        self.assertIn("+100.0% vs baseline", out)
+
+        ok, out = compare(
+            [_result("top", "pysim", 700), _result("uart", "pysim", 1_000)]
+        )
+        self.assertFalse(ok)
+        self.assertEqual(out.count("REGRESSED"), 1)
+
+        # Workloads the baseline doesn't have are left out.
+        ok, out = compare([_result("new", "pysim", 1)])
+        self.assertTrue(ok)
+        self.assertEqual(out, "")
@@ -0,0 +1,33 @@
+import tempfile
+import unittest
+from argparse import Namespace
+from pathlib import Path
+
+from .build import Built, keep_best
+from .report import Report
+from .test_report import RPT_NEW
+
+
+def _tim(fmax: float) -> str:
+    return f"Info: Max frequency for clock 'clk': {fmax:.2f} MHz (PASS at 12.00 MHz)\n"
+
+
+class TestBuild(unittest.TestCase):
+    def testkeep_best(self):
+        args = Namespace(target="icebreaker", speed="400000")
+        with tempfile.TemporaryDirectory() as dir:
+            outputs: dict[int | None, Path] = {}
+            # Seed 2 only just meets timing, with no margin at all; it's still
+            # better than missing it.
+            for seed, fmax in [(1, 11.0), (2, 12.0), (3, 10.0)]:
+                outputs[seed] = Path(dir, str(seed))
+                outputs[seed].mkdir()
+                (outputs[seed] / "top.rpt").write_text(RPT_NEW)
+                (outputs[seed] / "top.tim").write_text(_tim(fmax))
+
+            report = keep_best(args, Built([], outputs), Path(dir, "build"))
+            self.assertEqual(report.seed, 2)
+            self.assertEqual(report.margin, 0.0)
+            self.assertEqual(sorted(report.seeds or {}), [1, 2, 3])
+            self.assertEqual(Report.load(Path(dir, "build", "top.report.json")), report)
+            self.assertEqual(Path(dir, "build", "top.tim").read_text(), _tim(12.0))
@@ -0,0 +1,53 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from . import cache
+
+
+class TestCache(unittest.TestCase):
+    def test_digest(self):
+        self.assertEqual(cache.digest("ab", "c"), cache.digest(b"ab", b"c"))
+        self.assertNotEqual(cache.digest("ab", "c"), cache.digest("a", "bc"))
+
+    def test_tool_id(self):
+        self.assertIn("Python", cache.tool_id(sys.executable))
+        # false takes no --version; it's known by where it is instead.
+        self.assertIn("false", cache.tool_id("false"))
+        self.assertEqual(cache.tool_id("no-such-tool"), "no-such-tool not found")
+
+    def test_stage(self):
+        built: list[Path] = []
+
+        def produce(out_dir: Path):
+            built.append(out_dir)
+            (out_dir / "out").write_text("hello")
+
+        with tempfile.TemporaryDirectory() as root:
+            key = cache.digest("input")
+            first = cache.stage("greet", key, produce, root=Path(root))
+            second = cache.stage("greet", key, produce, root=Path(root))
+            other = cache.stage(
+                "greet", cache.digest("other"), produce, root=Path(root)
+            )
+
+            self.assertEqual((first.hit, second.hit, other.hit), (False, True, False))
+            self.assertEqual(first.dir, second.dir)
+            self.assertNotEqual(first.dir, other.dir)
+            self.assertEqual(len(built), 2)
+            self.assertEqual((second.dir / "out").read_text(), "hello")
+            self.assertEqual(
+                sorted(p.name for p in Path(root, "greet").iterdir()),
+                sorted([first.dir.name, other.dir.name]),
+            )
+
+    def test_stage_failure(self):
+        def produce(out_dir: Path):
+            (out_dir / "partial").write_text("")
+            raise RuntimeError("compiler fell over")
+
+        with tempfile.TemporaryDirectory() as root:
+            with self.assertRaises(RuntimeError):
+                cache.stage("broken", cache.digest("x"), produce, root=Path(root))
+            self.assertEqual(list(Path(root, "broken").iterdir()), [])
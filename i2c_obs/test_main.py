@@ -0,0 +1,24 @@
+import subprocess
+import sys
+import unittest
+
+from .base import path
+
+
+class TestMain(unittest.TestCase):
+    def test_debugger_skips_amaranth(self):
+        # The debugger is launched from scripts often enough that loading
+        # Amaranth for it would add up.
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "i2c_obs", "debugger", "-h"],
+            cwd=path(""),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        imported = [
+            line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines()
+        ]
+        self.assertIn("i2c_obs.rtl.uart.symbols", imported)
+        self.assertNotIn("amaranth", imported)
+        self.assertNotIn("i2c_obs.platform", imported)
@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from .report import Clock, Report, Utilisation
+
+RPT_OLD = """\
+2.50. Printing statistics.
+
+=== top ===
+
+   Number of wires:                954
+   Number of wire bits:           2301
+   Number of cells:               1290
+     SB_CARRY                      210
+     SB_LUT4                       776
+     SB_RAM40_4K                     4
+
+2.51. Executing CHECK pass (checking for obvious problems).
+"""
+
+RPT_NEW = """\
+2.50. Printing statistics.
+
+=== top ===
+
+        +----------Local Count, excluding submodules.
+        |
+      954 wires
+     2301 wire bits
+     1290 cells
+      210   SB_CARRY
+      776   SB_LUT4
+        4   SB_RAM40_4K
+
+2.51. Executing CHECK pass (checking for obvious problems).
+"""
+
+TIM = """\
+Info: Device utilisation:
+Info: \t         ICESTORM_LC:   804/ 5280    15%
+Info: \t        ICESTORM_RAM:     4/   30    13%
+Info: Placed 12 cells based on constraints.
+Info: Max frequency for clock 'clk$glb_clk': 60.10 MHz (PASS at 12.00 MHz)
+Info: Max frequency for clock 'clk$glb_clk': 55.25 MHz (PASS at 12.00 MHz)
+"""
+
+
+class TestReport(unittest.TestCase):
+    def test_parse(self):
+        for rpt in [RPT_OLD, RPT_NEW]:
+            report = Report.parse(rpt, TIM, target="icebreaker", speed=400_000)
+            self.assertEqual(
+                report.stats, {"wires": 954, "wire bits": 2301, "cells": 1290}
+            )
+            self.assertEqual(
+                report.cells, {"SB_CARRY": 210, "SB_LUT4": 776, "SB_RAM40_4K": 4}
+            )
+            self.assertEqual(
+                report.utilisation,
+                {
+                    "ICESTORM_LC": Utilisation(804, 5280),
+                    "ICESTORM_RAM": Utilisation(4, 30),
+                },
+            )
+            # After routing, not placement.
+            self.assertEqual(report.clocks, {"clk$glb_clk": Clock(55.25, 12.0)})
+
+    def test_save_compare(self):
+        before = Report.parse(RPT_OLD, TIM, target="icebreaker", speed=400_000)
+        before = before._replace(
+            seed=2, seeds={1: {"clk": Clock(50.0, 12.0)}, 2: before.clocks}
+        )
+        with tempfile.TemporaryDirectory() as dir:
+            before.save(Path(dir, "top.report.json"))
+            self.assertEqual(Report.load(Path(dir, "top.report.json")), before)
+
+        after = before._replace(
+            cells={**before.cells, "SB_LUT4": 800},
+            clocks={"clk$glb_clk": Clock(50.0, 12.0)},
+        )
+        self.assertEqual(
+            after.compare(before),
+            [
+                "SB_LUT4: 776 -> 800 (+3.1%)",
+                "Fmax clk$glb_clk: 55.25 MHz -> 50 MHz (-9.5%)",
+            ],
+        )
+        self.assertEqual(after.compare(after), [])
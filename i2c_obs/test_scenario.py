@@ -0,0 +1,37 @@
+import unittest
+
+from .scenario import Scenario, ScenarioError, Step
+
+
+class TestScenario(unittest.TestCase):
+    def test_parse(self):
+        first, second = Scenario.parse("""
+            # Comments and blank lines are skipped.
+            scenario first
+            scl 1
+            wait 3  # so are trailing ones
+            stretch 2..4
+
+            scenario second
+            oe 0
+            """)
+        self.assertEqual(first.name, "first")
+        self.assertEqual(
+            first.steps,
+            [Step(4, "scl", 1, 1), Step(5, "wait", 3, 3), Step(6, "stretch", 2, 4)],
+        )
+        self.assertEqual(second.name, "second")
+        self.assertEqual(second.steps, [Step(9, "oe", 0, 0)])
+
+    def test_parse_errors(self):
+        for text, message in [
+            ("scl 1", "<scenario>:1: expected a scenario before any steps"),
+            ("scenario a\nscl 2", "<scenario>:2: scl takes 0 or 1, not '2'"),
+            ("scenario a\nstretch 4..2", "<scenario>:2: stretch range '4..2' is empty"),
+            ("scenario a\nwait", "<scenario>:2: can't parse 'wait'"),
+            ("scenario a\nscenario a", "<scenario>:2: scenario 'a' is already defined"),
+        ]:
+            with self.subTest(text=text):
+                with self.assertRaises(ScenarioError) as cm:
+                    Scenario.parse(text)
+                self.assertEqual(str(cm.exception), message)
@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from amaranth.sim import Settle
+
+from . import sim
+from .rtl import Top
+
+
+class TestElaborationCache(unittest.TestCase):
+    @unittest.skipUnless(sim.elaboration_cached(), "elaboration cache disabled")
+    def test_reuse_across_tests(self):
+        class TestTwice(sim.TestCase):
+            def test_sim_first(self, dut: Top) -> sim.Procedure:
+                yield Settle()
+
+            def test_sim_second(self, dut: Top) -> sim.Procedure:
+                yield Settle()
+
+        before = sim.elaboration_stats()
+        suite = unittest.defaultTestLoader.loadTestsFromTestCase(TestTwice)
+        result = unittest.TestResult()
+        suite.run(result)
+        after = sim.elaboration_stats()
+
+        self.assertTrue(result.wasSuccessful(), result.errors + result.failures)
+        self.assertEqual(after.designs - before.designs, 1)
+        self.assertEqual(after.hits - before.hits, 1)
+
+
+class TestVCD(unittest.TestCase):
+    @unittest.skipUnless(sim.backend() == "pysim", "only pysim writes VCDs")
+    def test_signals(self):
+        class TestTraced(sim.TestCase):
+            def test_sim_traced(self, dut: Top) -> sim.Procedure:
+                for level in [0, 1, 0]:
+                    yield dut.scl_i.eq(level)
+                    yield
+
+        vcd_mode, vcd_signals = sim.vcd()
+        build_dir = sim.build_dir()
+        with tempfile.TemporaryDirectory() as dir:
+            sim.set_build_dir(Path(dir))
+            sim.set_vcd("always", ["top.scl_*"])
+            try:
+                suite = unittest.defaultTestLoader.loadTestsFromTestCase(TestTraced)
+                result = unittest.TestResult()
+                suite.run(result)
+            finally:
+                sim.set_vcd(vcd_mode, vcd_signals)
+                sim.set_build_dir(build_dir)
+            self.assertTrue(result.wasSuccessful(), result.errors + result.failures)
+
+            (vcd,) = Path(dir).glob("*.vcd")
+            lines = vcd.read_text().splitlines()
+        names = {line.split()[4] for line in lines if line.startswith("$var")}
+        self.assertEqual(names, {"scl_i", "scl_o", "scl_oe", "scl_last"})
+        # Only their changes are kept, and SCL's are there.
+        idents = {line.split()[3] for line in lines if line.startswith("$var")}
+        body = lines[lines.index("$enddefinitions $end") + 1 :]
+        changed = {
+            line.split()[1] if " " in line else line[1:]
+            for line in body
+            if line and not line.startswith(("#", "$"))
+        }
+        self.assertLessEqual(changed, idents)
+        self.assertTrue(changed)